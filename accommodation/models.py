@@ -11,6 +11,7 @@ from wagtail.models import Page
 
 from bookings.accommodation_booking_form import AccommodationBookingForm
 from mtapp.choices import GLOBAL_ICON_CHOICES, DESTINATION_CHOICES
+from mtapp.listings import accommodation_cards
 from mtapp.utils import convert_pdf_to_images, generate_code_id
 from mtapp.utils_blocks import PricingTierBlock
 from streams import blocks
@@ -760,7 +761,7 @@ class AccommodationsIndexPage(SeoMixin, RoutablePageMixin, Page):
             Model = type_map[acc_type]
 
         # Base queryset — only one model (like tours)
-        qs = Model.objects.live().public().specific()
+        qs = Model.objects.live().public()
 
         # Apply filters
         if request.GET.get('destination'):
@@ -797,6 +798,7 @@ class AccommodationsIndexPage(SeoMixin, RoutablePageMixin, Page):
         # Pagination
         paginator = Paginator(qs.order_by('-start_date'), 12)
         page = paginator.get_page(request.GET.get('page', 1))
+        page.object_list = accommodation_cards(page.object_list)
 
         context.update({
             'accommodations_pag': page,
@@ -0,0 +1,16 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:59
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_ratelimitcounter'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='RateLimitCounter',
+        ),
+    ]
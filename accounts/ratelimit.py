@@ -0,0 +1,208 @@
+"""
+Sliding-window rate limiting on counters shared by all workers.
+
+django-ratelimit's fixed windows lived in the per-process LocMem cache in production, so every
+worker kept its own counters, the effective limit was multiplied by the number of workers and
+nothing could be inspected. This limiter keeps its counters in the shared cache
+(mtapp.cache_versions.shared_cache, the SHARED_CACHE_ALIAS backend), one key per client, scope
+and fixed bucket, and approximates a true sliding window from two buckets:
+
+    count = previous_bucket * (1 - elapsed / period) + current_bucket
+
+A hit is add() for a new bucket and incr() afterwards: two cache calls per limited request.
+incr() is atomic on Redis and Memcached; on the DatabaseCache it reads and writes back, so hits
+racing on the same key can be undercounted by the few that overlap.
+
+Limits are configured per endpoint scope in settings.RATELIMITS, e.g. {'pricing': '30/m'}.
+Clients are identified by REMOTE_ADDR, or behind RATELIMIT_TRUSTED_PROXIES reverse proxies
+by the X-Forwarded-For entry the outermost of them added.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from functools import wraps
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from mtapp.cache_versions import shared_cache
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+# Clients remembered per scope and bucket for current_counters()
+MAX_TRACKED_CLIENTS = 500
+
+DEFAULT_RATELIMITS = {
+    'pricing': '30/m',
+    'batch_quote': '90/m',
+    'booking_start': '8/h',
+    'proposal_submit': '5/h',
+    'captcha_refresh': '20/m',
+    'nominatim': '60/m',
+}
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, result):
+        super().__init__(f"Rate limit exceeded for {result.scope}")
+        self.result = result
+
+
+@dataclass
+class RateLimitResult:
+    scope: str
+    ident: str
+    limit: int
+    period: int
+    count: float
+    retry_after: int
+
+    @property
+    def limited(self):
+        return self.count > self.limit
+
+
+def parse_rate(rate):
+    """'30/m' -> (30, 60); '5/15m' -> (5, 900)."""
+    count, period = rate.split('/')
+    unit = period[-1]
+    multiplier = int(period[:-1]) if len(period) > 1 else 1
+    return int(count), multiplier * PERIODS[unit]
+
+
+def get_rates():
+    rates = dict(DEFAULT_RATELIMITS)
+    rates.update(getattr(settings, 'RATELIMITS', {}))
+    return rates
+
+
+def client_ip(request):
+    """
+    The address of the client. X-Forwarded-For is only read behind RATELIMIT_TRUSTED_PROXIES
+    proxies, counting from the right: entries left of the one the outermost proxy appended are
+    whatever the client sent.
+    """
+    proxies = getattr(settings, 'RATELIMIT_TRUSTED_PROXIES', 0)
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(',') if hop.strip()]
+        if hops:
+            return hops[-min(proxies, len(hops))]
+    return request.META.get('REMOTE_ADDR', 'unknown')
+
+
+def user_or_ip(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{client_ip(request)}"
+
+
+KEY_FUNCS = {
+    'ip': lambda request: f"ip:{client_ip(request)}",
+    'user_or_ip': user_or_ip,
+}
+
+
+def _weighted_count(previous, current, now, bucket_start, period):
+    elapsed = now - bucket_start
+    return previous * (1 - elapsed / period) + current
+
+
+def _counter_key(scope, bucket, ident):
+    return f"ratelimit:{scope}:{bucket}:{ident}"
+
+
+def _clients_key(scope, bucket):
+    return f"ratelimit:{scope}:{bucket}:clients"
+
+
+def _increment(cache, scope, ident, bucket, period, cost):
+    """Add `cost` to the bucket's counter and return its new value."""
+    key = _counter_key(scope, bucket, ident)
+    # Kept through the next bucket, which weighs it as the previous one
+    timeout = 2 * period + 1
+    if cache.add(key, cost, timeout):
+        # First hit of this client in the bucket: remember it for current_counters()
+        clients = cache.get(_clients_key(scope, bucket)) or []
+        if len(clients) < MAX_TRACKED_CLIENTS:
+            cache.set(_clients_key(scope, bucket), clients + [ident], timeout)
+        return cost
+    try:
+        return cache.incr(key, cost)
+    except ValueError:
+        # Expired between add() and incr()
+        cache.add(key, cost, timeout)
+        return cost
+
+
+def hit(scope, ident, rate=None, cost=1):
+    """Record `cost` requests for (scope, ident) and return the sliding-window result."""
+    limit, period = parse_rate(rate or get_rates()[scope])
+    now = time.time()
+    bucket = int(now // period)
+    bucket_start = bucket * period
+
+    cache = shared_cache()
+    current = _increment(cache, scope, ident, bucket, period, cost)
+    previous = cache.get(_counter_key(scope, bucket - 1, ident), 0)
+    count = _weighted_count(previous, current, now, bucket_start, period)
+    retry_after = max(1, int(bucket_start + period - now))
+    return RateLimitResult(scope, ident, limit, period, round(count, 2), retry_after)
+
+
+def sliding_ratelimit(scope, key='user_or_ip', methods=None, cost=None):
+    """
+    View decorator. Calls settings.RATELIMIT_VIEW (accounts.views.ratelimit_exceeded) once the
+    sliding-window count for `scope` goes over its configured rate. `methods` limits which HTTP
+    methods are counted (all by default); `cost(request)` is how many hits a request counts as
+    (one by default), for endpoints that do many units of work per request.
+    """
+    key_func = KEY_FUNCS[key] if isinstance(key, str) else key
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not getattr(settings, 'RATELIMIT_ENABLE', True) or (methods and request.method not in methods):
+                return view_func(request, *args, **kwargs)
+
+            result = hit(scope, key_func(request), cost=cost(request) if cost else 1)
+            request.sliding_ratelimit = result
+            if result.limited:
+                logger.warning(f"Rate limit hit: {scope} {result.ident} ({result.count}/{result.limit})")
+                exceeded_view = import_string(getattr(settings, 'RATELIMIT_VIEW', 'accounts.views.ratelimit_exceeded'))
+                return exceeded_view(request, RateLimitExceeded(result))
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_counters():
+    """Sliding-window counts for every client seen in the current or previous bucket, per scope."""
+    now = time.time()
+    counters = {}
+
+    for scope, rate in get_rates().items():
+        limit, period = parse_rate(rate)
+        bucket = int(now // period)
+        bucket_start = bucket * period
+
+        cache = shared_cache()
+        idents = dict.fromkeys(
+            (cache.get(_clients_key(scope, bucket - 1)) or []) + (cache.get(_clients_key(scope, bucket)) or [])
+        )
+        keys = {(b, ident): _counter_key(scope, b, ident) for ident in idents for b in (bucket - 1, bucket)}
+        values = cache.get_many(keys.values()) if keys else {}
+
+        clients = []
+        for ident in idents:
+            previous = values.get(keys[(bucket - 1, ident)], 0)
+            current = values.get(keys[(bucket, ident)], 0)
+            count = _weighted_count(previous, current, now, bucket_start, period)
+            clients.append({'ident': ident, 'count': round(count, 2), 'limited': count > limit})
+
+        clients.sort(key=lambda c: c['count'], reverse=True)
+        counters[scope] = {'rate': rate, 'limit': limit, 'period': period, 'clients': clients}
+
+    return counters
@@ -1,13 +1,10 @@
 from django.http import JsonResponse
 
-from django.db import connection
 from django.views.decorators.http import require_http_methods
-from django.db.utils import OperationalError
 from django.shortcuts import render
 from django.utils import timezone
-from django.core.cache import cache
 from datetime import timedelta
-from django_ratelimit.core import _split_rate, _make_cache_key  # Import internals for key building (safe)
+from accounts.ratelimit import current_counters, sliding_ratelimit
 from django.db.models import Sum
 from bookings.models import Booking
 from accounts.forms import CustomSignupForm
@@ -51,77 +48,52 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         return context
 
 
+PERIOD_NAMES = {1: 'second', 60: 'minute', 3600: 'hour', 86400: 'day'}
+
+
 def ratelimit_exceeded(request, exception):
-    # Reconstruct the cache key (mimics django-ratelimit's _make_cache_key)
-    group = request.resolver_match.func.__module__ + '.' + request.resolver_match.func.__name__  # e.g., 'bookings.views.bookingstartview'
-    rate = '5/h'  # Match your decorator's rate; make dynamic if multi-rates
-    value = request.META.get('REMOTE_ADDR', 'unknown')  # For key='ip'; use str(request.user.pk) for 'user'
-    methods = request.method.upper()  # e.g., 'POST'
-
-    # Build exact key (from core.py source)
-    limit, period = _split_rate(rate)
-    safe_rate = f"{limit}/{period}s"  # e.g., '5/3600s'
-    window = int(timezone.now().timestamp()) // period * period  # Current window start
-    cache_key = _make_cache_key(group, window, rate, value, methods)  # Uses core func
-
-    # Fetch data from cache
-    data = cache.get(cache_key)
-    hits = data.get('count', 0) if data else 0  # Ratelimit stores {'count': N, ...}
-    max_hits = limit  # From rate
-    expiry = timezone.now() + timedelta(hours=1)  # Default for 'h'; compute from period
-    time_left = expiry - timezone.now()
-
-    context = {
-        'reason': 'Rate limit exceeded',
-        'hits': hits,
-        'max_hits': max_hits,
-        'time_left': time_left,
-        'retry_after': max(time_left.total_seconds(), 60),
-        'form_url': request.POST.get('next', '') or request.path,
-    }
-    return render(request, 'ratelimit_blocked.html', context, status=429)
+    """
+    RATELIMIT_VIEW for both django-ratelimit and accounts.ratelimit.sliding_ratelimit.
+    Numbers come from the limiter result instead of rebuilding cache keys by hand.
+    """
+    result = getattr(exception, 'result', None) or getattr(request, 'sliding_ratelimit', None)
+    hits = int(result.count) if result else None
+    max_hits = result.limit if result else None
+    retry_after = result.retry_after if result else 60
+
+    is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest' or 'application/json' in request.headers.get('accept', '')
+    if is_ajax or request.headers.get('HX-Request'):
+        response = JsonResponse({
+            'error': 'Rate limit exceeded',
+            'scope': result.scope if result else None,
+            'retry_after': retry_after,
+        }, status=429)
+    else:
+        context = {
+            'reason': 'Rate limit exceeded',
+            'hits': hits,
+            'max_hits': max_hits,
+            'period_display': PERIOD_NAMES.get(result.period, f"{result.period}s") if result else 'hour',
+            'time_left': timedelta(seconds=retry_after),
+            'retry_after': max(1, retry_after // 60),
+            'form_url': request.POST.get('next', '') or request.path,
+        }
+        response = render(request, 'accounts/ratelimit_blocked.html', context, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
 
 
 
 @staff_member_required
 @require_http_methods(["GET"])
 def inspect_ratelimit(request):
-    all_keys = []
+    """Current sliding-window counters per endpoint scope (shared across workers)."""
     try:
-        # PA MySQL: Cache table is 'default' (from LOCATION='default')
-        TABLE_NAME = 'default'
-        with connection.cursor() as cursor:
-            # Query prefixed table with backticks
-            cursor.execute(f"SELECT cache_key FROM `{TABLE_NAME}` WHERE cache_key LIKE %s", ['rl:%'])
-            raw_keys = [row[0] for row in cursor.fetchall()]
-
-        for key in raw_keys:
-            value = cache.get(key)
-            all_keys.append({
-                'key': key,
-                'value': value,
-                'expiry_remaining': None  # Optional: value.get('expire') if stored
-            })
-    except OperationalError as e:
-        # Fallback: Query without prefix (Django auto-handles in some cases)
-        try:
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT cache_key FROM `default` WHERE cache_key LIKE %s", ['rl:%'])
-                raw_keys = [row[0] for row in cursor.fetchall()]
-            # ... same for loop as above
-            for key in raw_keys:
-                value = cache.get(key)
-                all_keys.append({
-                    'key': key,
-                    'value': value,
-                    'expiry_remaining': None
-                })
-        except OperationalError as e2:
-            return JsonResponse({'error': f'Query failed: {str(e2)}. Table may need manual check.'}, status=500)
+        counters = current_counters()
     except Exception as e:
-        return JsonResponse({'error': f'Cache inspection failed: {str(e)}'}, status=500)
+        return JsonResponse({'error': f'Counter inspection failed: {str(e)}'}, status=500)
 
-    return JsonResponse({'locks': all_keys})
+    return JsonResponse({'scopes': counters, 'generated_at': timezone.now().isoformat()})
 
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET
@@ -129,6 +101,7 @@ from captcha.models import CaptchaStore
 
 @csrf_exempt
 @require_GET
+@sliding_ratelimit('captcha_refresh', key='ip')
 def captcha_refresh(request):
     # Generate new CAPTCHA hash
     new_hash = CaptchaStore.generate_key()
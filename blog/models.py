@@ -22,8 +22,9 @@ from wagtail import blocks
 from wagtail_localize.fields import TranslatableField, SynchronizedField
 
 from streams.blocks import CTA_Block_2B, FAQBlock, SidebarWidgetBlock, TourTeaserBlock, FadeCarousel
-from taggit.models import Tag
-from django.db.models import Count
+
+from blog.taxonomy import get_taxonomy
+from mtapp.listings import post_cards
 
 
 # ------------------------------------------------------------------
@@ -93,17 +94,27 @@ class BlogIndexPage(RoutablePageMixin, SeoMixin, Page):
     ]
 
     # ------------------------------------------------------------------
-    # Helper: pagination
+    # Helpers: posts of this index's locale, pagination into PostCards
     # ------------------------------------------------------------------
+    def get_posts(self):
+        """Live, public posts in this locale, without the StreamFields the listing cards don't use."""
+        return (
+            BlogDetailPage.objects.live().public().descendant_of(self).filter(locale=self.locale)
+            .defer('body', 'sidebar')
+            .select_related('banner_image', 'owner')
+        )
+
     def paginate(self, request, queryset):
         paginator = Paginator(queryset.order_by('-date_published'), self.posts_per_page)
         page = request.GET.get('page')
         try:
-            return paginator.page(page)
+            posts = paginator.page(page)
         except PageNotAnInteger:
-            return paginator.page(1)
+            posts = paginator.page(1)
         except EmptyPage:
-            return paginator.page(paginator.num_pages)
+            posts = paginator.page(paginator.num_pages)
+        posts.object_list = post_cards(posts.object_list)
+        return posts
 
     # ------------------------------------------------------------------
     # 1. Main blog index → /blog/
@@ -111,7 +122,7 @@ class BlogIndexPage(RoutablePageMixin, SeoMixin, Page):
     def get_context(self, request, *args, **kwargs):
         context = super().get_context(request, *args, **kwargs)
         
-        posts = BlogDetailPage.objects.descendant_of(self).live().public().order_by('-date_published').filter(locale=self.locale).specific()
+        posts = self.get_posts()
 
         # === FILTERS ===
         selected_category = None
@@ -130,7 +141,7 @@ class BlogIndexPage(RoutablePageMixin, SeoMixin, Page):
         # Tag filter
         tag_slug = request.GET.get('tag')
         if tag_slug:
-            posts = posts.filter(tags__slug=tag_slug)
+            posts = posts.filter(tags__slug=tag_slug).distinct()
             selected_tag = tag_slug.replace('-', ' ').title()
 
         # Country filter
@@ -145,16 +156,10 @@ class BlogIndexPage(RoutablePageMixin, SeoMixin, Page):
         context['selected_tag'] = selected_tag
         context['selected_country'] = selected_country
 
-        # For sidebar
-        context['categories'] = BlogCategory.objects.annotate(
-            count=models.Count('posts')
-        ).filter(count__gt=0)
-        
-        context['popular_tags'] = Tag.objects.filter(
-            blog_blogdetailpagetag_items__content_object__live=True
-        ).annotate(
-            post_count=Count('blog_blogdetailpagetag_items')
-        ).order_by('-post_count')[:12]
+        # For sidebar (cached per locale, see blog/taxonomy.py)
+        taxonomy = get_taxonomy(self.locale_id)
+        context['categories'] = taxonomy['categories']
+        context['popular_tags'] = taxonomy['popular_tags']
         context['source_countries'] = dict(BlogDetailPage._meta.get_field('source_country').choices)
 
         return context
@@ -164,7 +169,7 @@ class BlogIndexPage(RoutablePageMixin, SeoMixin, Page):
     # ------------------------------------------------------------------
     @route(r'^tag/(?P<tag_slug>[\w-]+)/?$')
     def tag_view(self, request, tag_slug):
-        posts = BlogDetailPage.objects.live().public().filter(tags__slug=tag_slug)
+        posts = self.get_posts().filter(tags__slug=tag_slug).distinct()
         return self.render(
             request,
             context_overrides={
@@ -185,7 +190,7 @@ class BlogIndexPage(RoutablePageMixin, SeoMixin, Page):
             from django.http import Http404
             raise Http404("Category not found")
 
-        posts = BlogDetailPage.objects.live().public().filter(category=category)
+        posts = self.get_posts().filter(category=category)
         return self.render(
             request,
             context_overrides={
@@ -210,7 +215,7 @@ class BlogIndexPage(RoutablePageMixin, SeoMixin, Page):
         country_key = self.SOURCE_COUNTRY_ROUTES[country_slug]
         pretty_name = dict(BlogDetailPage._meta.get_field('source_country').choices)[country_key]
 
-        posts = BlogDetailPage.objects.live().public().filter(source_country=country_key)
+        posts = self.get_posts().filter(source_country=country_key)
 
         return self.render(
             request,
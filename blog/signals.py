@@ -0,0 +1,33 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from blog.models import BlogCategory, BlogDetailPage
+from blog.taxonomy import refresh_taxonomy
+
+logger = logging.getLogger(__name__)
+
+
+def _refresh(locale_id=None):
+    try:
+        refresh_taxonomy(locale_id)
+    except Exception as e:  # Never fail a publish because of the sidebar summary
+        logger.error(f"Blog taxonomy refresh failed: {e}")
+
+
+@receiver(page_published, sender=BlogDetailPage)
+@receiver(page_unpublished, sender=BlogDetailPage)
+@receiver(post_page_move, sender=BlogDetailPage)
+@receiver(post_delete, sender=BlogDetailPage)
+def refresh_on_post_change(sender, instance, **kwargs):
+    transaction.on_commit(lambda: _refresh(instance.locale_id))
+
+
+@receiver(post_save, sender=BlogCategory)
+@receiver(post_delete, sender=BlogCategory)
+def refresh_on_category_change(sender, instance, **kwargs):
+    transaction.on_commit(_refresh)
@@ -0,0 +1,77 @@
+"""
+Per-locale blog taxonomy summary for the blog index sidebar.
+
+    {'categories': [{'id', 'name', 'slug', 'count'}],      categories with at least one post
+     'popular_tags': [{'name', 'slug', 'count'}]}          top BLOG_TOP_TAGS tags
+
+Counts cover live, public posts of one locale. The summary is computed with two grouped
+queries, stored in the cache under a version (kept in the shared cache, mtapp/cache_versions.py,
+so every worker sees a bump) and rebuilt by blog/signals.py whenever a post is published,
+unpublished, moved or deleted, or a category changes, so index views never run the aggregates
+themselves.
+"""
+import logging
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from mtapp.cache_versions import bump_version, get_version
+
+logger = logging.getLogger(__name__)
+
+BLOG_TOP_TAGS = 12
+BLOG_TAXONOMY_CACHE_TIMEOUT = 60 * 60 * 24
+BLOG_TAXONOMY_VERSION_KEY = 'blog_taxonomy_version'
+
+
+def _cache_key(locale_id):
+    version = get_version(BLOG_TAXONOMY_VERSION_KEY)
+    return f"blog_taxonomy_{version}_{locale_id}"
+
+
+def build_taxonomy(locale_id):
+    from blog.models import BlogDetailPage, BlogDetailPageTag
+
+    posts = BlogDetailPage.objects.live().public().filter(locale_id=locale_id)
+
+    categories = (
+        posts.exclude(category__isnull=True)
+        .values('category_id', 'category__name', 'category__slug')
+        .annotate(count=Count('pk'))
+        .order_by('category__name')
+    )
+    tags = (
+        BlogDetailPageTag.objects.filter(content_object__in=posts.values('pk'))
+        .values('tag__name', 'tag__slug')
+        .annotate(count=Count('content_object', distinct=True))
+        .order_by('-count', 'tag__name')[:BLOG_TOP_TAGS]
+    )
+
+    return {
+        'categories': [
+            {'id': row['category_id'], 'name': row['category__name'], 'slug': row['category__slug'], 'count': row['count']}
+            for row in categories
+        ],
+        'popular_tags': [
+            {'name': row['tag__name'], 'slug': row['tag__slug'], 'count': row['count']}
+            for row in tags
+        ],
+    }
+
+
+def get_taxonomy(locale_id):
+    """The cached summary for a locale, built on a miss."""
+    key = _cache_key(locale_id)
+    taxonomy = cache.get(key)
+    if taxonomy is None:
+        taxonomy = build_taxonomy(locale_id)
+        cache.set(key, taxonomy, BLOG_TAXONOMY_CACHE_TIMEOUT)
+    return taxonomy
+
+
+def refresh_taxonomy(locale_id=None):
+    """Invalidate every locale's summary and rebuild `locale_id`'s straight away."""
+    bump_version(BLOG_TAXONOMY_VERSION_KEY)
+    if locale_id is not None:
+        get_taxonomy(locale_id)
+    logger.debug(f"Refreshed blog taxonomy (locale {locale_id})")
@@ -3,13 +3,19 @@ from wagtail.api.v2.views import BaseAPIViewSet
 
 
 from . import models
-from tours.models import LandTourPage
+from tours.models import DayTourPage, FullTourPage, LandTourPage
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 
-from .tours_utils import calculate_demand_factor, get_remaining_capacity
+from django.utils.decorators import method_decorator
+
+from accounts.ratelimit import sliding_ratelimit
+from .tours_utils import calculate_demand_factor, get_remaining_capacity, is_known_currency
+from .utils.availability_calendar import get_tour_calendar
+from .utils.batch_pricing import MAX_BATCH_ITEMS, QuoteError, batch_quote
+from .utils.prefetch import prefetch_generic
 
 
 class AvailableDatesView(APIView):
@@ -21,9 +27,9 @@ class AvailableDatesView(APIView):
             return Response({'error': 'Missing tour_type or tour_id'}, status=400)
         
         tour_type_map = {
-            'full': "FullTourPage",
+            'full': FullTourPage,
             'land': LandTourPage,
-            'day': "DayTourPage",
+            'day': DayTourPage,
         }
         tour_model = tour_type_map.get(tour_type.lower())
         if not tour_model:
@@ -46,16 +52,70 @@ class AvailableDatesView(APIView):
                 'demand_factor': calculate_demand_factor(capacity['trip_remaining'], sum(d['total_daily'] for d in capacity['per_day'])),
             })
         
-        # Full available dates (stubbed)
-        available_dates = []
-        return Response({'available_dates': available_dates})  
+        # Month-range calendar: ?month=YYYY-MM&months=N&currency=EUR (defaults to this month)
+        month_str = request.GET.get('month') or date.today().strftime('%Y-%m')
+        try:
+            year, month = (int(part) for part in month_str.split('-'))
+            date(year, month, 1)
+            months = int(request.GET.get('months', 1))
+        except ValueError:
+            return Response({'error': 'Invalid month format (expected YYYY-MM)'}, status=400)
+
+        currency = (request.GET.get('currency') or 'USD').upper()
+        if not is_known_currency(currency):
+            return Response({'error': f'Unsupported currency: {currency}'}, status=400)
+        calendar = get_tour_calendar(tour_type.lower(), tour, year, month, months, currency)
+        calendar['available_dates'] = [
+            day['date'] for m in calendar['months'] for day in m['days'] if day['available']
+        ]
+        return Response(calendar)
+
+def _quote_count(request):
+    quotes = request.data.get('quotes') if isinstance(request.data, dict) else None
+    return min(len(quotes), MAX_BATCH_ITEMS) if isinstance(quotes, list) and quotes else 1
+
+
+@method_decorator(sliding_ratelimit('batch_quote', cost=_quote_count), name='post')
+class BatchQuoteView(APIView):
+    """
+    POST {"quotes": [{"kind": "tour", "tour_type": "day", "id": 12, "date": "2026-03-01",
+                      "adults": 2, "child_ages": [5], "currency": "EUR"},
+                     {"kind": "accommodation", "id": 40, "check_in": "2026-03-01",
+                      "check_out": "2026-03-04", "adults": 2, "currency": "USD"}, ...]}
+    Returns {"quotes": [...]} in request order; bad tuples carry an "error" key.
+
+    Open to anonymous visitors (the front-end calendar); SessionAuthentication still enforces
+    CSRF for logged-in callers. Every quote counts as one hit against the 'batch_quote' limit.
+    """
+    permission_classes = (AllowAny,)
+
+    def post(self, request):
+        quotes = request.data.get('quotes') if isinstance(request.data, dict) else None
+        if not isinstance(quotes, list) or not quotes:
+            return Response({'error': 'Expected a non-empty "quotes" list'}, status=400)
+        if not all(isinstance(q, dict) for q in quotes):
+            return Response({'error': 'Each quote must be an object'}, status=400)
+
+        try:
+            results = batch_quote(quotes)
+        except QuoteError as e:
+            return Response({'error': str(e)}, status=400)
+        return Response({'quotes': results})
+
+
+class TourPrefetchMixin:
+    """Load the tour pages of a listing page in one query per tour type before serializing."""
+
+    def paginate_queryset(self, queryset):
+        return prefetch_generic(super().paginate_queryset(queryset), 'tour')
+
 
-class ProposalsAPIView(BaseAPIViewSet):
+class ProposalsAPIView(TourPrefetchMixin, BaseAPIViewSet):
     model = models.Proposal
     permission_classes = (IsAuthenticated,)
 
 
-class BookingsAPIView(BaseAPIViewSet):
+class BookingsAPIView(TourPrefetchMixin, BaseAPIViewSet):
     model = models.Booking
     permission_classes = (IsAuthenticated,)
 
@@ -0,0 +1,68 @@
+"""
+Benchmark suite for the pricing, availability and listing hot paths.
+
+    data.build(...)        synthetic tours, accommodations and bookings (seeded, reproducible)
+    cases.CASES            name -> factory(fixture) returning the callable to time
+    measure(fn, repeat)    latency percentiles, queries per call and peak traced memory
+    compare(results, baseline, tolerance)   regressions against a stored baseline
+
+Run with `manage.py run_benchmarks` (see its --help). It builds the data in a fresh test
+database (in-memory SQLite under the default settings), so numbers don't depend on whatever is
+in the development database, and compares them with bookings/benchmarks/baseline.json.
+Latency depends on the machine the baseline was recorded on; query counts don't, so those are
+compared exactly.
+"""
+from statistics import mean, quantiles
+import time
+import tracemalloc
+
+from mtapp.querybudget import QueryRecorder
+
+BASELINE_PATH = __path__[0] + '/baseline.json'
+# Latency differences below this many ms are noise, whatever the relative change
+NOISE_MS = 0.5
+
+
+def measure(fn, repeat=20, warmup=2):
+    for _ in range(warmup):
+        fn()
+
+    timings, queries = [], []
+    for _ in range(repeat):
+        with QueryRecorder() as recorder:
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(recorder.total)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    cuts = quantiles(timings, n=100, method='inclusive') if len(timings) > 1 else timings * 99
+    return {
+        'p50_ms': round(cuts[49], 3),
+        'p95_ms': round(cuts[94], 3),
+        'p99_ms': round(cuts[98], 3),
+        'mean_ms': round(mean(timings), 3),
+        'queries': max(queries),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """[(case, metric, baseline value, current value)] for p50/p95 slower than baseline*(1+tolerance), or more queries."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get('cases', {}).get(name)
+        if not previous or 'error' in current or 'error' in previous:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            if current[metric] > previous[metric] * (1 + tolerance) and current[metric] - previous[metric] > NOISE_MS:
+                regressions.append((name, metric, previous[metric], current[metric]))
+        if current['queries'] > previous['queries']:
+            regressions.append((name, 'queries', previous['queries'], current['queries']))
+    return regressions
@@ -0,0 +1,79 @@
+"""
+The benchmarked hot paths. Each factory takes the fixture from data.build() and returns a
+no-argument callable; the runner times that callable.
+"""
+from datetime import timedelta
+
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.test import RequestFactory
+
+from bookings.pdf_gen import generate_itinerary_pdf
+from bookings.tours_utils import get_remaining_capacity
+from bookings.utils.pricing import calculate_accommodation_price, compute_pricing, render_pricing
+
+PRICING_FORM = {'number_of_adults': '5', 'child_ages': '[4, 9]', 'currency': 'USD'}
+
+
+def _request(method='get', path='/', data=None, **headers):
+    request = getattr(RequestFactory(), method)(path, data or {}, **headers)
+    request.user = AnonymousUser()
+    request.session = SessionStore()
+    return request
+
+
+def compute_pricing_case(fixture):
+    form = {**PRICING_FORM, 'travel_date': fixture.travel_date.isoformat()}
+    return lambda: compute_pricing('land', fixture.land_tour.pk, form)
+
+
+def accommodation_price_case(fixture):
+    accommodation = fixture.accommodations[0]
+    cleaned_data = {
+        'check_in': fixture.travel_date,
+        'check_out': fixture.travel_date + timedelta(days=4),
+        'adults': 2,
+        'child_ages': [5, 10],
+    }
+    return lambda: calculate_accommodation_price(accommodation, cleaned_data)
+
+
+def remaining_capacity_case(fixture):
+    tour = fixture.land_tour
+    return lambda: get_remaining_capacity(tour.pk, fixture.travel_date, type(tour), duration_days=7)
+
+
+def blocked_dates_case(fixture):
+    accommodation = fixture.accommodations[0]
+    return lambda: accommodation.get_blocked_dates()
+
+
+def tours_index_context_case(fixture):
+    index = fixture.tours_index
+    return lambda: index.get_context(_request())
+
+
+def render_pricing_case(fixture):
+    data = {**PRICING_FORM, 'travel_date': fixture.travel_date.isoformat()}
+    tour = fixture.land_tour
+
+    def run():
+        request = _request('post', '/pricing/', data, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        return render_pricing(request, 'land', tour.pk)
+    return run
+
+
+def itinerary_pdf_case(fixture):
+    booking = fixture.booking
+    return lambda: generate_itinerary_pdf(booking)
+
+
+CASES = {
+    'compute_pricing': compute_pricing_case,
+    'calculate_accommodation_price': accommodation_price_case,
+    'get_remaining_capacity': remaining_capacity_case,
+    'get_blocked_dates': blocked_dates_case,
+    'tours_index_get_context': tours_index_context_case,
+    'render_pricing': render_pricing_case,
+    'generate_itinerary_pdf': itinerary_pdf_case,
+}
@@ -0,0 +1,139 @@
+"""
+Synthetic data for the benchmarks: a home page with a tours index and an accommodations index,
+tours of every type, accommodations and bookings spread over the next months. Everything is
+drawn from one seeded Random, so the same arguments always build the same data.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+import random
+
+from django.contrib.contenttypes.models import ContentType
+from wagtail.models import Page
+
+from accommodation.models import AccommodationsIndexPage, CabinPage, HotelRoomPage
+from bookings.models import AccommodationBooking, Booking
+from home.models import HomePage
+from tours.models import DayTourPage, FullTourPage, LandTourPage, ToursIndexPage
+
+BATCH_SIZE = 5000
+HORIZON_DAYS = 180
+LOCATIONS = ['Quito', 'Cuenca', 'Baños', 'Otavalo', 'Montañita', 'Puerto López']
+STATUSES = ['CONFIRMED'] * 7 + ['PAID', 'PENDING_SUPPLIER', 'REJECTED']
+ACCOMMODATION_STATUSES = ['PAID'] * 6 + ['PENDING_PAYMENT'] * 2 + ['COMPLETED', 'CANCELLED']
+
+
+def _price(rng, low, high):
+    return Decimal(rng.randrange(low * 100, high * 100)) / 100
+
+
+def _page_fields(rng, index, label, today):
+    return {
+        'title': f"{label} {index}",
+        'slug': f"bench-{label.lower().replace(' ', '-')}-{index}",
+        'name': f"{label} {index}",
+        'description': f"<p>Synthetic {label.lower()} {index} for benchmarks.</p>",
+        'location': rng.choice(LOCATIONS),
+        'start_date': today - timedelta(days=rng.randrange(0, 60)),
+        'end_date': today + timedelta(days=365),
+        'yt_vid': 'benchmark',
+        'max_capacity': (capacity := rng.choice([20, 30, 40])),
+        'available_slots': capacity,
+        'demand_factor': Decimal('0.20'),
+        'price_sgl': _price(rng, 120, 400),
+        'price_dbl': _price(rng, 90, 300),
+        'price_tpl': _price(rng, 80, 250),
+        'price_adult': _price(rng, 40, 200),
+        'price_chd': _price(rng, 20, 100),
+        'price_inf': _price(rng, 0, 20),
+    }
+
+
+def build(tours=24, accommodations=8, bookings=10000, seed=42):
+    """Create the pages and `bookings` bookings (80% tour, 20% accommodation); returns a namespace."""
+    rng = random.Random(seed)
+    today = date.today()
+
+    root = Page.objects.get(depth=1)
+    home = root.add_child(instance=HomePage(title="Benchmark Home", slug="bench-home", banner_title="Benchmarks"))
+    tours_index = home.add_child(instance=ToursIndexPage(title="Tours", slug="bench-tours"))
+    accommodations_index = home.add_child(instance=AccommodationsIndexPage(title="Stays", slug="bench-stays"))
+
+    tour_pages = []
+    tour_types = [(LandTourPage, 'Land Tour', 'Per_room'), (FullTourPage, 'Full Tour', 'Per_room'), (DayTourPage, 'Day Tour', 'Per_person')]
+    for i in range(tours):
+        model, label, pricing_type = tour_types[i % len(tour_types)]
+        fields = _page_fields(rng, i, label, today)
+        if model is DayTourPage:
+            fields['start_time'] = '08:00'
+        tour_pages.append(tours_index.add_child(instance=model(pricing_type=pricing_type, **fields)))
+
+    accommodation_pages = []
+    accommodation_types = [(HotelRoomPage, 'Hotel Room'), (CabinPage, 'Cabin')]
+    for i in range(accommodations):
+        model, label = accommodation_types[i % len(accommodation_types)]
+        fields = _page_fields(rng, i, label, today)
+        accommodation_pages.append(accommodations_index.add_child(instance=model(pricing_type='Per_person', **fields)))
+
+    tour_bookings = bookings * 4 // 5
+    _create_tour_bookings(rng, tour_pages, tour_bookings, today)
+    _create_accommodation_bookings(rng, accommodation_pages, bookings - tour_bookings, today)
+
+    return SimpleNamespace(
+        home=home,
+        tours_index=tours_index,
+        tours=tour_pages,
+        land_tour=next(page for page in tour_pages if isinstance(page, LandTourPage)),
+        day_tour=next(page for page in tour_pages if isinstance(page, DayTourPage)),
+        accommodations=accommodation_pages,
+        booking=Booking.objects.filter(content_type=ContentType.objects.get_for_model(LandTourPage)).first(),
+        travel_date=today + timedelta(days=14),
+    )
+
+
+def _create_tour_bookings(rng, tours, count, today):
+    content_types = {type(tour): ContentType.objects.get_for_model(type(tour)) for tour in tours}
+    batch = []
+    for i in range(count):
+        tour = rng.choice(tours)
+        adults = rng.randint(1, 4)
+        batch.append(Booking(
+            customer_name=f"Guest {i}",
+            customer_email=f"guest{i}@example.com",
+            content_type=content_types[type(tour)],
+            object_id=tour.pk,
+            number_of_adults=adults,
+            number_of_children=rng.randint(0, 2),
+            travel_date=today + timedelta(days=rng.randrange(0, HORIZON_DAYS)),
+            total_price=_price(rng, 100, 2000),
+            status=rng.choice(STATUSES),
+            configuration_details={'singles': adults % 2, 'doubles': adults // 2, 'triples': 0},
+        ))
+        if len(batch) == BATCH_SIZE:
+            Booking.objects.bulk_create(batch)
+            batch = []
+    Booking.objects.bulk_create(batch)
+
+
+def _create_accommodation_bookings(rng, accommodations, count, today):
+    content_types = {type(page): ContentType.objects.get_for_model(type(page)) for page in accommodations}
+    batch = []
+    for i in range(count):
+        page = rng.choice(accommodations)
+        check_in = today + timedelta(days=rng.randrange(0, HORIZON_DAYS))
+        batch.append(AccommodationBooking(
+            content_type=content_types[type(page)],
+            object_id=page.pk,
+            check_in=check_in,
+            check_out=check_in + timedelta(days=rng.randint(1, 7)),
+            adults=rng.randint(1, 4),
+            children=rng.randint(0, 2),
+            customer_name=f"Guest {i}",
+            customer_email=f"guest{i}@example.com",
+            total_price=_price(rng, 50, 1500),
+            status=rng.choice(ACCOMMODATION_STATUSES),
+        ))
+        if len(batch) == BATCH_SIZE:
+            AccommodationBooking.objects.bulk_create(batch)
+            batch = []
+    AccommodationBooking.objects.bulk_create(batch)
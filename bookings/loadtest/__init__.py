@@ -0,0 +1,128 @@
+"""
+Load-test harness for the booking funnel: concurrent customers walking from the tours index to
+a captured PayPal payment against a local server, with the third-party services replaced by
+in-process stand-ins.
+
+    funnel.Scenario(tour_type, group_size, tour)   one kind of customer
+    funnel.Customer(...).run()                     one walk through the funnel (see funnel.STAGES)
+    standins.installed(...)                        SMTP, PayPal, exchange rates and Nominatim stand-ins
+    run(base_url, scenarios, users, ...)           customers on `users` threads; returns LoadStats
+
+Run with `manage.py run_loadtest` (see its --help). It serves the project in-process on a free
+port, so the stand-ins apply to the server, against a test database filled by
+bookings.benchmarks.data. Numbers from SQLite say little about concurrency (it serialises
+writes); point the default database at PostgreSQL for capacity planning.
+"""
+from collections import Counter, defaultdict
+from statistics import mean, quantiles
+import threading
+import time
+
+from bookings.loadtest.funnel import STAGES, Customer
+
+
+def _percentiles(values):
+    values = sorted(values)
+    if len(values) == 1:
+        return values * 3
+    cuts = quantiles(values, n=100, method='inclusive')
+    return [cuts[49], cuts[94], cuts[98]]
+
+
+class LoadStats:
+    """Thread-safe collector for per-stage timings, errors and whole-funnel outcomes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.db_ms = defaultdict(list)
+        self.errors = defaultdict(Counter)
+        self.error_samples = {}
+        self.funnels = defaultdict(lambda: {'completed': 0, 'failed': 0, 'seconds': []})
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, stage, seconds, error, db_ms, detail=None):
+        with self._lock:
+            self.timings[stage].append(seconds)
+            if db_ms is not None:
+                self.db_ms[stage].append(db_ms)
+            if error:
+                self.errors[stage][error] += 1
+                self.error_samples.setdefault((stage, error), detail)
+
+    def funnel(self, scenario, completed, seconds):
+        with self._lock:
+            outcome = self.funnels[scenario]
+            outcome['completed' if completed else 'failed'] += 1
+            if completed:
+                outcome['seconds'].append(seconds)
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def stages(self):
+        """[{stage, requests, errors, error_rate, p50_ms, p95_ms, p99_ms, max_ms, db_ms}] slowest (p95) first."""
+        rows = []
+        for stage in STAGES:
+            timings = self.timings.get(stage)
+            if not timings:
+                continue
+            p50, p95, p99 = (value * 1000 for value in _percentiles(timings))
+            errors = sum(self.errors[stage].values())
+            rows.append({
+                'stage': stage,
+                'requests': len(timings),
+                'errors': errors,
+                'error_rate': errors / len(timings),
+                'p50_ms': p50,
+                'p95_ms': p95,
+                'p99_ms': p99,
+                'max_ms': max(timings) * 1000,
+                'db_ms': mean(self.db_ms[stage]) if self.db_ms.get(stage) else None,
+            })
+        return sorted(rows, key=lambda row: row['p95_ms'], reverse=True)
+
+    def summary(self):
+        requests = sum(len(timings) for timings in self.timings.values())
+        errors = sum(sum(counter.values()) for counter in self.errors.values())
+        completed = sum(outcome['completed'] for outcome in self.funnels.values())
+        started = completed + sum(outcome['failed'] for outcome in self.funnels.values())
+        return {
+            'seconds': self.elapsed,
+            'requests': requests,
+            'requests_per_second': requests / self.elapsed,
+            'error_rate': errors / requests if requests else 0.0,
+            'checkouts_started': started,
+            'checkouts_completed': completed,
+            'checkouts_per_minute': completed / self.elapsed * 60,
+        }
+
+
+def run(base_url, scenarios, users, duration=None, iterations=None, ramp_up=0.0, currency='USD', seed=0):
+    """
+    Run `users` concurrent customers until `duration` seconds have passed or each has walked the
+    funnel `iterations` times. Customer n starts n * ramp_up / users seconds in and cycles
+    through the scenarios from scenario n, so every scenario gets traffic from the start.
+    """
+    stats = LoadStats()
+    deadline = stats.started + duration if duration else None
+
+    def customer_loop(n):
+        time.sleep(n * ramp_up / users)
+        i = 0
+        while (iterations is None or i < iterations) and (deadline is None or time.perf_counter() < deadline):
+            scenario = scenarios[(n + i) % len(scenarios)]
+            started = time.perf_counter()
+            completed = Customer(base_url, scenario, stats.record, currency=currency, seed=f"{seed}-{n}-{i}").run()
+            stats.funnel(scenario.name, completed, time.perf_counter() - started)
+            i += 1
+
+    threads = [threading.Thread(target=customer_loop, args=(n,), daemon=True) for n in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats.finished = time.perf_counter()
+    return stats
@@ -0,0 +1,188 @@
+"""
+The booking funnel as a customer's browser drives it, one HTTP request per stage:
+
+    index            tours index page
+    detail           tour page
+    booking_form     BookingStartView GET (sets the CSRF cookie)
+    pricing          render_pricing AJAX
+    booking_start    BookingStartView POST (AJAX; saves the BookingDraft, its token goes in the session)
+    submit_proposal  submit_proposal AJAX (creates the Proposal, sends the emails)
+    checkout         PayPal checkout page for the proposal
+    paypal_create    PayPalOrdersCreateView
+    paypal_capture   PayPalOrdersCaptureView (captures and fulfils: Booking, itinerary)
+    success          payment_success page
+
+Supplier confirmation is left out: it is another actor's step, and a proposal can be paid
+before it. A stage that fails ends that customer's run.
+"""
+from datetime import timedelta
+import random
+import re
+import time
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone, translation
+import requests
+
+STAGES = [
+    'index', 'detail', 'booking_form', 'pricing', 'booking_start', 'submit_proposal',
+    'checkout', 'paypal_create', 'paypal_capture', 'success',
+]
+TIMEOUT = 60
+
+_AMOUNT = re.compile(r'value:\s*"([\d.]+)"')
+_DB_TIMING = re.compile(r'db;dur=([\d.]+)')
+
+
+class StageFailed(Exception):
+    def __init__(self, stage, reason):
+        super().__init__(f"{stage}: {reason}")
+        self.stage = stage
+        self.reason = reason
+
+
+def _path(page):
+    return page.get_url_parts()[2]
+
+
+class Scenario:
+    """One tour type and group size; groups of three or more bring children."""
+
+    def __init__(self, tour_type, group_size, tour):
+        self.tour_type = tour_type
+        self.group_size = group_size
+        self.tour = tour
+        self.children = group_size // 3
+        self.adults = group_size - self.children
+        with translation.override(settings.LANGUAGE_CODE):
+            self.urls = {
+                'index': _path(tour.get_parent()),
+                'detail': _path(tour),
+                'booking': reverse('bookings:booking_start', args=[tour_type, tour.pk]),
+                'pricing': reverse('bookings:render_pricing', args=[tour_type, tour.pk]),
+                'submit': reverse('bookings:submit_proposal', args=[tour_type, tour.pk]),
+                'orders': reverse('p_methods:paypal_orders_create'),
+            }
+
+    @property
+    def name(self):
+        return f"{self.tour_type} x{self.group_size}"
+
+    def travel_date(self, rng):
+        if self.tour_type == 'day':
+            return self.tour.start_date
+        # Spread customers over the season so they don't all compete for one departure
+        return timezone.localdate() + timedelta(days=rng.randrange(7, 120))
+
+    def child_ages(self, rng):
+        return [rng.randint(3, 11) for _ in range(self.children)]
+
+
+class Customer:
+    """
+    One browser session walking a scenario's funnel. Every request is reported as
+    record(stage, seconds, error, db_ms, detail): error is None on success, db_ms comes from the
+    Server-Timing header when the request was sampled, detail is the start of an error body.
+    """
+
+    def __init__(self, base_url, scenario, record, currency='USD', seed=None):
+        self.base_url = base_url
+        self.scenario = scenario
+        self.record = record
+        self.currency = currency
+        self.rng = random.Random(seed)
+        self.session = requests.Session()
+
+    def _call(self, stage, method, path, expect_json=False, validate=None, **kwargs):
+        headers = kwargs.pop('headers', {})
+        csrf = self.session.cookies.get('csrftoken')
+        if csrf:
+            headers['X-CSRFToken'] = csrf
+        url = f"{self.base_url}{path}"
+
+        started = time.perf_counter()
+        try:
+            resp = self.session.request(method, url, headers=headers, timeout=TIMEOUT, **kwargs)
+        except requests.RequestException as e:
+            self.record(stage, time.perf_counter() - started, type(e).__name__, None, str(e))
+            raise StageFailed(stage, type(e).__name__)
+        elapsed = time.perf_counter() - started
+
+        db = _DB_TIMING.search(resp.headers.get('Server-Timing', ''))
+        db_ms = float(db.group(1)) if db else None
+        error = None if resp.status_code < 400 else f"HTTP {resp.status_code}"
+        result = resp
+        if error is None and expect_json:
+            try:
+                result = resp.json()
+            except ValueError:
+                error = 'invalid JSON'
+        if error is None and validate:
+            error = validate(result)
+        self.record(stage, elapsed, error, db_ms, resp.text[:300] if error else None)
+        if error:
+            raise StageFailed(stage, error)
+        return result
+
+    def run(self):
+        """Walk the funnel once; returns True when the customer reached the success page."""
+        scenario = self.scenario
+        urls = scenario.urls
+        ajax = {'X-Requested-With': 'XMLHttpRequest'}
+        travel_date = scenario.travel_date(self.rng).isoformat()
+        child_ages = scenario.child_ages(self.rng)
+        group = {
+            'number_of_adults': scenario.adults,
+            'number_of_children': scenario.children,
+            'child_ages': str(child_ages),
+            'travel_date': travel_date,
+            'currency': self.currency,
+        }
+
+        try:
+            self._call('index', 'get', urls['index'])
+            self._call('detail', 'get', urls['detail'])
+            self._call('booking_form', 'get', urls['booking'])
+            self._call('pricing', 'post', urls['pricing'], headers=dict(ajax), data=group)
+
+            n = self.rng.randrange(10 ** 6)
+            form = {
+                **group,
+                'tour_type': scenario.tour_type,
+                'tour_id': scenario.tour.pk,
+                'customer_name': f"Load Test {n}",
+                'customer_email': f"loadtest{n}@example.com",
+                'form_submission': 'pricing',
+                'selected_configuration': '0',
+                'captcha_0': 'loadtest',
+                'captcha_1': 'PASSED',
+                **{f"child_age_{i}": age for i, age in enumerate(child_ages, start=1)},
+            }
+            self._call('booking_start', 'post', urls['booking'], expect_json=True, headers=dict(ajax), data=form,
+                       validate=lambda result: None if result.get('success') else 'form rejected')
+
+            result = self._call('submit_proposal', 'post', urls['submit'], expect_json=True, headers=dict(ajax))
+            proposal_id = result['proposal_id']
+
+            with translation.override(settings.LANGUAGE_CODE):
+                checkout_url = reverse('p_methods:paypal_checkout', args=[proposal_id])
+            page = self._call('checkout', 'get', checkout_url,
+                              validate=lambda resp: None if _AMOUNT.search(resp.text) else 'no amount on page')
+            amount = _AMOUNT.search(page.text)
+
+            order = self._call('paypal_create', 'post', urls['orders'], expect_json=True, json={
+                'intent': 'CAPTURE',
+                'proposal_id': proposal_id,
+                'purchase_units': [{'amount': {'currency_code': 'USD', 'value': amount.group(1)}}],
+            })
+            with translation.override(settings.LANGUAGE_CODE):
+                capture_url = reverse('p_methods:paypal_orders_capture', args=[order['id']])
+            result = self._call('paypal_capture', 'post', capture_url, expect_json=True, json={'proposal_id': proposal_id})
+
+            self._call('success', 'get', result['redirect'])
+            return True
+        except StageFailed:
+            return False
+        finally:
+            self.session.close()
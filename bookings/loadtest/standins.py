@@ -0,0 +1,186 @@
+"""
+In-process stand-ins for the services the booking funnel calls, so a load test exercises our
+code under concurrency without mailing anyone, charging anything or hitting third-party rate
+limits. Each one can add a fixed latency, which is what makes them useful under load: the
+real services are slow, and that time is spent holding a worker thread.
+
+    EmailBackend            SMTP: counts messages instead of sending them
+    OrdersController        PayPal checkout SDK: create_order / capture_order return SDK
+                            Order models, as the real controller does
+    PayPalAPI               PayPal REST (get_order, webhook verification) for the same orders
+    ExchangeRatesServer     openexchangerates.org latest.json on a local port
+    NOMINATIM_FIXTURES      Nominatim is answered from routify/fixtures/nominatim.json
+
+installed(...) puts all of them in place for the duration of a `with` block.
+"""
+from contextlib import ExitStack, contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+import json
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test.utils import override_settings
+
+NOMINATIM_FIXTURES = os.path.join(settings.BASE_DIR, 'routify', 'fixtures', 'nominatim.json')
+RATES = {'USD': 1.0, 'EUR': 0.92, 'GBP': 0.79, 'COP': 3950.0, 'PEN': 3.75, 'MXN': 17.1}
+
+_latency = {'smtp': 0.0, 'paypal': 0.0, 'rates': 0.0}
+_counts = {'emails': 0, 'paypal_calls': 0, 'rate_fetches': 0}
+_lock = threading.Lock()
+
+
+def _call(service, counter):
+    with _lock:
+        _counts[counter] += 1
+    if _latency[service]:
+        time.sleep(_latency[service])
+
+
+def counts():
+    with _lock:
+        return dict(_counts)
+
+
+# ──────────────────────────── SMTP ────────────────────────────
+
+class EmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        for _ in email_messages:
+            _call('smtp', 'emails')
+        return len(email_messages)
+
+
+# ──────────────────────────── PayPal ────────────────────────────
+
+_orders = {}
+
+
+class OrdersController:
+    """The subset of the SDK's OrdersController the checkout views use."""
+
+    def create_order(self, options):
+        from paypalserversdk.models.order import Order
+
+        _call('paypal', 'paypal_calls')
+        amount = options['body'].purchase_units[0].amount
+        order_id = uuid.uuid4().hex[:17].upper()
+        with _lock:
+            _orders[order_id] = {
+                'id': order_id,
+                'status': 'CREATED',
+                'amount': {'currency_code': amount.currency_code, 'value': amount.value},
+            }
+        return SimpleNamespace(body=Order(id=order_id, status='CREATED'))
+
+    def capture_order(self, options):
+        from paypalserversdk.exceptions.error_exception import ErrorException
+        from paypalserversdk.models.money import Money
+        from paypalserversdk.models.order import Order
+        from paypalserversdk.models.orders_capture import OrdersCapture
+        from paypalserversdk.models.payment_collection import PaymentCollection
+        from paypalserversdk.models.purchase_unit import PurchaseUnit
+
+        _call('paypal', 'paypal_calls')
+        with _lock:
+            order = _orders.get(options['id'])
+            if order is None:
+                body = json.dumps({'name': 'RESOURCE_NOT_FOUND', 'message': f"Order {options['id']} not found"})
+                raise ErrorException('Not found', SimpleNamespace(status_code=404, text=body))
+            # A retried capture (same PayPal-Request-Id) returns the original result
+            if order['status'] != 'COMPLETED':
+                order.update(status='COMPLETED', capture_id=uuid.uuid4().hex[:17].upper())
+
+        capture = OrdersCapture(id=order['capture_id'], status='COMPLETED', amount=Money(**order['amount']))
+        return SimpleNamespace(body=Order(
+            id=order['id'],
+            status='COMPLETED',
+            purchase_units=[PurchaseUnit(payments=PaymentCollection(captures=[capture]))],
+        ))
+
+
+class PayPalAPI:
+    """REST stand-in (PAYPAL_API_BACKEND) answering for the orders OrdersController created."""
+
+    def get_order(self, order_id):
+        from p_methods.paypal_api import PayPalAPIError
+
+        _call('paypal', 'paypal_calls')
+        order = _orders.get(order_id)
+        if order is None:
+            raise PayPalAPIError(f"Order {order_id} not found")
+        captures = [{'id': order['capture_id'], 'status': 'COMPLETED', 'amount': order['amount']}] if 'capture_id' in order else []
+        return {'id': order_id, 'status': order['status'], 'purchase_units': [{'payments': {'captures': captures}}]}
+
+    def verify_webhook_signature(self, headers, event):
+        _call('paypal', 'paypal_calls')
+        return True
+
+
+# ──────────────────────────── Exchange rates ────────────────────────────
+
+class _RatesHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        _call('rates', 'rate_fetches')
+        body = json.dumps({'base': 'USD', 'timestamp': int(time.time()), 'rates': RATES}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ExchangeRatesServer:
+    """openexchangerates.org stand-in on 127.0.0.1 (a real socket, so the requests code path runs)."""
+
+    def __enter__(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _RatesHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/api/latest.json"
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
+
+
+# ──────────────────────────── Installation ────────────────────────────
+
+@contextmanager
+def installed(smtp_latency=0.0, paypal_latency=0.0, rates_latency=0.0):
+    """Route email, PayPal, exchange rates and Nominatim to the stand-ins inside the block."""
+    from captcha.conf import settings as captcha_settings
+    from p_methods import paypal_api
+
+    _latency.update(smtp=smtp_latency, paypal=paypal_latency, rates=rates_latency)
+    with _lock:
+        _counts.update(emails=0, paypal_calls=0, rate_fetches=0)
+        _orders.clear()
+
+    with ExitStack() as stack:
+        rates = stack.enter_context(ExchangeRatesServer())
+        stack.enter_context(override_settings(
+            EMAIL_BACKEND='bookings.loadtest.standins.EmailBackend',
+            PAYPAL_API_BACKEND='bookings.loadtest.standins.PayPalAPI',
+            OPEN_EXCHANGE_RATES_URL=rates.url,
+            NOMINATIM_FIXTURES=NOMINATIM_FIXTURES,
+            PAYMENTS_ASYNC=False,
+        ))
+
+        # The SDK client and captcha test mode are read from module state, not settings
+        previous_client, test_mode = paypal_api._sdk_client, captcha_settings.CAPTCHA_TEST_MODE
+        paypal_api._sdk_client = SimpleNamespace(orders=OrdersController())
+        captcha_settings.CAPTCHA_TEST_MODE = True
+        try:
+            yield SimpleNamespace(exchange_rates_url=rates.url)
+        finally:
+            paypal_api._sdk_client, captcha_settings.CAPTCHA_TEST_MODE = previous_client, test_mode
@@ -0,0 +1,93 @@
+# bookings/management/commands/benchmark_demand_pricing.py
+
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.utils.demand import CURVES, DEMAND_WINDOW_DAYS, demand_multiplier, demand_multipliers, multiplier_curve
+
+
+def scalar_multipliers(used, open_days, capacity, max_factor, curve, window=DEMAND_WINDOW_DAYS):
+    """Reference per-date loop (what a date-by-date implementation does), for timing and checking."""
+    result = []
+    for i in range(len(used)):
+        window_used = sum(used[i:i + window])
+        slots = capacity * sum(open_days[i:i + window])
+        occupancy = min(window_used / slots, 1.0) if slots else 0.0
+        result.append(1.0 + max_factor * float(curve(np.array([occupancy]))[0]))
+    return np.array(result)
+
+
+class Command(BaseCommand):
+    help = "Benchmark the vectorised demand-pricing curve over a year of dates (synthetic data, optional real tour)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365, help='Horizon in days (default: 365)')
+        parser.add_argument('--repeat', type=int, default=20, help='Timing repetitions (default: 20)')
+        parser.add_argument('--capacity', type=int, default=20)
+        parser.add_argument('--demand-factor', type=float, default=0.2)
+        parser.add_argument('--tour-type', choices=['full', 'land', 'day'], help='Also benchmark a real tour (hits the DB)')
+        parser.add_argument('--tour-id', type=int)
+
+    def handle(self, *args, **options):
+        days = options['days']
+        repeat = options['repeat']
+        capacity = options['capacity']
+        max_factor = options['demand_factor']
+
+        rng = np.random.default_rng(42)
+        horizon = days + DEMAND_WINDOW_DAYS - 1
+        used = rng.integers(0, capacity + 1, size=horizon).astype(float)
+        open_days = rng.random(horizon) < 5 / 7
+
+        self.stdout.write(f"Synthetic horizon: {days} days, capacity {capacity}, demand factor {max_factor}")
+        for name, curve in CURVES.items():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                vector = multiplier_curve(used, open_days, capacity, max_factor, curve)[:days]
+            vector_ms = (time.perf_counter() - start) / repeat * 1000
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                scalar = scalar_multipliers(used, open_days, capacity, max_factor, curve)[:days]
+            scalar_ms = (time.perf_counter() - start) / repeat * 1000
+
+            if not np.allclose(vector, scalar):
+                raise CommandError(f"{name}: vectorised and scalar curves differ")
+
+            self.stdout.write(
+                f"   {name:<8} vectorised {vector_ms:8.3f} ms   per-date loop {scalar_ms:8.3f} ms   "
+                f"x{scalar_ms / vector_ms if vector_ms else 0:.0f}   range {vector.min():.3f}-{vector.max():.3f}"
+            )
+
+        if options['tour_type'] and options['tour_id']:
+            self.benchmark_tour(options['tour_type'], options['tour_id'], days)
+
+    def benchmark_tour(self, tour_type, tour_id, days):
+        from django.db import connection, reset_queries
+        from django.test.utils import CaptureQueriesContext
+        from bookings.utils.availability_calendar import TOUR_MODELS
+
+        tour = TOUR_MODELS[tour_type].objects.get(pk=tour_id)
+        today = date.today()
+
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            demand_multipliers(tour, today, days)
+            vector_ms = (time.perf_counter() - start) * 1000
+        vector_queries = len(ctx.captured_queries)
+
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            for i in range(days):
+                demand_multiplier(tour, today + timedelta(days=i))
+            scalar_ms = (time.perf_counter() - start) * 1000
+        scalar_queries = len(ctx.captured_queries)
+        reset_queries()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Tour {tour_type}/{tour_id}: one curve {vector_ms:.1f} ms / {vector_queries} queries; "
+            f"per-date {scalar_ms:.1f} ms / {scalar_queries} queries"
+        ))
@@ -0,0 +1,14 @@
+# bookings/management/commands/clear_booking_drafts.py
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bookings.models import BookingDraft
+
+
+class Command(BaseCommand):
+    help = "Delete booking drafts that expired without being submitted"
+
+    def handle(self, *args, **options):
+        deleted, _ = BookingDraft.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired booking drafts"))
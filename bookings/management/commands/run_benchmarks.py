@@ -0,0 +1,105 @@
+# bookings/management/commands/run_benchmarks.py
+
+import json
+import platform
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from django.utils import timezone
+
+from bookings.benchmarks import BASELINE_PATH, compare, measure
+
+
+class Command(BaseCommand):
+    help = "Benchmark pricing, availability and listing hot paths on synthetic data and compare with the stored baseline"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=10000, help='Synthetic bookings, 80%% tour / 20%% accommodation (default: 10000)')
+        parser.add_argument('--tours', type=int, default=24)
+        parser.add_argument('--accommodations', type=int, default=8)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per case (default: 20)')
+        parser.add_argument('--case', action='append', help='Only run this case (repeatable)')
+        parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline JSON to compare with / write')
+        parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+        parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed latency increase before flagging (default: 0.5 = +50%%)')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit with an error when a case regresses')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the test database between runs')
+
+    def handle(self, *args, **options):
+        from bookings.benchmarks import cases, data
+
+        names = options['case'] or list(cases.CASES)
+        unknown = set(names) - set(cases.CASES)
+        if unknown:
+            raise CommandError(f"Unknown case(s): {', '.join(sorted(unknown))}. Available: {', '.join(cases.CASES)}")
+
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            with override_settings(RATELIMIT_ENABLE=False), transaction.atomic():
+                started = time.perf_counter()
+                fixture = data.build(options['tours'], options['accommodations'], options['bookings'], options['seed'])
+                self.stdout.write(
+                    f"Synthetic data: {options['tours']} tours, {options['accommodations']} accommodations, "
+                    f"{options['bookings']} bookings ({time.perf_counter() - started:.1f} s)"
+                )
+                results = {name: self.run_case(name, cases.CASES[name], fixture, options['repeat']) for name in names}
+                transaction.set_rollback(True)
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
+
+        meta = {
+            'bookings': options['bookings'], 'tours': options['tours'], 'accommodations': options['accommodations'],
+            'seed': options['seed'], 'repeat': options['repeat'],
+            'python': platform.python_version(), 'django': django.get_version(), 'machine': platform.machine(),
+            'recorded_at': timezone.now().isoformat(timespec='seconds'),
+        }
+
+        if options['save_baseline']:
+            with open(options['baseline'], 'w', encoding='utf-8') as f:
+                json.dump({'meta': meta, 'cases': results}, f, indent=2, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}"))
+            return
+
+        self.report_regressions(results, options)
+
+    def run_case(self, name, factory, fixture, repeat):
+        try:
+            result = measure(factory(fixture), repeat=repeat)
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"   {name:<32} failed: {e}"))
+            return {'error': str(e)}
+        self.stdout.write(
+            f"   {name:<32} p50 {result['p50_ms']:9.2f} ms   p95 {result['p95_ms']:9.2f} ms   "
+            f"p99 {result['p99_ms']:9.2f} ms   {result['queries']:4} queries   peak {result['peak_kib']:9.1f} KiB"
+        )
+        return result
+
+    def report_regressions(self, results, options):
+        try:
+            with open(options['baseline'], encoding='utf-8') as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            self.stdout.write(self.style.WARNING(f"No baseline at {options['baseline']}; run with --save-baseline to record one"))
+            return
+
+        if baseline.get('meta', {}).get('bookings') != options['bookings']:
+            self.stdout.write(self.style.WARNING(
+                f"Baseline was recorded with {baseline.get('meta', {}).get('bookings')} bookings; comparison is indicative only"
+            ))
+
+        regressions = compare(results, baseline, options['tolerance'])
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS(f"No regressions against baseline ({len(results)} cases)"))
+            return
+
+        for name, metric, before, now in regressions:
+            self.stdout.write(self.style.WARNING(f"   {name}: {metric} {before} -> {now}"))
+        message = f"{len(regressions)} regression(s) against baseline"
+        if options['fail_on_regression']:
+            raise CommandError(message)
+        self.stdout.write(self.style.WARNING(message))
@@ -0,0 +1,156 @@
+# bookings/management/commands/run_loadtest.py
+
+import json
+import os
+import tempfile
+import time
+
+from django.contrib.staticfiles.handlers import StaticFilesHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.testcases import LiveServerThread
+from django.test.utils import override_settings, setup_databases, teardown_databases
+
+from tours.models import DayTourPage, FullTourPage, LandTourPage
+
+TOUR_MODELS = {'land': LandTourPage, 'full': FullTourPage, 'day': DayTourPage}
+
+
+class Command(BaseCommand):
+    help = "Replay the booking funnel with concurrent customers against an in-process server and stand-in services"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Concurrent customers (default: 10)')
+        parser.add_argument('--duration', type=float, default=60, help='Seconds to run (default: 60)')
+        parser.add_argument('--iterations', type=int, help='Funnels per customer; overrides --duration')
+        parser.add_argument('--ramp-up', type=float, default=5, help='Seconds over which customers start (default: 5)')
+        parser.add_argument('--tour-type', action='append', choices=sorted(TOUR_MODELS), help='Tour types to book (repeatable; default: all)')
+        parser.add_argument('--group-size', action='append', type=int, help='Travellers per booking (repeatable; default: 2 and 5)')
+        parser.add_argument('--currency', default='USD', help='Currency customers price in (default: USD)')
+        parser.add_argument('--bookings', type=int, default=2000, help='Existing bookings in the synthetic data (default: 2000)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--smtp-latency', type=float, default=0.2, help='Seconds per email sent (default: 0.2)')
+        parser.add_argument('--paypal-latency', type=float, default=0.4, help='Seconds per PayPal call (default: 0.4)')
+        parser.add_argument('--rates-latency', type=float, default=0.3, help='Seconds per exchange-rate fetch (default: 0.3)')
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this file')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the test database between runs')
+
+    def handle(self, *args, **options):
+        from django.contrib.auth import get_user_model
+        from wagtail.models import Site
+
+        from bookings.benchmarks import data
+        from bookings.loadtest import funnel, run, standins
+
+        tour_types = options['tour_type'] or sorted(TOUR_MODELS)
+        group_sizes = options['group_size'] or [2, 5]
+        if min(group_sizes) < 1:
+            raise CommandError("--group-size must be at least 1")
+
+        connection = connections['default']
+        if connection.vendor == 'sqlite' and not connection.settings_dict['TEST'].get('NAME'):
+            # The server answers from its own threads, which can't see an in-memory database;
+            # immediate transactions make concurrent writers queue instead of failing as "locked"
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.gettempdir(), 'mtapp_loadtest.sqlite3')
+            connection.settings_dict['OPTIONS'].update(transaction_mode='IMMEDIATE', timeout=30)
+            self.stdout.write(self.style.WARNING("SQLite serialises writes: use PostgreSQL for capacity numbers"))
+
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        server = None
+        try:
+            with override_settings(RATELIMIT_ENABLE=False), standins.installed(
+                smtp_latency=options['smtp_latency'],
+                paypal_latency=options['paypal_latency'],
+                rates_latency=options['rates_latency'],
+            ):
+                started = time.perf_counter()
+                fixture = data.build(bookings=options['bookings'], seed=options['seed'])
+                Site.objects.filter(is_default_site=True).update(root_page=fixture.home)
+                Site.clear_site_root_paths_cache()
+                # Anonymous proposals are owned by the MTWEB system user
+                get_user_model().objects.get_or_create(username='MTWEB', defaults={'email': 'mtweb@example.com'})
+                self.stdout.write(f"Synthetic data: {options['bookings']} bookings ({time.perf_counter() - started:.1f} s)")
+
+                scenarios = [
+                    funnel.Scenario(tour_type, group_size, next(t for t in fixture.tours if type(t) is TOUR_MODELS[tour_type]))
+                    for tour_type in tour_types
+                    for group_size in group_sizes
+                ]
+
+                server = LiveServerThread('localhost', StaticFilesHandler)
+                server.daemon = True
+                server.start()
+                server.is_ready.wait()
+                if server.error:
+                    raise CommandError(f"Could not start the server: {server.error}")
+                base_url = f"http://localhost:{server.port}"
+
+                length = f"{options['iterations']} funnels each" if options['iterations'] else f"{options['duration']:.0f} s"
+                self.stdout.write(
+                    f"{options['users']} customers for {length} against {base_url}: "
+                    f"{', '.join(scenario.name for scenario in scenarios)}"
+                )
+                stats = run(
+                    base_url, scenarios, options['users'],
+                    duration=None if options['iterations'] else options['duration'],
+                    iterations=options['iterations'],
+                    ramp_up=options['ramp_up'],
+                    currency=options['currency'],
+                    seed=options['seed'],
+                )
+                service_calls = standins.counts()
+        finally:
+            if server is not None:
+                server.terminate()
+            teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
+
+        self.report(stats, service_calls)
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump({
+                    'options': {key: options[key] for key in ('users', 'duration', 'iterations', 'currency', 'bookings', 'smtp_latency', 'paypal_latency', 'rates_latency')},
+                    'scenarios': {name: {key: outcome[key] for key in ('completed', 'failed')} for name, outcome in stats.funnels.items()},
+                    'summary': stats.summary(),
+                    'stages': stats.stages(),
+                    'errors': {stage: dict(counter) for stage, counter in stats.errors.items()},
+                    'service_calls': service_calls,
+                }, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
+
+    def report(self, stats, service_calls):
+        from bookings.loadtest import _percentiles
+
+        summary = stats.summary()
+        self.stdout.write("")
+        self.stdout.write(
+            f"{summary['checkouts_completed']}/{summary['checkouts_started']} checkouts completed in {summary['seconds']:.1f} s "
+            f"({summary['checkouts_per_minute']:.1f}/min), {summary['requests']} requests "
+            f"({summary['requests_per_second']:.1f}/s), error rate {summary['error_rate']:.1%}"
+        )
+        self.stdout.write(
+            f"Stand-ins: {service_calls['emails']} emails, {service_calls['paypal_calls']} PayPal calls, "
+            f"{service_calls['rate_fetches']} exchange-rate fetches"
+        )
+
+        self.stdout.write("\nStages, slowest first (p95):")
+        for row in stats.stages():
+            db = f"{row['db_ms']:8.1f}" if row['db_ms'] is not None else '       -'
+            line = (
+                f"   {row['stage']:<16} {row['requests']:6} req  {row['error_rate']:6.1%} err   "
+                f"p50 {row['p50_ms']:8.1f}   p95 {row['p95_ms']:8.1f}   p99 {row['p99_ms']:8.1f}   max {row['max_ms']:8.1f} ms   db {db} ms"
+            )
+            self.stdout.write(self.style.ERROR(line) if row['errors'] else line)
+
+        self.stdout.write("\nScenarios:")
+        for name, outcome in sorted(stats.funnels.items()):
+            timing = ''
+            if outcome['seconds']:
+                p50, p95, _ = _percentiles(outcome['seconds'])
+                timing = f"   funnel p50 {p50:6.2f} s   p95 {p95:6.2f} s"
+            self.stdout.write(f"   {name:<12} {outcome['completed']:5} completed {outcome['failed']:5} failed{timing}")
+
+        if stats.error_samples:
+            self.stdout.write(self.style.WARNING("\nErrors:"))
+            for (stage, error), detail in stats.error_samples.items():
+                sample = ' '.join((detail or '').split())[:160]
+                self.stdout.write(self.style.WARNING(f"   {stage}: {error} x{stats.errors[stage][error]}  {sample}"))
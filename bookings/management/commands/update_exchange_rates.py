@@ -9,9 +9,9 @@ class Command(BaseCommand):
 
     def handle(self, *args, **kwargs):
         api_key = settings.OPEN_EXCHANGE_RATES_API_KEY
-        url = f"https://openexchangerates.org/api/latest.json?app_id={api_key}&base=USD"
+        url = getattr(settings, 'OPEN_EXCHANGE_RATES_URL', 'https://openexchangerates.org/api/latest.json')
         try:
-            response = requests.get(url)
+            response = requests.get(url, params={'app_id': api_key, 'base': 'USD'}, timeout=10)
             response.raise_for_status()
             data = response.json()
             rates = data.get('rates', {})
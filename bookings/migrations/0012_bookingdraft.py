@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:33
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0011_accommodationbooking_expires_at_proposal_expires_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingDraft',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(editable=False, max_length=12, unique=True)),
+                ('tour_type', models.CharField(max_length=10)),
+                ('tour_id', models.PositiveIntegerField()),
+                ('customer_name', models.CharField(max_length=200)),
+                ('customer_email', models.EmailField(max_length=254)),
+                ('customer_phone', models.CharField(blank=True, max_length=20)),
+                ('customer_address', models.TextField(blank=True)),
+                ('nationality', models.CharField(blank=True, max_length=100)),
+                ('notes', models.TextField(blank=True)),
+                ('number_of_adults', models.PositiveIntegerField(default=1)),
+                ('number_of_children', models.PositiveIntegerField(default=0)),
+                ('number_of_infants', models.PositiveIntegerField(default=0)),
+                ('child_ages', models.JSONField(blank=True, default=list)),
+                ('travel_date', models.DateField()),
+                ('currency', models.CharField(default='USD', max_length=3)),
+                ('estimated_price', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('selected_config', models.JSONField(blank=True, default=dict)),
+                ('referral_code', models.CharField(blank=True, max_length=16)),
+                ('promo_code', models.CharField(blank=True, max_length=16)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
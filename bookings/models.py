@@ -1,7 +1,9 @@
 import string
+import logging
 import secrets
 from decimal import Decimal
 
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 from django.core.cache import cache
@@ -18,9 +20,13 @@ from rest_framework.fields import ReadOnlyField
 from wagtail.api import APIField
 
 from bookings.serializer import TourFieldSerializer
+from mtapp.logs import EventLogger
 from mtapp.utils import generate_code_id
 from decimal import Decimal, ROUND_HALF_UP  
 
+logger = logging.getLogger(__name__)
+log = EventLogger(logger)
+
 
 @register_snippet
 class Proposal(models.Model):
@@ -187,7 +193,7 @@ class Proposal(models.Model):
                 raise ValidationError(_("Invalid content type."), code='invalid_content_type')
     
     def save(self, *args, **kwargs):
-        print(f"DEBUG: Proposal.save() called for prop_id={self.prop_id or 'NEW'}, created={not self.pk}")
+        created = self.pk is None
         if not self.prop_id:
             self.prop_id = generate_code_id("P")
             while Proposal.objects.filter(prop_id=self.prop_id).exists():
@@ -199,8 +205,8 @@ class Proposal(models.Model):
 
             if not self.estimated_price:
                 self.estimated_price = self.calculate_estimated_price()
-        print(f"DEBUG: About to call super().save() for Proposal {self.prop_id or 'NEW'}")
         super().save(*args, **kwargs)
+        log.debug('proposal.saved', proposal=self.pk, prop_id=self.prop_id, created=created, status=self.status)
 
         if self.content_type_id and self.object_id:
             tour_type_map = {
@@ -404,7 +410,7 @@ class Booking(models.Model):
                 raise ValidationError(_("Invalid content type."), code='invalid_content_type')
 
     def save(self, *args, **kwargs):
-        print(f"DEBUG: Booking.save() called for book_id={self.book_id or 'NEW'}, created={not self.pk}")
+        created = self.pk is None
         from revenue_management.models import Commission  # Avoid circular import
 
         if not self.book_id:
@@ -418,8 +424,8 @@ class Booking(models.Model):
         # Set user from related Proposal if not set and Proposal exists
         if not self.user and self.proposal:
             self.user = self.proposal.user
-        print(f"DEBUG: About to call super().save() for Booking {self.book_id or 'NEW'}")
         super().save(*args, **kwargs)
+        log.debug('booking.saved', booking=self.pk, book_id=self.book_id, created=created, status=self.status)
 
         # Create or update Commission record
         if self.user and self.total_price and self.tour:
@@ -501,6 +507,72 @@ class ProposalConfirmationToken(models.Model):
             models.Index(fields=['token']),
         ]
 
+
+class BookingDraft(models.Model):
+    """
+    A tour booking between the form step and proposal submission. The session holds only the
+    draft's token (under SESSION_KEY); the draft keeps the validated form fields and the one
+    pricing configuration the customer picked, not every option that was offered. Drafts are
+    written once per step and removed on submission; `manage.py clear_booking_drafts` deletes
+    the expired ones.
+    """
+    SESSION_KEY = 'booking_draft'
+
+    token = models.CharField(max_length=12, unique=True, editable=False)
+    tour_type = models.CharField(max_length=10)
+    tour_id = models.PositiveIntegerField()
+    customer_name = models.CharField(max_length=200)
+    customer_email = models.EmailField()
+    customer_phone = models.CharField(max_length=20, blank=True)
+    customer_address = models.TextField(blank=True)
+    nationality = models.CharField(max_length=100, blank=True)
+    notes = models.TextField(blank=True)
+    number_of_adults = models.PositiveIntegerField(default=1)
+    number_of_children = models.PositiveIntegerField(default=0)
+    number_of_infants = models.PositiveIntegerField(default=0)
+    child_ages = models.JSONField(default=list, blank=True)
+    travel_date = models.DateField()
+    currency = models.CharField(max_length=3, default='USD')
+    estimated_price = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    selected_config = models.JSONField(default=dict, blank=True)
+    referral_code = models.CharField(max_length=16, blank=True)
+    promo_code = models.CharField(max_length=16, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def generate_token(self):
+        return secrets.token_urlsafe(9)
+
+    def save(self, *args, **kwargs):
+        if not self.token:
+            self.token = self.generate_token()
+            while BookingDraft.objects.filter(token=self.token).exists():
+                self.token = self.generate_token()
+        if not self.expires_at:
+            self.expires_at = timezone.now() + timezone.timedelta(seconds=getattr(settings, 'BOOKING_DRAFT_TTL', 60 * 60 * 6))
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_request(cls, request):
+        """The unexpired draft whose token is in the request's session, or None."""
+        token = request.session.get(cls.SESSION_KEY)
+        if not token:
+            return None
+        return cls.objects.filter(token=token, expires_at__gt=timezone.now()).first()
+
+    def attach(self, request):
+        # Only a new token changes the session, so re-submitting the form doesn't save it again
+        if request.session.get(self.SESSION_KEY) != self.token:
+            request.session[self.SESSION_KEY] = self.token
+
+    def discard(self, request):
+        self.delete()
+        request.session.pop(self.SESSION_KEY, None)
+
+    def __str__(self):
+        return f"Booking draft {self.token} ({self.tour_type} {self.tour_id}, {self.customer_email})"
+
+
 class ExchangeRate(models.Model):
     currency_code = models.CharField(max_length=3, unique=True, help_text=_("ISO 4217 currency code (e.g., EUR, GBP)"))
     rate_to_usd = models.DecimalField(max_digits=10, decimal_places=6, help_text=_("Exchange rate relative to 1 USD"))
@@ -513,7 +585,6 @@ class ExchangeRate(models.Model):
     def __str__(self):
         return f"{self.currency_code}: {self.rate_to_usd}"
     
-@register_snippet
 class AccommodationBooking(models.Model):
     # Generic relation to ANY accommodation page (Glamping, Cabin, HotelRoom, etc.)
     content_type = models.ForeignKey(ContentType, on_delete=models.PROTECT)
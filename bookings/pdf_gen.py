@@ -5,6 +5,7 @@ from reportlab.lib import colors
 from reportlab.lib.units import mm
 from reportlab.lib.pagesizes import A4
 from tours.models import LandTourPage
+from django.utils.html import strip_tags
 from django.utils.translation import gettext_lazy as _
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from bookings.models import Booking 
@@ -128,24 +129,29 @@ def generate_itinerary_pdf(booking: Booking) -> bytes:
 
         logger.info(f"Attempting to load header background: {header_bg_path}")
         if not os.path.exists(header_bg_path):
+            # Image() only opens the file when the story is built, which would fail the whole PDF
             logger.warning(f"Header background file does not exist: {header_bg_path}")
-        try:
-            header_bg = Image(header_bg_path, width=doc.width+30*mm, height=45*mm)
-            header_row.append(header_bg)
-        except Exception as e:
-            logger.warning(f"Could not load header background: {e}")
             header_row.append(Paragraph(_("Header Image Missing"), normal_style))
+        else:
+            try:
+                header_bg = Image(header_bg_path, width=doc.width+30*mm, height=45*mm)
+                header_row.append(header_bg)
+            except Exception as e:
+                logger.warning(f"Could not load header background: {e}")
+                header_row.append(Paragraph(_("Header Image Missing"), normal_style))
 
         logger.info(f"Attempting to load logo: {logo_path}")
         if not os.path.exists(logo_path):
             logger.warning(f"Logo file does not exist: {logo_path}")
-        try:
-            logo = Image(logo_path, width=50*mm, height=25*mm)
-            logo_row.append(logo)
-            logger.info("Successfully loaded logo for header")
-        except Exception as e:
-            logger.warning(f"Failed to load logo: {e}")
             logo_row.append(Paragraph(_("Logo Missing"), normal_style))
+        else:
+            try:
+                logo = Image(logo_path, width=50*mm, height=25*mm)
+                logo_row.append(logo)
+                logger.info("Successfully loaded logo for header")
+            except Exception as e:
+                logger.warning(f"Failed to load logo: {e}")
+                logo_row.append(Paragraph(_("Logo Missing"), normal_style))
 
         header_table = Table([header_row, logo_row], colWidths=[doc.width], rowHeights=[45*mm, 25*mm])
         header_table.setStyle(TableStyle([
@@ -162,7 +168,7 @@ def generate_itinerary_pdf(booking: Booking) -> bytes:
         elements.append(Spacer(1, 10*mm))
 
         tour = getattr(booking, 'tour', None)
-        tour_name = tour.safe_translation_getter('title', _('Unknown Tour')).upper() if tour else _('Unknown Tour').upper()
+        tour_name = (tour.title if tour else _('Unknown Tour')).upper()
         duration = _('CUSTOM')
         if tour:
             if isinstance(tour, (LandTourPage)):
@@ -181,7 +187,7 @@ def generate_itinerary_pdf(booking: Booking) -> bytes:
             inclusions = [
                 _("Alojamiento en hotel seleccionado"),
                 _("Desayunos diarios"),
-                tour.safe_translation_getter('courtesies', _("Tour guiado")),
+                strip_tags(tour.courtesies) or _("Tour guiado"),
             ]      
         # elif tour and isinstance(tour, FullTour):
         #     inclusions = [
@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from wagtail.signals import page_published, page_unpublished
+
+from bookings.models import Booking
+from bookings.utils.availability_calendar import (
+    TOUR_TYPES_BY_MODEL,
+    invalidate_tour_calendar,
+    months_touched,
+)
+
+
+def _invalidate_booking_months(content_type, object_id, travel_date):
+    tour_type = TOUR_TYPES_BY_MODEL.get(content_type.model) if content_type else None
+    if not tour_type or not travel_date:
+        return
+    tour = content_type.model_class().objects.filter(pk=object_id).only('pk').first()
+    days = getattr(tour, 'duration_days', 1) if tour else 1
+    invalidate_tour_calendar(tour_type, object_id, months_touched(travel_date, days))
+
+
+@receiver(post_init, sender=Booking)
+def remember_calendar_fields(sender, instance, **kwargs):
+    # Read __dict__ so deferred fields (.only()/.defer()) don't trigger a query per row
+    values = instance.__dict__
+    instance._calendar_original = (values.get('content_type_id'), values.get('object_id'), values.get('travel_date'))
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_calendar_on_booking_change(sender, instance, **kwargs):
+    _invalidate_booking_months(instance.content_type, instance.object_id, instance.travel_date)
+
+    original_ct, original_id, original_date = getattr(instance, '_calendar_original', (None, None, None))
+    if original_ct and (original_ct, original_id, original_date) != (instance.content_type_id, instance.object_id, instance.travel_date):
+        from django.contrib.contenttypes.models import ContentType
+        _invalidate_booking_months(ContentType.objects.get_for_id(original_ct), original_id, original_date)
+    instance._calendar_original = (instance.content_type_id, instance.object_id, instance.travel_date)
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def invalidate_calendar_on_tour_publish(sender, instance, **kwargs):
+    tour_type = TOUR_TYPES_BY_MODEL.get(sender._meta.model_name)
+    if tour_type:
+        invalidate_tour_calendar(tour_type, instance.pk)
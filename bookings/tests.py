@@ -1,3 +1,59 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.test import SimpleTestCase, override_settings
+
+from bookings.utils.demand import accommodation_uplifts
+from bookings.utils.pricing import get_demand_multiplier
+
+
+def _booking(check_in, nights, adults, children=0):
+    return SimpleNamespace(check_in=check_in, check_out=check_in + timedelta(days=nights), adults=adults, children=children)
+
+
+@override_settings(DEMAND_PRICING_CURVE='linear')
+class AccommodationDemandTests(SimpleTestCase):
+    """
+    Accommodation demand pricing: guests of the bookings overlapping the 30 days from check-in
+    against max_capacity (20 when unset), 1 + demand_factor * occupancy with the linear curve.
+    """
+
+    check_in = date(2026, 3, 1)
+
+    def accommodation(self, demand_factor=0.2, max_capacity=10):
+        return SimpleNamespace(demand_factor=demand_factor, max_capacity=max_capacity)
+
+    def test_overlapping_guests_against_capacity(self):
+        bookings = [
+            _booking(self.check_in - timedelta(days=3), 3, 2),       # checks out on check-in day: counts
+            _booking(self.check_in + timedelta(days=10), 2, 1, 1),
+            _booking(self.check_in + timedelta(days=30), 1, 1),      # starts on the last day of the window
+            _booking(self.check_in + timedelta(days=31), 1, 4),      # after the window
+            _booking(self.check_in - timedelta(days=5), 4, 3),       # left before check-in
+        ]
+        multiplier = get_demand_multiplier(self.accommodation(), self.check_in, bookings=bookings)
+        self.assertEqual(multiplier, Decimal('1.0') + Decimal('0.2') * Decimal('0.5'))
+
+    def test_capacity_defaults_to_20(self):
+        bookings = [_booking(self.check_in, 2, 4)]
+        multiplier = get_demand_multiplier(self.accommodation(max_capacity=None), self.check_in, bookings=bookings)
+        self.assertEqual(multiplier, Decimal('1.0') + Decimal('0.2') * Decimal('0.2'))
+
+    def test_occupancy_is_capped(self):
+        bookings = [_booking(self.check_in, 2, 30)]
+        multiplier = get_demand_multiplier(self.accommodation(), self.check_in, bookings=bookings)
+        self.assertEqual(multiplier, Decimal('1.2'))
+
+    def test_no_demand_factor(self):
+        bookings = [_booking(self.check_in, 2, 5)]
+        self.assertEqual(get_demand_multiplier(self.accommodation(demand_factor=0), self.check_in, bookings=bookings), Decimal('1.0'))
+
+    def test_horizon_matches_single_dates(self):
+        accommodation = self.accommodation()
+        bookings = [_booking(self.check_in + timedelta(days=d), 3, 2) for d in (0, 12, 40, 55)]
+        uplifts = accommodation_uplifts(accommodation, self.check_in, 60, bookings=bookings)
+        for offset in range(60):
+            day = self.check_in + timedelta(days=offset)
+            expected = get_demand_multiplier(accommodation, day, bookings=bookings)
+            self.assertAlmostEqual(1 + 0.2 * uplifts[offset], float(expected))
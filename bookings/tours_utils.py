@@ -18,8 +18,7 @@ from django.shortcuts import get_object_or_404, redirect, render
 
 
 from bookings.models import Booking, ExchangeRate, Proposal, ProposalConfirmationToken
-
-from .pdf_gen import generate_itinerary_pdf
+from bookings.utils.prefetch import prefetch_generic
 
 def safe_decimal(value, default='0'):
     """Convert any value to Decimal safely"""
@@ -310,7 +309,7 @@ def manage_proposals(request) -> HttpResponse:
 
 @login_required
 def manage_bookings(request) -> HttpResponse:
-    bookings = Booking.objects.prefetch_related('translations', 'tour').all()
+    bookings = Booking.objects.prefetch_related('translations').all()
     paginator = Paginator(bookings, 10)
     page_obj = paginator.get_page(request.GET.get('page', 1))
     if request.htmx:
@@ -319,7 +318,9 @@ def manage_bookings(request) -> HttpResponse:
             bookings = bookings.filter(status=status)
             paginator = Paginator(bookings, 10)
             page_obj = paginator.get_page(request.GET.get('page', 1))
+        page_obj.object_list = prefetch_generic(page_obj.object_list, 'tour')
         return render(request, 'bookings/partials/booking_list.html', {'bookings': page_obj})
+    page_obj.object_list = prefetch_generic(page_obj.object_list, 'tour')
     return render(request, 'bookings/manage_bookings.html', {'bookings': page_obj})
 
 def reject_proposal(request, proposal_id: int) -> HttpResponse:
@@ -394,7 +395,7 @@ def proposal_detail(request, proposal_id: int):
         logger.warning(f"30-day demand error: {e}")
 
     price_adjustment = Decimal('1') + demand_factor
-    exchange_rate = get_exchange_rate(request.session.get('currency', 'USD'))
+    exchange_rate = get_exchange_rate(proposal.currency)
     if exchange_rate <= 0:
         exchange_rate = Decimal('1.0')
     factor = seasonal_factor * price_adjustment * exchange_rate
@@ -485,6 +486,9 @@ def booking_detail(request, booking_id: int):
     return render(request, 'bookings/booking_detail.html', context)
 
 def payment_success(request, proposal_id: int) -> HttpResponse:
+    # ReportLab is loaded by the first itinerary, not at worker start
+    from .pdf_gen import generate_itinerary_pdf
+
     try:
         proposal = Proposal.objects.get(id=proposal_id)
         if proposal.status != 'SUPPLIER_CONFIRMED':
@@ -572,6 +576,18 @@ def payment_cancel(request, proposal_id: int) -> HttpResponse:
         messages.error(request, "Proposal not found.")
     return redirect('/')
 
+def model_weekday(day):
+    """Tour available_days use 0=Sunday ... 6=Saturday (Python's weekday() is 0=Monday)."""
+    return (day.weekday() + 1) % 7
+
+
+def available_weekdays(tour):
+    """Parse available_days ('0,1,2,3') into a set; every day when empty."""
+    available_days_str = getattr(tour, 'available_days', '') or ''
+    days = {int(d.strip()) for d in available_days_str.split(',') if d.strip().isdigit()}
+    return days or set(range(7))
+
+
 def get_30_day_used_slots(tour_id, tour_model):
     """
     Sum confirmed bookings over next 30 days from today, only on available days.
@@ -583,8 +599,7 @@ def get_30_day_used_slots(tour_id, tour_model):
     # Fetch tour for max_capacity/available_days
     tour = get_object_or_404(tour_model, id=tour_id)
     daily_capacity = tour.max_capacity or 0
-    available_days_str = getattr(tour, 'available_days', '')  # e.g., '0,1,2,3'
-    available_days = [int(d.strip()) for d in available_days_str.split(',') if d.strip()] if available_days_str else list(range(7))  # All days if empty
+    available_days = available_weekdays(tour)
     logger.debug(f"Available days for tour {tour_id}: {available_days}")
 
     total_slots = 0
@@ -592,9 +607,7 @@ def get_30_day_used_slots(tour_id, tour_model):
 
     current_date = today
     while current_date <= end_date:
-        weekday_python = current_date.weekday()  # 0=Mon, 6=Sun
-        day_of_week_model = (weekday_python + 1) % 7  # FIXED: 0=Sun, 6=Sat
-        if day_of_week_model not in available_days:
+        if model_weekday(current_date) not in available_days:
             current_date += timedelta(days=1)
             continue
 
@@ -654,41 +667,37 @@ def get_remaining_capacity(tour_id, travel_date, tour_model, duration_days=1):
     tour = get_object_or_404(tour_model, id=tour_id)
 
     # Parse available_days (e.g., '0,1,2,3' → [0,1,2,3]; all if empty)
-    available_days_str = getattr(tour, 'available_days', '')
-    available_days = [int(d.strip()) for d in available_days_str.split(',') if d.strip()] if available_days_str else list(range(7))
+    available_days = available_weekdays(tour)
 
     # ContentType for tour
     content_type = ContentType.objects.get_for_model(tour_model)
 
     # Dates in range
     dates = [travel_date + timedelta(days=i) for i in range(duration_days)]
+
+    # Confirmed guests per date, one grouped query for the whole range
+    confirmed_by_date = {
+        row['travel_date']: (row['adults'] or 0) + (row['children'] or 0)
+        for row in Booking.objects.filter(
+            content_type=content_type,
+            object_id=tour_id,
+            travel_date__in=dates,
+            status='CONFIRMED',
+        ).values('travel_date').annotate(adults=Sum('number_of_adults'), children=Sum('number_of_children'))
+    }
     per_day = []
     min_remaining = float('inf')
     is_full_any = False
     has_available_date = False
     for d in dates:
-        day_of_week = (d.weekday() + 6) % 7  # 0=Sun, 6=Sat
-        if day_of_week not in available_days:
+        if model_weekday(d) not in available_days:
             continue
 
         has_available_date = True
         # Daily capacity
         daily_capacity = tour.max_capacity or 0
 
-        # Confirmed count for this date
-        adults_sum = Booking.objects.filter(
-            content_type=content_type,
-            object_id=tour_id,
-            travel_date=d,
-            status='CONFIRMED',
-        ).aggregate(Sum('number_of_adults'))['number_of_adults__sum'] or 0
-        children_sum = Booking.objects.filter(
-            content_type=content_type,
-            object_id=tour_id,
-            travel_date=d,
-            status='CONFIRMED',
-        ).aggregate(Sum('number_of_children'))['number_of_children__sum'] or 0
-        confirmed = adults_sum + children_sum
+        confirmed = confirmed_by_date.get(d, 0)
 
         remaining = max(0, daily_capacity - confirmed)
         min_remaining = min(min_remaining, remaining)
@@ -726,10 +735,17 @@ def get_exchange_rate(currency_code: str) -> Decimal:
         logger.warning(f"Exchange rate not found for {currency_code}, attempting to fetch")
         return fetch_exchange_rate(currency_code)
 
+def is_known_currency(currency_code: str) -> bool:
+    """USD, or a currency with a stored ExchangeRate. Check client-supplied codes before pricing in them."""
+    currency_code = currency_code.upper()
+    return currency_code == 'USD' or ExchangeRate.objects.filter(currency_code=currency_code).exists()
+
 def fetch_exchange_rate(currency_code: str) -> Decimal:
     try:
         response = requests.get(
-            f"https://api.openexchangerates.org/latest.json?app_id={settings.OPEN_EXCHANGE_RATES_API_KEY}"
+            getattr(settings, 'OPEN_EXCHANGE_RATES_URL', 'https://openexchangerates.org/api/latest.json'),
+            params={'app_id': settings.OPEN_EXCHANGE_RATES_API_KEY},
+            timeout=10,
         )
         response.raise_for_status()
         data = response.json()
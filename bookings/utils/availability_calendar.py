@@ -0,0 +1,146 @@
+"""
+Month-range priced availability calendar for tours.
+
+For each day of the requested months this combines the tour's available_days, blackout dates,
+remaining capacity (min over the trip's duration) and a demand-adjusted "from" price. A month
+costs a bounded number of queries no matter how many days it has: the tour itself, one
+aggregate over confirmed bookings for the month plus the trip/demand overhang, and one exchange
+rate lookup.
+
+Results are cached per tour/month/currency. Cache keys embed two version counters (kept in the
+shared cache, mtapp/cache_versions.py) so booking changes (bookings/signals.py) only invalidate
+the months they touch, and a publish of the tour invalidates all of its months.
+"""
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+import calendar
+import logging
+
+from django.core.cache import cache
+
+from bookings.tours_utils import available_weekdays, get_exchange_rate, model_weekday
+from mtapp.cache_versions import bump_version, get_versions
+from bookings.utils.demand import DEMAND_WINDOW_DAYS, demand_multipliers, tour_daily_occupancy
+from bookings.utils.pricing import price_tour
+from tours.models import DayTourPage, FullTourPage, LandTourPage
+
+logger = logging.getLogger(__name__)
+
+TOUR_MODELS = {'full': FullTourPage, 'land': LandTourPage, 'day': DayTourPage}
+TOUR_TYPES_BY_MODEL = {model._meta.model_name: tour_type for tour_type, model in TOUR_MODELS.items()}
+
+CALENDAR_CACHE_TIMEOUT = 60 * 60 * 6
+MAX_CALENDAR_MONTHS = 6
+
+
+def _tour_version_key(tour_type, tour_id):
+    return f"tour_calendar_v_{tour_type}_{tour_id}"
+
+
+def _month_version_key(tour_type, tour_id, year, month):
+    return f"tour_calendar_v_{tour_type}_{tour_id}_{year}-{month:02d}"
+
+
+def invalidate_tour_calendar(tour_type, tour_id, months=None):
+    """
+    Invalidate cached calendars for a tour. With `months` ([(year, month), ...]) only those
+    months are dropped; otherwise every month of the tour is.
+    """
+    if months is None:
+        bump_version(_tour_version_key(tour_type, tour_id))
+        return
+    for year, month in months:
+        bump_version(_month_version_key(tour_type, tour_id, year, month))
+
+
+def months_touched(start, days):
+    """(year, month) pairs whose calendars can change when `days` days from `start` change."""
+    # Demand looks DEMAND_WINDOW_DAYS ahead, so earlier days' prices depend on this booking too.
+    first = start - timedelta(days=DEMAND_WINDOW_DAYS)
+    last = start + timedelta(days=max(days, 1) - 1)
+    months = []
+    current = date(first.year, first.month, 1)
+    while current <= last:
+        months.append((current.year, current.month))
+        current = date(current.year + (current.month == 12), current.month % 12 + 1, 1)
+    return months
+
+
+def _cache_key(tour_type, tour_id, year, month, currency):
+    tour_key = _tour_version_key(tour_type, tour_id)
+    month_key = _month_version_key(tour_type, tour_id, year, month)
+    versions = get_versions([tour_key, month_key])
+    tour_v, month_v = versions[tour_key], versions[month_key]
+    # today is part of the key so past days close at midnight even while the entry is warm
+    return f"tour_calendar_{tour_type}_{tour_id}_{year}-{month:02d}_{currency}_{date.today()}_{tour_v}_{month_v}"
+
+
+def _base_from_price(tour, currency, exchange_rate):
+    """Cheapest single-adult price before demand; None when the tour has no usable prices."""
+    configurations = price_tour(tour, {'number_of_adults': 1}, currency, exchange_rate, price_adjustment=Decimal('1.0'))
+    prices = [c['total_price'] for c in configurations if c.get('total_price')]
+    return Decimal(str(min(prices))) if prices else None
+
+
+def build_month(tour, year, month, currency, exchange_rate):
+    """Uncached calendar for one month: {'month': 'YYYY-MM', 'days': [...]}"""
+    capacity = tour.max_capacity or 0
+    duration = getattr(tour, 'duration_days', 1) or 1
+    weekdays = available_weekdays(tour)
+    blackout = set(tour.blackout_dates_list)
+    today = date.today()
+
+    first = date(year, month, 1)
+    last = date(year, month, calendar.monthrange(year, month)[1])
+    month_days = (last - first).days + 1
+    occupancy = tour_daily_occupancy(tour, first, last + timedelta(days=max(duration, DEMAND_WINDOW_DAYS)))
+    multipliers = demand_multipliers(tour, first, month_days, occupancy=occupancy)
+    base_price = _base_from_price(tour, currency, exchange_rate)
+
+    days = []
+    for offset in range(month_days):
+        day = first + timedelta(days=offset)
+        entry = {'date': day.isoformat(), 'available': False, 'remaining': 0, 'from_price': None}
+        if day >= today and model_weekday(day) in weekdays and day.isoformat() not in blackout:
+            remaining = min(capacity - occupancy.get(day + timedelta(days=i), 0) for i in range(duration))
+            entry['remaining'] = max(0, remaining)
+            entry['available'] = remaining > 0
+
+            if base_price is not None:
+                price = base_price * Decimal(str(multipliers[offset]))
+                entry['from_price'] = float(price.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+        days.append(entry)
+
+    return {'month': f"{year}-{month:02d}", 'days': days}
+
+
+def get_tour_calendar(tour_type, tour, start_year, start_month, months=1, currency='USD'):
+    """
+    Cached calendar for `months` consecutive months starting at start_year/start_month.
+    Returns {'tour_id', 'tour_type', 'currency', 'capacity', 'duration_days', 'months': [...]}.
+    """
+    currency = currency.upper()
+    months = max(1, min(months, MAX_CALENDAR_MONTHS))
+    exchange_rate = None
+
+    result_months = []
+    year, month = start_year, start_month
+    for _ in range(months):
+        key = _cache_key(tour_type, tour.pk, year, month, currency)
+        data = cache.get(key)
+        if data is None:
+            if exchange_rate is None:
+                exchange_rate = get_exchange_rate(currency)
+            data = build_month(tour, year, month, currency, exchange_rate)
+            cache.set(key, data, CALENDAR_CACHE_TIMEOUT)
+        result_months.append(data)
+        year, month = year + (month == 12), month % 12 + 1
+
+    return {
+        'tour_id': tour.pk,
+        'tour_type': tour_type,
+        'currency': currency,
+        'capacity': tour.max_capacity or 0,
+        'duration_days': getattr(tour, 'duration_days', 1) or 1,
+        'months': result_months,
+    }
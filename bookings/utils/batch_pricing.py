@@ -0,0 +1,276 @@
+"""
+Batch quotes for tours and accommodations.
+
+One request can price many (page, date, pax mix, currency) tuples. Everything the single-quote
+paths load per call is loaded once here: each tour model is fetched with one in_bulk, live
+accommodation pages with one specific() query, exchange rates with one ExchangeRate query, and
+occupancy with one aggregate per tour model plus one query for accommodation bookings.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+import logging
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Sum
+from wagtail.models import Page
+
+from bookings.models import AccommodationBooking, Booking, ExchangeRate
+from bookings.tours_utils import available_weekdays, model_weekday
+from bookings.utils.demand import DEMAND_WINDOW_DAYS, TOUR_DEMAND_STATUSES, demand_multiplier
+from bookings.utils.pricing import (
+    DEMAND_BOOKING_STATUSES,
+    calculate_accommodation_price,
+    get_demand_multiplier,
+    price_tour,
+)
+from tours.models import DayTourPage, FullTourPage, LandTourPage
+
+logger = logging.getLogger(__name__)
+
+TOUR_MODELS = {'full': FullTourPage, 'land': LandTourPage, 'day': DayTourPage}
+MAX_BATCH_ITEMS = 31  # One month of dates for the availability calendar
+
+
+class QuoteError(ValueError):
+    pass
+
+
+def _parse_date(value, field):
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value))
+    except (TypeError, ValueError):
+        raise QuoteError(f"Invalid {field}: {value!r}")
+
+
+def _parse_int(value, field, minimum=0):
+    try:
+        return max(minimum, int(value if value not in (None, '') else minimum))
+    except (TypeError, ValueError):
+        raise QuoteError(f"Invalid {field}: {value!r}")
+
+
+def parse_quote_request(raw):
+    """Normalise one request tuple. Raises QuoteError for malformed input."""
+    kind = (raw.get('kind') or ('accommodation' if raw.get('check_in') else 'tour')).lower()
+    item = {
+        'kind': kind,
+        'id': _parse_int(raw.get('id'), 'id', minimum=1),
+        'adults': _parse_int(raw.get('adults', 1), 'adults', minimum=1),
+        'child_ages': [int(a) for a in (raw.get('child_ages') or []) if str(a).isdigit()],
+        'currency': (raw.get('currency') or 'USD').upper(),
+    }
+
+    if kind == 'tour':
+        tour_type = (raw.get('tour_type') or '').lower()
+        if tour_type not in TOUR_MODELS:
+            raise QuoteError(f"Invalid tour_type: {raw.get('tour_type')!r}")
+        item['tour_type'] = tour_type
+        item['date'] = _parse_date(raw.get('date'), 'date')
+    elif kind == 'accommodation':
+        item['check_in'] = _parse_date(raw.get('check_in'), 'check_in')
+        item['check_out'] = _parse_date(raw.get('check_out'), 'check_out')
+        if item['check_out'] <= item['check_in']:
+            raise QuoteError("check_out must be after check_in")
+    else:
+        raise QuoteError(f"Invalid kind: {kind!r}")
+
+    return item
+
+
+def load_rate_snapshot(currencies):
+    """
+    {currency: Decimal rate} for the requested currencies that already have an ExchangeRate,
+    from one query. Unknown codes are left out rather than fetched: they come from the client.
+    """
+    currencies = {c.upper() for c in currencies}
+    rates = {'USD': Decimal('1.0')}
+    rates.update(dict(
+        ExchangeRate.objects.filter(currency_code__in=currencies - {'USD'})
+        .values_list('currency_code', 'rate_to_usd')
+    ))
+    return rates
+
+
+def load_tours(items):
+    """{(tour_type, id): tour} with one in_bulk per tour model."""
+    ids_by_type = defaultdict(set)
+    for item in items:
+        if item['kind'] == 'tour':
+            ids_by_type[item['tour_type']].add(item['id'])
+
+    tours = {}
+    for tour_type, ids in ids_by_type.items():
+        for pk, tour in TOUR_MODELS[tour_type].objects.live().in_bulk(ids).items():
+            tours[(tour_type, pk)] = tour
+    return tours
+
+
+def load_tour_occupancy(tours, items):
+    """
+    {(tour_type, id): {date: confirmed pax}} covering every quoted trip plus the demand window,
+    from one aggregate query per tour model.
+    """
+    ranges = {}
+    ids_by_type = defaultdict(set)
+    for item in items:
+        if item['kind'] != 'tour':
+            continue
+        tour = tours.get((item['tour_type'], item['id']))
+        if tour is None:
+            continue
+        ids_by_type[item['tour_type']].add(item['id'])
+        span = max(getattr(tour, 'duration_days', 1) or 1, DEMAND_WINDOW_DAYS)
+        first, last = ranges.get(item['tour_type'], (item['date'], item['date']))
+        ranges[item['tour_type']] = (min(first, item['date']), max(last, item['date'] + timedelta(days=span)))
+
+    occupancy = defaultdict(dict)
+    for tour_type, ids in ids_by_type.items():
+        rows = (
+            Booking.objects.filter(
+                content_type=ContentType.objects.get_for_model(TOUR_MODELS[tour_type]),
+                object_id__in=ids,
+                travel_date__range=ranges[tour_type],
+                status__in=TOUR_DEMAND_STATUSES,
+            )
+            .values('object_id', 'travel_date')
+            .annotate(adults=Sum('number_of_adults'), children=Sum('number_of_children'))
+        )
+        for row in rows:
+            occupancy[(tour_type, row['object_id'])][row['travel_date']] = (row['adults'] or 0) + (row['children'] or 0)
+    return occupancy
+
+
+def load_accommodations(items):
+    ids = {item['id'] for item in items if item['kind'] == 'accommodation'}
+    if not ids:
+        return {}
+    return Page.objects.live().filter(pk__in=ids).specific().in_bulk()
+
+
+def load_accommodation_bookings(accommodations, items):
+    """{page_id: [AccommodationBooking, ...]} overlapping any requested demand window, in one query."""
+    requested = [item for item in items if item['kind'] == 'accommodation' and item['id'] in accommodations]
+    if not requested:
+        return {}
+
+    start = min(item['check_in'] for item in requested)
+    end = max(item['check_in'] for item in requested) + timedelta(days=DEMAND_WINDOW_DAYS)
+    bookings = AccommodationBooking.objects.filter(
+        object_id__in=[item['id'] for item in requested],
+        check_in__lte=end,
+        check_out__gte=start,
+        status__in=DEMAND_BOOKING_STATUSES,
+    ).only('content_type_id', 'object_id', 'check_in', 'check_out', 'adults', 'children')
+
+    content_types = {
+        pk: ContentType.objects.get_for_model(page).pk for pk, page in accommodations.items()
+    }
+    by_page = defaultdict(list)
+    for booking in bookings:
+        if content_types.get(booking.object_id) == booking.content_type_id:
+            by_page[booking.object_id].append(booking)
+    return by_page
+
+
+def _tour_availability(tour, start, occupancy):
+    capacity = tour.max_capacity or 0
+    weekdays = available_weekdays(tour)
+    blackout = set(tour.blackout_dates_list) if hasattr(tour, 'blackout_dates_list') else set()
+
+    if model_weekday(start) not in weekdays or start.isoformat() in blackout:
+        return 0
+
+    remaining = capacity
+    for offset in range(getattr(tour, 'duration_days', 1) or 1):
+        day = start + timedelta(days=offset)
+        remaining = min(remaining, capacity - occupancy.get(day, 0))
+    return max(0, remaining)
+
+
+def quote_tour(item, tours, rates, occupancy):
+    tour = tours.get((item['tour_type'], item['id']))
+    if tour is None:
+        return {'error': 'Tour not found'}
+
+    tour_occupancy = occupancy.get((item['tour_type'], item['id']), {})
+    form_data = {'number_of_adults': item['adults'], 'child_ages': item['child_ages']}
+    adjustment = demand_multiplier(tour, item['date'], occupancy=tour_occupancy)
+    configurations = price_tour(tour, form_data, item['currency'], rates[item['currency']], price_adjustment=adjustment)
+    remaining = _tour_availability(tour, item['date'], tour_occupancy)
+    pax = item['adults'] + len(item['child_ages'])
+    priced = [c for c in configurations if c.get('total_price') is not None]
+
+    return {
+        'date': item['date'].isoformat(),
+        'remaining': remaining,
+        'available': remaining >= pax and item['date'] >= date.today(),
+        'cheapest_price': min((c['total_price'] for c in priced), default=None),
+        'demand_multiplier': float(adjustment),
+        'configurations': configurations,
+    }
+
+
+def quote_accommodation(item, accommodations, rates, bookings_by_page):
+    accommodation = accommodations.get(item['id'])
+    if accommodation is None or not hasattr(accommodation, 'pricing_type'):
+        return {'error': 'Accommodation not found'}
+
+    cleaned_data = {
+        'check_in': item['check_in'],
+        'check_out': item['check_out'],
+        'adults': item['adults'],
+        'children': len(item['child_ages']),
+        'child_ages': item['child_ages'],
+    }
+    demand = get_demand_multiplier(accommodation, item['check_in'], bookings=bookings_by_page.get(item['id'], []))
+    total_usd = calculate_accommodation_price(accommodation, cleaned_data, demand_multiplier=demand)
+    total = (total_usd * rates[item['currency']]).quantize(Decimal('0.01'))
+
+    return {
+        'check_in': item['check_in'].isoformat(),
+        'check_out': item['check_out'].isoformat(),
+        'total_price': float(total),
+        'currency': item['currency'],
+    }
+
+
+def batch_quote(raw_items):
+    """
+    Price every request tuple in `raw_items` and return one result per tuple, in order.
+    Malformed tuples get an {'error': ...} entry instead of failing the whole batch.
+    """
+    if len(raw_items) > MAX_BATCH_ITEMS:
+        raise QuoteError(f"At most {MAX_BATCH_ITEMS} quotes per request")
+
+    parsed = []
+    for raw in raw_items:
+        try:
+            parsed.append(parse_quote_request(raw))
+        except QuoteError as e:
+            parsed.append({'error': str(e)})
+    items = [item for item in parsed if 'error' not in item]
+
+    rates = load_rate_snapshot({item['currency'] for item in items})
+    tours = load_tours(items)
+    occupancy = load_tour_occupancy(tours, items)
+    accommodations = load_accommodations(items)
+    bookings_by_page = load_accommodation_bookings(accommodations, items)
+
+    results = []
+    for raw, item in zip(raw_items, parsed):
+        if 'error' in item:
+            result = {'error': item['error']}
+        elif item['currency'] not in rates:
+            result = {'error': f"Unsupported currency: {item['currency']}"}
+        elif item['kind'] == 'tour':
+            result = quote_tour(item, tours, rates, occupancy)
+        else:
+            result = quote_accommodation(item, accommodations, rates, bookings_by_page)
+        result['request'] = raw
+        results.append(result)
+
+    logger.debug(f"Batch quoted {len(items)} items ({len(tours)} tours, {len(accommodations)} accommodations)")
+    return results
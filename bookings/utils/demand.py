@@ -0,0 +1,229 @@
+"""
+Demand pricing shared by tours and accommodations.
+
+Both product types carry `demand_factor` (max uplift, e.g. 0.20 = +20%) and `max_capacity`.
+For every date in a horizon the multiplier is
+
+    1 + demand_factor * curve(occupancy over the DEMAND_WINDOW_DAYS window starting that date)
+
+For tours occupancy = used slots / open slots in the window. Accommodations keep the measure
+they have always been priced with: guests of the bookings overlapping the window against
+max_capacity (ACCOMMODATION_DEFAULT_CAPACITY when unset), so with the linear curve their prices
+are unchanged. The whole horizon is computed at once as a NumPy array (rolling sums via
+cumsum), so a calendar month or a year costs the same single occupancy query as one date.
+
+Curves are pluggable: register a function in CURVES that maps an occupancy array in [0, 1] to an
+uplift fraction in [0, 1]. The default comes from settings.DEMAND_PRICING_CURVE; a product can
+override it with a `demand_curve` attribute.
+
+NumPy is imported inside the functions that use it, so importing this module (pricing does at
+boot) doesn't load it into every worker.
+"""
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+import logging
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Sum
+
+logger = logging.getLogger(__name__)
+
+DEMAND_WINDOW_DAYS = 30
+TOUR_DEMAND_STATUSES = ['CONFIRMED']
+ACCOMMODATION_DEMAND_STATUSES = ['PENDING_PAYMENT', 'PAID']
+ACCOMMODATION_DEFAULT_CAPACITY = 20  # Guests assumed when an accommodation has no max_capacity
+
+
+# ──────────────────────────── Curves ────────────────────────────
+
+def linear_curve(occupancy):
+    """Uplift grows 1:1 with occupancy: 50% full → half the demand factor."""
+    return occupancy
+
+
+def stepped_curve(occupancy, thresholds=(0.5, 0.75, 0.9), levels=(0.0, 0.33, 0.66, 1.0)):
+    """Uplift jumps at occupancy thresholds (0 below 50%, a third at 50%, two thirds at 75%, full at 90%)."""
+    import numpy as np
+
+    return np.asarray(levels, dtype=float)[np.searchsorted(thresholds, occupancy, side='right')]
+
+
+def capped_curve(occupancy, cap=0.8):
+    """Linear, but the full demand factor is already reached at `cap` occupancy."""
+    import numpy as np
+
+    return np.minimum(occupancy / cap, 1.0)
+
+
+CURVES = {
+    'linear': linear_curve,
+    'stepped': stepped_curve,
+    'capped': capped_curve,
+}
+
+
+def get_curve(product=None):
+    name = getattr(product, 'demand_curve', None) or getattr(settings, 'DEMAND_PRICING_CURVE', 'linear')
+    if name not in CURVES:
+        logger.warning(f"Unknown demand curve {name!r}, using linear")
+        name = 'linear'
+    return CURVES[name]
+
+
+# ──────────────────────────── Core ────────────────────────────
+
+def rolling_window_sum(values, window):
+    """sum(values[i:i + window]) for every i, with the window truncated at the end of the array."""
+    import numpy as np
+
+    cumulative = np.concatenate(([0.0], np.cumsum(values, dtype=float)))
+    ends = np.minimum(np.arange(len(values)) + window, len(values))
+    return cumulative[ends] - cumulative[:len(values)]
+
+
+def multiplier_curve(used, open_days, capacity, max_factor, curve=linear_curve, window=DEMAND_WINDOW_DAYS):
+    """
+    Per-date multipliers, one per element of `used`.
+
+    used      -- array of occupied slots per day (the horizon plus `window` days of look-ahead)
+    open_days -- boolean array, True where the product sells that day
+    Windows near the end of the array are truncated, so callers pass `window - 1` extra days.
+    """
+    import numpy as np
+
+    used = np.asarray(used, dtype=float)
+    if max_factor <= 0 or capacity <= 0 or not len(used):
+        return np.ones(len(used))
+
+    slots = rolling_window_sum(np.asarray(open_days, dtype=float) * capacity, window)
+    window_used = rolling_window_sum(used, window)
+    occupancy = np.divide(window_used, slots, out=np.zeros_like(window_used), where=slots > 0)
+    occupancy = np.clip(occupancy, 0.0, 1.0)
+    return 1.0 + float(max_factor) * np.asarray(curve(occupancy), dtype=float)
+
+
+# ──────────────────────────── Occupancy loaders ────────────────────────────
+
+def _tour_open_days(tour, dates):
+    import numpy as np
+    from bookings.tours_utils import available_weekdays, model_weekday
+
+    weekdays = available_weekdays(tour)
+    blackout = set(tour.blackout_dates_list) if hasattr(tour, 'blackout_dates_list') else set()
+    return np.array([model_weekday(d) in weekdays and d.isoformat() not in blackout for d in dates], dtype=bool)
+
+
+def tour_daily_occupancy(tour, start, end):
+    """{date: confirmed pax} for start..end in one aggregate query."""
+    from bookings.models import Booking
+
+    rows = (
+        Booking.objects.filter(
+            content_type=ContentType.objects.get_for_model(tour.__class__),
+            object_id=tour.pk,
+            travel_date__range=(start, end),
+            status__in=TOUR_DEMAND_STATUSES,
+        )
+        .values('travel_date')
+        .annotate(adults=Sum('number_of_adults'), children=Sum('number_of_children'))
+    )
+    return {row['travel_date']: (row['adults'] or 0) + (row['children'] or 0) for row in rows}
+
+
+def accommodation_bookings(accommodation, start, end):
+    from bookings.models import AccommodationBooking
+
+    return AccommodationBooking.objects.filter(
+        content_type=ContentType.objects.get_for_model(accommodation),
+        object_id=accommodation.pk,
+        check_in__lte=end,
+        check_out__gte=start,
+        status__in=ACCOMMODATION_DEMAND_STATUSES,
+    ).only('check_in', 'check_out', 'adults', 'children')
+
+
+def accommodation_window_guests(bookings, start, days, window=DEMAND_WINDOW_DAYS):
+    """
+    For each of `days` dates from `start`: guests of the bookings overlapping that date's demand
+    window (check_in <= date + window and check_out >= date), from one pass over the rows.
+    """
+    import numpy as np
+
+    change = np.zeros(days + 1)
+    for booking in bookings:
+        first = max((booking.check_in - start).days - window, 0)
+        last = min((booking.check_out - start).days, days - 1)
+        if first <= last:
+            change[first] += booking.adults + booking.children
+            change[last + 1] -= booking.adults + booking.children
+    return np.cumsum(change[:days])
+
+
+def is_tour(product):
+    from tours.models import AbstractTourPage
+
+    return isinstance(product, AbstractTourPage)
+
+
+# ──────────────────────────── Public API ────────────────────────────
+
+def accommodation_uplifts(accommodation, start, days, bookings=None, window=DEMAND_WINDOW_DAYS):
+    """
+    curve(occupancy) for `days` dates from `start`. `bookings` (AccommodationBookings of this
+    accommodation) may be passed in by callers that already loaded them; they must cover
+    start .. start + days + window.
+    """
+    import numpy as np
+
+    if bookings is None:
+        bookings = accommodation_bookings(accommodation, start, start + timedelta(days=days - 1 + window))
+    capacity = getattr(accommodation, 'max_capacity', 0) or ACCOMMODATION_DEFAULT_CAPACITY
+    occupancy = np.clip(accommodation_window_guests(bookings, start, days, window) / capacity, 0.0, 1.0)
+    return np.asarray(get_curve(accommodation)(occupancy), dtype=float)
+
+
+def demand_multipliers(product, start, days, occupancy=None, window=DEMAND_WINDOW_DAYS):
+    """
+    NumPy array of demand multipliers for `days` dates starting at `start`.
+    For tours `occupancy` ({date: used slots}) may be passed in by callers that already loaded
+    it; it must cover start .. start + days + window.
+    """
+    import numpy as np
+
+    max_factor = float(getattr(product, 'demand_factor', 0) or 0)
+    if max_factor <= 0:
+        return np.ones(days)
+    if not is_tour(product):
+        return 1.0 + max_factor * accommodation_uplifts(product, start, days, window=window)
+
+    end = start + timedelta(days=days + window - 1)
+    if occupancy is None:
+        occupancy = tour_daily_occupancy(product, start, end)
+
+    dates = [start + timedelta(days=i) for i in range(days + window - 1)]
+    used = np.fromiter((occupancy.get(d, 0) for d in dates), dtype=float, count=len(dates))
+    open_days = _tour_open_days(product, dates)
+    capacity = getattr(product, 'max_capacity', 0) or 0
+
+    curve = multiplier_curve(used, open_days, capacity, max_factor, get_curve(product), window)
+    return curve[:days]
+
+
+def demand_multiplier(product, day, occupancy=None):
+    """Decimal multiplier for a single date (e.g. 1.12 for +12%)."""
+    if day is None:
+        return Decimal('1.0')
+    value = demand_multipliers(product, day, 1, occupancy=occupancy)[0]
+    return Decimal(str(value)).quantize(Decimal('0.0001'), rounding=ROUND_HALF_UP)
+
+
+def accommodation_demand_multiplier(accommodation, check_in, bookings=None):
+    """
+    Decimal multiplier for a stay starting at `check_in`. Kept in Decimal arithmetic, so with
+    the linear curve it equals the original 1 + demand_factor * min(guests / capacity, 1).
+    """
+    if not accommodation.demand_factor or accommodation.demand_factor <= 0:
+        return Decimal('1.0')
+    uplift = float(accommodation_uplifts(accommodation, check_in, 1, bookings=bookings)[0])
+    return Decimal('1.0') + Decimal(str(accommodation.demand_factor)) * Decimal(str(uplift))
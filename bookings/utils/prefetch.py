@@ -0,0 +1,63 @@
+"""
+Batch loading for GenericForeignKeys (Proposal.tour, Booking.tour, AccommodationBooking.accommodation).
+
+Reading a GFK on a list of rows costs one query per row. prefetch_generic() groups the rows by
+content type, loads each type's specific pages with a single in_bulk and stores them in the
+GFK's cache, so the attribute access afterwards is free:
+
+    bookings = prefetch_generic(page_obj.object_list, 'tour')
+
+iter_prefetched() does the same in fixed-size chunks for exports that stream a whole queryset.
+"""
+from collections import defaultdict
+from itertools import islice
+import logging
+
+from django.contrib.contenttypes.models import ContentType
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_CHUNK_SIZE = 500
+
+
+def prefetch_generic(objects, field_name='tour'):
+    """
+    Populate the `field_name` GenericForeignKey on every object with one query per content type.
+    Returns the objects as a list (querysets and pages are evaluated). Missing targets are cached
+    as None, matching what the GFK itself returns.
+    """
+    objects = list(objects)
+    if not objects:
+        return objects
+
+    field = objects[0]._meta.get_field(field_name)
+    ct_attname = objects[0]._meta.get_field(field.ct_field).attname
+
+    ids_by_type = defaultdict(set)
+    for obj in objects:
+        ct_id = getattr(obj, ct_attname)
+        object_id = getattr(obj, field.fk_field)
+        if ct_id is not None and object_id is not None:
+            ids_by_type[ct_id].add(object_id)
+
+    targets = {}
+    for ct_id, ids in ids_by_type.items():
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        if model is None:  # stale content type (model removed)
+            continue
+        for pk, target in model._default_manager.in_bulk(ids).items():
+            targets[(ct_id, pk)] = target
+
+    for obj in objects:
+        target = targets.get((getattr(obj, ct_attname), getattr(obj, field.fk_field)))
+        field.set_cached_value(obj, target)
+
+    logger.debug(f"Prefetched {field_name} for {len(objects)} rows with {len(ids_by_type)} queries")
+    return objects
+
+
+def iter_prefetched(objects, field_name='tour', chunk_size=PREFETCH_CHUNK_SIZE):
+    """Yield `objects` with `field_name` prefetched, one chunk of `chunk_size` rows at a time."""
+    iterator = iter(objects)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield from prefetch_generic(chunk, field_name)
@@ -1,18 +1,27 @@
-from datetime import timedelta
+from datetime import date, timedelta
 from decimal import Decimal
 import json
 
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
-from bookings.models import AccommodationBooking
 from bookings.tours_utils import get_exchange_rate
+from accounts.ratelimit import sliding_ratelimit
+from bookings.utils.demand import (
+    ACCOMMODATION_DEMAND_STATUSES,
+    accommodation_demand_multiplier,
+    demand_multiplier,
+)
 from tours.models import DayTourPage, FullTourPage, LandTourPage
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP  
 import logging
 from django.template.loader import render_to_string
+from mtapp.logs import EventLogger
 
 
 logger = logging.getLogger(__name__)
+log = EventLogger(logger)
+
+DEMAND_BOOKING_STATUSES = ACCOMMODATION_DEMAND_STATUSES
 
 # def calculate_accommodation_price(accommodation, cleaned_data):
 #     check_in = cleaned_data['check_in']
@@ -55,48 +64,35 @@ logger = logging.getLogger(__name__)
 
 #     return final_price.quantize(Decimal('0.01'))
 
-def calculate_accommodation_price(accommodation, cleaned_data):
-    logger.debug("=== calculate_accommodation_price START ===")
-    logger.debug(f"cleaned_data keys: {list(cleaned_data.keys())}")
-    logger.debug(f"child_ages raw: {cleaned_data.get('child_ages')!r}")
-    logger.debug(f"accommodation: {accommodation}")
-    logger.debug(f"pricing_type: {accommodation.pricing_type if accommodation else 'None'}")
-
+def calculate_accommodation_price(accommodation, cleaned_data, demand_multiplier=None):
     check_in = cleaned_data['check_in']
     check_out = cleaned_data['check_out']
     nights = (check_out - check_in).days
     adults = cleaned_data['adults']
     child_ages = cleaned_data.get('child_ages', [])
 
-    logger.debug(f"nights: {nights}, adults: {adults}, child_ages: {child_ages} (type: {type(child_ages)})")
-
     # Use existing model fields
     child_min_age = getattr(accommodation, 'child_age_min', 7)
     child_max_age = getattr(accommodation, 'child_age_max', 12)
-    logger.debug(f"child_min_age: {child_min_age}, child_max_age: {child_max_age}")
 
     # Split children into paying children and infants
     paying_children = 0
     infants = 0
     if isinstance(child_ages, list):
         for age in child_ages:
-            logger.debug(f"Processing child age: {age}")
             if child_min_age <= age <= child_max_age:
                 paying_children += 1
             elif age < child_min_age:
                 infants += 1
     else:
-        logger.warning(f"child_ages is not a list: {type(child_ages)} = {child_ages}")
-
-    logger.debug(f"paying_children: {paying_children}, infants: {infants}")
+        log.warning('accommodation_price.invalid_child_ages', accommodation=accommodation.pk,
+                    type=lambda: type(child_ages).__name__, child_ages=child_ages)
 
     # Base prices
     price_adult = accommodation.price_adult or Decimal('0')
     price_child = accommodation.price_chd or Decimal('0')
     price_infant = accommodation.price_inf or Decimal('0')
 
-    logger.debug(f"price_adult: {price_adult}, price_child: {price_child}, price_infant: {price_infant}")
-
     if accommodation.pricing_type == "Per_person":
         base_total = (
             adults * price_adult +
@@ -113,56 +109,34 @@ def calculate_accommodation_price(accommodation, cleaned_data):
         base_total = adults * price_adult * nights
         base_total += (paying_children * price_child + infants * price_infant) * nights
 
-    logger.debug(f"base_total before factors: {base_total}")
-
     if base_total <= 0:
-        logger.debug("base_total <= 0, returning 0.00")
+        log.debug('accommodation_price.zero', accommodation=accommodation.pk, pricing_type=accommodation.pricing_type,
+                  nights=nights, adults=adults, children=paying_children, infants=infants)
         return Decimal('0.00')
 
     seasonal_multiplier = Decimal(str(getattr(accommodation, 'seasonal_factor', '1.0')))
     price_after_seasonal = base_total * seasonal_multiplier
 
-    demand_multiplier = get_demand_multiplier(accommodation, check_in)
+    if demand_multiplier is None:
+        demand_multiplier = get_demand_multiplier(accommodation, check_in)
     final_price = price_after_seasonal * demand_multiplier
 
-    logger.debug(f"seasonal: {seasonal_multiplier}, demand: {demand_multiplier}, final: {final_price}")
+    log.debug('accommodation_price.computed', accommodation=accommodation.pk, pricing_type=accommodation.pricing_type,
+              nights=nights, adults=adults, children=paying_children, infants=infants, base=base_total,
+              seasonal=seasonal_multiplier, demand=demand_multiplier, total=final_price)
 
     return final_price.quantize(Decimal('0.01'))
-def get_demand_multiplier(accommodation, check_in_date):
+def get_demand_multiplier(accommodation, check_in_date, bookings=None):
     """
     Returns  - demand_factor = 0.20 → max +20%
      - Looks at bookings in next 30 days from check_in_date
-     - Increases price linearly based on occupancy
+     - Guests booked against max_capacity (20 when unset), through the shared curve in
+       bookings/utils/demand.py (linear by default)
+     - `bookings` lets batch callers pass pre-loaded AccommodationBookings for this accommodation
     """
-    if accommodation.demand_factor <= 0:
-        return Decimal('1.0')
-
-    max_factor = Decimal(str(accommodation.demand_factor))  # e.g. 0.20
-    max_capacity = accommodation.max_capacity or 20
-
-    # Count current bookings overlapping with this period
-    start_range = check_in_date
-    end_range = check_in_date + timedelta(days=30)
-
-    overlapping_bookings = AccommodationBooking.objects.filter(
-        accommodation=accommodation,
-        check_in__lte=end_range,
-        check_out__gte=start_range,
-        status__in=['PENDING_PAYMENT', 'PAID']
-    )
-
-    booked_slots = 0
-    for b in overlapping_bookings:
-        booked_slots += b.adults + b.children
-
-    occupancy_rate = booked_slots / max_capacity if max_capacity > 0 else 0
-    occupancy_rate = min(occupancy_rate, 1.0)  # cap at 100%
-
-    # Linear increase: 0% → max_factor
-    demand_multiplier = Decimal('1.0') + (max_factor * Decimal(str(occupancy_rate)))
-    return demand_multiplier
+    return accommodation_demand_multiplier(accommodation, check_in_date, bookings=bookings)
 
-def compute_pricing(tour_type, tour_id, form_data, session):
+def compute_pricing(tour_type, tour_id, form_data):
     model_map = {
         'full': FullTourPage,
         'land': LandTourPage,
@@ -170,25 +144,42 @@ def compute_pricing(tour_type, tour_id, form_data, session):
     }
     model = model_map.get(tour_type.lower())
     if not model:
-        logger.error(f"Invalid tour type: {tour_type}")
+        log.error('pricing.invalid_tour_type', tour_type=tour_type, tour=tour_id)
         return []
 
     tour = get_object_or_404(model, pk=tour_id)
 
+    currency = (form_data.get('currency') or 'USD').upper()
+
+    return price_tour(tour, form_data, currency, get_exchange_rate(currency))
+
+
+def _parse_travel_date(value):
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10]) if value else None
+    except ValueError:
+        return None
+
+
+def price_tour(tour, form_data, currency, exchange_rate, price_adjustment=None):
+    """
+    Room/person configurations for an already-loaded tour. Split out of compute_pricing so
+    batch callers (bookings/utils/batch_pricing.py) can reuse one page load and rate snapshot.
+    `price_adjustment` is the demand multiplier; computed from form_data['travel_date'] if omitted.
+    """
     # === Extract and validate inputs safely ===
     try:
         number_of_adults = max(1, int(form_data.get('number_of_adults', 1) or 1))
-        number_of_children = max(0, int(form_data.get('number_of_children', 0) or 0))
     except (ValueError, TypeError):
         number_of_adults = 1
-        number_of_children = 0
-
-    currency = form_data.get('currency', session.get('currency', 'USD')).upper()
-    session['currency'] = currency
 
     # === Parse child ages ===
     try:
-        child_ages = json.loads(form_data.get('child_ages', '[]'))
+        child_ages = form_data.get('child_ages', '[]')
+        if isinstance(child_ages, str):
+            child_ages = json.loads(child_ages)
         child_ages = [int(a) for a in child_ages if isinstance(a, (int, str)) and str(a).isdigit()]
     except (json.JSONDecodeError, ValueError):
         child_ages = []
@@ -200,10 +191,10 @@ def compute_pricing(tour_type, tour_id, form_data, session):
     max_children_per_room = getattr(tour, 'max_children_per_room', 1) or 1
     # === Factors ===
     seasonal_factor = Decimal(str(getattr(tour, 'seasonal_factor', 1.0) or '1.0'))
-    exchange_rate = get_exchange_rate(currency)
 
-    # Demand adjustment (simplified — use your existing logic if needed)
-    price_adjustment = Decimal('1.0')  # You can plug in demand logic here
+    # Demand adjustment for the travel date (1.0 when no date / no demand_factor)
+    if price_adjustment is None:
+        price_adjustment = demand_multiplier(tour, _parse_travel_date(form_data.get('travel_date')))
 
     # === Load prices safely ===
     try:
@@ -218,7 +209,7 @@ def compute_pricing(tour_type, tour_id, form_data, session):
 
     pricing_type_raw = getattr(tour, 'pricing_type', None)
     if not pricing_type_raw or pricing_type_raw.strip() == '':
-        logger.warning(f"Tour {tour_id} has no pricing_type set! Forcing 'Per_person' for DayTour")
+        log.warning('pricing.missing_pricing_type', tour=tour.pk, fallback='Per_person')
         pricing_type = 'Per_person'
     else:
         pricing_type = pricing_type_raw.strip()
@@ -343,7 +334,8 @@ def compute_pricing(tour_type, tour_id, form_data, session):
     if unique_configs:
         unique_configs[0]['cheapest'] = True
 
-    logger.debug(f"Generated {len(unique_configs)} curated configurations")
+    log.debug('pricing.configurations', tour=tour.pk, pricing_type=pricing_type, adults=number_of_adults,
+              children=children, infants=infants, configurations=len(unique_configs))
     # Filter out options with too many rooms (too much waste)
     filtered = []
     for c in configurations:
@@ -353,20 +345,17 @@ def compute_pricing(tour_type, tour_id, form_data, session):
     configurations = filtered
     return unique_configs if unique_configs else [{'error': 'No valid configuration'}]
 
+@sliding_ratelimit('pricing')
 def render_pricing(request, tour_type, tour_id):
     if not request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        logger.warning(f"Non-AJAX request to render_pricing: {request.method} from {request.META.get('HTTP_REFERER')}")
+        log.warning('pricing.non_ajax', method=request.method, referer=request.META.get('HTTP_REFERER'))
         return HttpResponse("AJAX required", status=400)
 
-    logger.debug(f"AJAX pricing request: {request.POST}")
-    logger.debug(f"render_pricing called with POST: {request.POST}")
-
-    # Prioritize currency from POST data
-    currency = request.POST.get('currency', request.session.get('currency', 'USD')).upper()
-    request.session['currency'] = currency  # Update session currency
-    logger.debug(f"Selected currency: {currency}")
+    currency = (request.POST.get('currency') or 'USD').upper()
+    log.debug('pricing.request', tour_type=tour_type, tour=tour_id, currency=currency,
+              post=lambda: {key: value for key, value in request.POST.items() if key != 'csrfmiddlewaretoken'})
 
-    configurations = compute_pricing(tour_type, tour_id, request.POST, request.session)
+    configurations = compute_pricing(tour_type, tour_id, request.POST)
 
     model_map = {'full': FullTourPage, 'land': LandTourPage, 'day': DayTourPage}
     tour = get_object_or_404(model_map.get(tour_type.lower()), pk=tour_id)
@@ -374,7 +363,7 @@ def render_pricing(request, tour_type, tour_id):
     form_errors = []
     if not configurations:
         form_errors.append("No valid pricing options generated.")
-        logger.warning("No configurations generated in render_pricing")
+        log.warning('pricing.no_configurations', tour_type=tour_type, tour=tour_id)
 
     # === Adults from POST (safe) ===
     number_of_adults_str = request.POST.get('number_of_adults', '1')
@@ -391,17 +380,15 @@ def render_pricing(request, tour_type, tour_id):
         number_of_children = 0
         child_ages_for_template = []
 
-    exchange_rate = get_exchange_rate(currency)
-    logger.debug(f"Using currency: {currency}, exchange_rate: {exchange_rate}")
-
-    configurations_json = json.dumps(configurations, ensure_ascii=False)
+    # compute_pricing already converted the prices, and json.dumps either succeeds with valid
+    # JSON or raises, so there is nothing to re-parse
     try:
-        json.loads(configurations_json)
-        logger.debug("configurations_json is valid JSON")
-    except json.JSONDecodeError as e:
-        logger.error(f"configurations_json is invalid JSON: {e}")
+        configurations_json = json.dumps(configurations, ensure_ascii=False)
+    except (TypeError, ValueError) as e:
+        log.error('pricing.unserializable_configurations', tour=tour_id, error=e)
         form_errors.append("Error generating pricing data.")
         configurations = []
+        configurations_json = '[]'
 
     context = {
         'configurations': configurations,
@@ -422,7 +409,8 @@ def render_pricing(request, tour_type, tour_id):
     context['is_room_based'] = tour.pricing_type in ('Per_room', 'Combined')
 
     response_content = render_to_string('bookings/partials/pricing_options.html', context, request=request)
-    logger.debug(f"Rendered pricing_options.html with context: {context}")
+    log.debug('pricing.rendered', tour=tour_id, currency=currency, configurations=len(configurations),
+              errors=len(form_errors), bytes=len(response_content))
     return HttpResponse(response_content, content_type='text/html')
 
 def get_pricing_tier(tour, number_of_adults):
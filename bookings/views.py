@@ -2,11 +2,12 @@ import json
 import urllib
 import logging
 
-from datetime import date, datetime, timedelta
+from datetime import date, timedelta
 from django.core.serializers.json import DjangoJSONEncoder
 from decimal import Decimal
 
 from bookings.utils.pricing import compute_pricing
+from accounts.ratelimit import sliding_ratelimit
 
 from .forms import ProposalForm
 from partners.models import Partner
@@ -17,6 +18,7 @@ from bookings.models import (
     ExchangeRate,
     Proposal,
     Booking,
+    BookingDraft,
     ProposalConfirmationToken
     )
 
@@ -28,6 +30,7 @@ from django.core.paginator import Paginator
 from django.urls import reverse, reverse_lazy
 from django.utils.translation import gettext_lazy as _
 from django.views.generic import FormView, TemplateView
+from django.utils.decorators import method_decorator
 from django.http import Http404, JsonResponse, HttpResponse
 from django.contrib.contenttypes.models import ContentType
 from django.shortcuts import get_object_or_404, render, redirect
@@ -38,18 +41,20 @@ from bookings.tours_utils import (
     send_proposal_submitted_email,
     send_supplier_email
 )
+from bookings.utils.prefetch import prefetch_generic
+from mtapp.logs import EventLogger
 
 
 logger = logging.getLogger(__name__)
+log = EventLogger(logger)
 
 class BookingStartView(FormView):
     template_name = 'bookings/booking_start.html'
     form_class = ProposalForm
     success_url = reverse_lazy('bookings:customer_portal')  # Fallback, not used
 
-    # @method_decorator(ratelimit(key='ip', rate='5/h', method='POST', block=True)) Uncomment for more strict security for anom users
-    # @method_decorator(ratelimit(key='user', rate='10/d', method='POST', block=True)) # Uncomment for per user
-    # @method_decorator(ratelimit(key='user:ip', rate='8/h', method='POST', block=True))
+    # Rates live in settings.RATELIMITS; counters are shared by all workers
+    @method_decorator(sliding_ratelimit('booking_start', methods=['POST']))
     # @method_decorator(never_cache)
     def dispatch(self, request, *args, **kwargs):
         # Preserve referral/promo codes from first GET into session
@@ -160,7 +165,6 @@ class BookingStartView(FormView):
                 cleaned_data['tour_type'],
                 self.tour.id,
                 request.POST,
-                request.session
             )
 
             # Get selected configuration index from form
@@ -173,44 +177,37 @@ class BookingStartView(FormView):
             # Get the actual selected config
             selected_room_config = configs[selected_index] if selected_index < len(configs) else {}
 
-            # ────────────────────── BUILD proposal_data ──────────────────────
-            proposal_data = {
-                'tour_type': cleaned_data['tour_type'],
-                'tour_id': cleaned_data['tour_id'],
-                'customer_name': cleaned_data['customer_name'],
-                'customer_email': cleaned_data['customer_email'],
-                'customer_phone': cleaned_data.get('customer_phone', ''),
-                'customer_address': cleaned_data.get('customer_address', ''),
-                'nationality': cleaned_data.get('nationality', ''),
-                'notes': cleaned_data.get('notes', ''),
-                'number_of_adults': cleaned_data['number_of_adults'],
-                'number_of_children': cleaned_data.get('number_of_children', 0),
-                'child_ages': cleaned_data.get('child_ages', []),
-                'travel_date': cleaned_data['travel_date'].isoformat(),
-                'currency': cleaned_data.get('currency', 'USD'),
-                'supplier_email': self.tour.supplier_email or '',
-                'estimated_price': str(selected_room_config.get('total_price', '0')),
-                'room_config': {'options': configs},
-                'selected_room_config': selected_room_config,
-                'number_of_infants': sum(
-                    1 for age in cleaned_data.get('child_ages', [])
-                    if age < getattr(self.tour, 'child_age_min', 7)
-                ),
-                # ──────── NEW fields ────────
-                'referral_code': ref_code if ref_code else None,
-                'promo_code': promo_code if promo_code else None,
-            }
+            # ────────────────────── SAVE THE BOOKING DRAFT ──────────────────────
+            # The session keeps only the draft's token; re-submitting the form reuses the draft
+            draft = BookingDraft.from_request(request) or BookingDraft()
+            child_ages = cleaned_data.get('child_ages', [])
+            draft.tour_type = cleaned_data['tour_type']
+            draft.tour_id = cleaned_data['tour_id']
+            draft.customer_name = cleaned_data['customer_name']
+            draft.customer_email = cleaned_data['customer_email']
+            draft.customer_phone = cleaned_data.get('customer_phone') or ''
+            draft.customer_address = cleaned_data.get('customer_address') or ''
+            draft.nationality = cleaned_data.get('nationality') or ''
+            draft.notes = cleaned_data.get('notes') or ''
+            draft.number_of_adults = cleaned_data['number_of_adults']
+            draft.number_of_children = cleaned_data.get('number_of_children') or 0
+            draft.number_of_infants = sum(1 for age in child_ages if age < getattr(self.tour, 'child_age_min', 7))
+            draft.child_ages = child_ages
+            draft.travel_date = cleaned_data['travel_date']
+            draft.currency = cleaned_data.get('currency') or 'USD'
+            draft.estimated_price = Decimal(str(selected_room_config.get('total_price', '0')))
+            draft.selected_config = selected_room_config
+            draft.referral_code = ref_code
+            draft.promo_code = promo_code
+            draft.expires_at = None  # restarts the draft's lifetime
 
             # ────────────────────── INQUIRY-ONLY: FORCE PRICE = 0 ──────────────────────
             if not getattr(self.tour, 'collect_price', True):
-                proposal_data.update({
-                    'estimated_price': '0',
-                    'room_config': {'options': [], 'note': 'Inquiry only'},
-                    'selected_room_config': {'note': 'Inquiry only - contact required'},
-                })
+                draft.estimated_price = Decimal('0')
+                draft.selected_config = {'note': 'Inquiry only - contact required'}
 
-            # ────────────────────── SAVE TO SESSION ──────────────────────
-            request.session['proposal_data'] = proposal_data
+            draft.save()
+            draft.attach(request)
 
             # ────────────────────── RETURN RESPONSE ──────────────────────
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -229,10 +226,10 @@ class BookingStartView(FormView):
 from django.views.decorators.csrf import csrf_exempt
 
 @csrf_exempt
+@sliding_ratelimit('proposal_submit', methods=['POST'])
 def submit_proposal(request, tour_type: str, tour_id: int):
 
     if request.method != 'POST':
-        print("→ Early return: Not POST → 405")
         return JsonResponse({'error': 'Invalid method'}, status=405)
 
     # Manual CSRF check using only header (bypass body parsing failure)
@@ -240,27 +237,18 @@ def submit_proposal(request, tour_type: str, tour_id: int):
     cookie_token = request.COOKIES.get('csrftoken', '')
 
     if not sent_token or sent_token != cookie_token:
-        print("CSRF header mismatch - cookie:", cookie_token, "header:", sent_token)
+        log.warning('proposal_submit.csrf_mismatch', tour_type=tour_type, tour=tour_id, has_header=bool(sent_token))
         return JsonResponse({'error': 'CSRF verification failed'}, status=403)
 
 
-    session_data = request.session.get('proposal_data')
-    if not session_data:
+    draft = BookingDraft.from_request(request)
+    if not draft:
         return JsonResponse({'error': 'No data in session'}, status=400)
     
     if not request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        print("NOT AJAX → returning 400")
         return JsonResponse({'error': 'AJAX required'}, status=400)
 
-    # Parse travel_date
-    travel_date_str = session_data['travel_date']
-    try:
-        travel_date = datetime.strptime(travel_date_str, '%Y-%m-%d').date()
-    except ValueError as ve:
-        logger.error(f"Invalid travel_date format '{travel_date_str}': {ve}")
-        return JsonResponse({'error': 'Invalid travel date format'}, status=400)
-
-    tour_type_str = session_data.get('tour_type', 'land')
+    tour_type_str = draft.tour_type or 'land'
     model_map = {
         'full': FullTourPage,
         'land': LandTourPage,
@@ -272,20 +260,22 @@ def submit_proposal(request, tour_type: str, tour_id: int):
 
     tour = get_object_or_404(model, id=tour_id)
 
-    if tour.id != int(session_data.get('tour_id', 0)):
-        logger.warning(f"Tour ID mismatch: session {session_data.get('tour_id')} vs URL {tour_id}")
+    if tour.id != draft.tour_id:
+        logger.warning(f"Tour ID mismatch: draft {draft.tour_id} vs URL {tour_id}")
         return JsonResponse({'error': 'Invalid tour selection'}, status=400)
 
     content_type = ContentType.objects.get_for_model(tour)    
 
     # ────────────────────── NEW: Handle collect_price=False ──────────────────────
     collect_price = getattr(tour, 'collect_price', True)  # This is the key line
-    if not collect_price:
+    estimated_price = draft.estimated_price
+    if collect_price:
+        room_config = {'options': [draft.selected_config]}
+    else:
         # Force safe defaults for inquiry-only tours
-        session_data['estimated_price'] = '0'
-        session_data['currency'] = session_data.get('currency', 'USD')
-        session_data['room_config'] = {'options': [], 'note': 'Inquiry only - no pricing'}
-        session_data['selected_room_config'] = {'note': 'Inquiry only - contact required'}
+        estimated_price = Decimal('0')
+        room_config = {'options': [], 'note': 'Inquiry only - no pricing'}
+        draft.selected_config = {'note': 'Inquiry only - contact required'}
     # ─────────────────────────────────────────────────────────────────────────────
 
     # Existing line (unchanged)
@@ -295,8 +285,8 @@ def submit_proposal(request, tour_type: str, tour_id: int):
     from accounts.models import ReferralCode, DiscountCode, get_mtweb_user
     from decimal import Decimal, InvalidOperation
 
-    ref_code = session_data.get('referral_code')
-    promo_code = session_data.get('promo_code')
+    ref_code = draft.referral_code or None
+    promo_code = draft.promo_code or None
 
     # 1. Determine the user (referrer → MTWEB fallback)
     referrer_user = None
@@ -315,7 +305,7 @@ def submit_proposal(request, tour_type: str, tour_id: int):
 
     if collect_price and promo_code:
         try:
-            original_price = Decimal(session_data.get('estimated_price', '0'))
+            original_price = estimated_price
             discount_obj = DiscountCode.objects.filter(
                 code=promo_code,
                 active=True
@@ -323,7 +313,7 @@ def submit_proposal(request, tour_type: str, tour_id: int):
 
             if discount_obj and discount_obj.is_valid_for(original_price):
                 final_price, discount_amount = discount_obj.apply_to(original_price)
-                session_data['estimated_price'] = str(final_price)
+                estimated_price = final_price
                 applied_promo_code = promo_code
                 discount_obj.used_count += 1
                 discount_obj.save(update_fields=['used_count'])
@@ -338,26 +328,26 @@ def submit_proposal(request, tour_type: str, tour_id: int):
 
     # Now create the proposal with resolved values
     proposal = Proposal.objects.create(
-        customer_name=session_data['customer_name'],
-        customer_email=session_data['customer_email'],
-        customer_phone=session_data.get('customer_phone', ''),
-        customer_address=session_data.get('customer_address', ''),
-        nationality=session_data.get('nationality', ''),
-        notes=session_data.get('notes', ''),
+        customer_name=draft.customer_name,
+        customer_email=draft.customer_email,
+        customer_phone=draft.customer_phone,
+        customer_address=draft.customer_address,
+        nationality=draft.nationality,
+        notes=draft.notes,
         content_type=content_type,
         object_id=tour_id,
-        number_of_adults=session_data['number_of_adults'],
-        number_of_children=session_data['number_of_children'],
-        children_ages=session_data['child_ages'],
-        travel_date=travel_date,
-        supplier_email=session_data['supplier_email'],
-        currency=session_data.get('currency', 'USD'),
-        estimated_price=Decimal(session_data.get('estimated_price', '0')),
+        number_of_adults=draft.number_of_adults,
+        number_of_children=draft.number_of_children,
+        children_ages=draft.child_ages,
+        travel_date=draft.travel_date,
+        supplier_email=tour.supplier_email or '',
+        currency=draft.currency,
+        estimated_price=estimated_price,
         user=final_user,                           # ← resolved here
         status='PENDING_SUPPLIER',
-        room_config=session_data.get('room_config', {'options': []}),
-        selected_config=session_data.get('selected_room_config', {}),
-        number_of_infants=session_data.get('number_of_infants', 0),
+        room_config=room_config,
+        selected_config=draft.selected_config,
+        number_of_infants=draft.number_of_infants,
         referral_code_used=ref_code,       
         promo_code_used=applied_promo_code,
         discount_amount=discount_amount,   
@@ -414,9 +404,8 @@ def submit_proposal(request, tour_type: str, tour_id: int):
                 logger.error(f"Failed to send admin notification for {proposal.id}: {e}")
                 email_success = False
 
-    # Clear session
-    if 'proposal_data' in request.session:
-        del request.session['proposal_data']
+    # Clear the draft
+    draft.discard(request)
 
     message = 'Proposal submitted successfully!'
     if not email_success:
@@ -430,7 +419,7 @@ def submit_proposal(request, tour_type: str, tour_id: int):
         'redirect_url': f"/bookings/proposal-success/{proposal.id}/",
         'is_company_tour': is_company_tour,
     }
-    print("→ Reaching end of view — returning success JsonResponse")
+    log.info('proposal_submit.created', proposal=proposal.id, prop_id=proposal.prop_id, tour_type=tour_type, tour=tour_id)
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse(response_data)
     else:
@@ -465,16 +454,15 @@ def render_confirmation(request, tour_type: str, tour_id: int):
             }
         ),  # Pre-compute here
     }
-    session_data = request.session.get('proposal_data')
+    draft = BookingDraft.from_request(request)
     # ───────────────────────────────────────────── 
-    if not session_data:
+    if not draft:
         context['error'] = _("No booking data found. Please start over.")
-        print("DEBUG: No session_data - error set")
+        log.debug('confirm_proposal.no_draft', tour=tour_id)
         # Always render template, no redirect for AJAX compatibility
     else:
-        print(f"DEBUG: Raw travel_date in session: '{session_data.get('travel_date', 'MISSING')}' (type: {type(session_data.get('travel_date'))})")
         try:
-            tour_type = session_data.get('tour_type', 'land')
+            tour_type = draft.tour_type or 'land'
             model_map = {'full': FullTourPage, 'land': LandTourPage, 'day': DayTourPage}
             model = model_map.get(tour_type.lower())
             if not model:
@@ -485,24 +473,17 @@ def render_confirmation(request, tour_type: str, tour_id: int):
                 context['tour_type'] = tour_type
         except Http404:
             context['error'] = _("Invalid tour selected.")
-            print("DEBUG: Tour 404 - error set")
+            log.debug('confirm_proposal.tour_not_found', tour_type=tour_type, tour=tour_id)
             # Render with error
         else:
-            # Fallback for missing travel_date
-            if 'travel_date' not in session_data or not session_data['travel_date']:
-                from datetime import date
-                session_data['travel_date'] = date.today().isoformat()
-                print(f"DEBUG: Fallback triggered - set to {session_data['travel_date']}")
-
-            # Safe access to avoid KeyError
             context.update({
                 'tour': tour,
-                'tour_type': session_data.get('tour_type', 'land'),
-                'form_data': session_data,
+                'tour_type': tour_type,
+                'form_data': draft,
                 'booking_data': {'tourName': tour.name},
-                'selected_room_config': session_data.get('selected_room_config', {}),
+                'selected_room_config': draft.selected_config,
                 'tour_duration': getattr(tour, 'duration_days', 0),
-                'selected_configuration_index': session_data.get('selected_configuration', 0),
+                'selected_configuration_index': 0,
             })
     from django.middleware.csrf import get_token
     get_token(request)  # This updates the cookie if needed
@@ -540,6 +521,8 @@ def customer_portal(request):
     bookings_paginator = Paginator(bookings, 10)
     proposals = proposals_paginator.get_page(request.GET.get('proposals_page', 1))
     bookings = bookings_paginator.get_page(request.GET.get('bookings_page', 1))
+    proposals.object_list = prefetch_generic(proposals.object_list, 'tour')
+    bookings.object_list = prefetch_generic(bookings.object_list, 'tour')
 
     context = {
         'proposals': proposals,
@@ -579,10 +562,6 @@ def confirm_proposal(request, proposal_id: int) -> HttpResponse:
     # FIX: Call without extra kwargs (func handles tour/end_date internally)
     send_preconfirmation_email(proposal)
 
-    # Clear stray session (defensive)
-    if 'proposal_data' in request.session:
-        del request.session['proposal_data']
-
     msg = f"Proposal {proposal.prop_id or proposal.id} confirmed ({'internally' if is_company_tour else 'by supplier'}). Payment link sent to {proposal.customer_email}."
     messages.success(request, msg)
 
@@ -651,7 +630,7 @@ def child_ages(request) -> HttpResponse:
         child_age_max = tour.child_age_max  # e.g., 12
         max_children_per_room = getattr(tour, 'max_children_per_room', 1)
         select_age_range = list(range(0, child_age_max + 1))  # e.g., [0, ..., 12]
-        logger.debug(f"Tour {tour_type} {tour_id}: child_age_min={child_age_min}, child_age_max={child_age_max}, select_age_range={select_age_range}")
+        log.debug('child_ages.tour', tour_type=tour_type, tour=tour_id, child_age_min=child_age_min, child_age_max=child_age_max)
     except model.DoesNotExist:
         logger.warning(f"Tour not found: type={tour_type}, id={tour_id}")
         child_age_min = 0
@@ -675,11 +654,11 @@ def child_ages(request) -> HttpResponse:
         'tour_type': tour_type,
         'tour_id': tour_id
     }
-    logger.debug(f"Rendering child_ages.html with context: {context}")
+    log.debug('child_ages.render', tour_type=tour_type, tour=tour_id, children=number_of_children, child_ages=child_ages)
     return render(request, 'bookings/partials/child_ages.html', context)
 
 def revert_to_booking_form(request, tour_type: str, tour_id: int) -> HttpResponse:
-    logger.debug(f"revert_to_booking_form called: tour_type={tour_type}, tour_id={tour_id}")
+    log.debug('revert_to_booking_form.start', tour_type=tour_type, tour=tour_id)
 
     # Map tour type to model
     model_map = {'full': FullTourPage, 'land': LandTourPage, 'day': DayTourPage}
@@ -690,7 +669,7 @@ def revert_to_booking_form(request, tour_type: str, tour_id: int) -> HttpRespons
 
     tour = get_object_or_404(model, pk=tour_id)
     form_data = request.session.get('proposal_form_data', {})
-    logger.debug(f"Restored form_data from session: {form_data}")
+    log.debug('revert_to_booking_form.restored', tour=tour_id, form_data=form_data)
 
     # Ensure child_ages is a list and matches number_of_children
     child_ages = form_data.get('child_ages', [])
@@ -750,8 +729,8 @@ def revert_to_booking_form(request, tour_type: str, tour_id: int) -> HttpRespons
 
     # Recompute configurations
     try:
-        configurations = compute_pricing(tour_type, tour_id, initial_data, request.session)
-        logger.debug(f"Recomputed configurations: {configurations}")
+        configurations = compute_pricing(tour_type, tour_id, initial_data)
+        log.debug('revert_to_booking_form.configurations', tour=tour_id, configurations=len(configurations))
         # Validate selected_configuration against configurations
         if int(selected_configuration) >= len(configurations):
             logger.warning(f"Selected configuration index {selected_configuration} exceeds configurations length {len(configurations)}, resetting to 0")
@@ -785,7 +764,8 @@ def revert_to_booking_form(request, tour_type: str, tour_id: int) -> HttpRespons
         'selected_configuration_index': selected_configuration,
     }
 
-    logger.debug(f"Rendering booking_form.html with context: {context}")
+    log.debug('revert_to_booking_form.render', tour=tour_id, configurations=len(configurations),
+              selected_configuration=selected_configuration, currency=context['currency'])
     return render(request, 'bookings/partials/booking_form.html', context)
 
 def payment_success(request, pk):
@@ -811,13 +791,16 @@ def payment_success(request, pk):
     acc_booking = get_object_or_404(AccommodationBooking, id=pk)
 
     if acc_booking.status != 'PAID':
-        # Fallback: mark as paid if PayPal said so
-        if acc_booking.status == 'PENDING_PAYMENT':
-            acc_booking.status = 'PAID'
-            acc_booking.save(update_fields=['status'])
-            # Optional: send confirmation email again
-            from bookings.utils.emails import send_accommodation_booking_email
-            send_accommodation_booking_email(acc_booking)
+        # Fallback: mark as paid only if PayPal confirmed a capture (fulfilment sends the email)
+        capture = acc_booking.payment_captures.filter(status='COMPLETED').first()
+        if acc_booking.status == 'PENDING_PAYMENT' and capture:
+            from p_methods.payments import PaymentMismatch, fulfil_capture
+            try:
+                fulfil_capture(capture)
+            except PaymentMismatch:
+                # Recorded as a CAPTURE.AMOUNT_MISMATCH event for staff; the booking stays unpaid
+                raise Http404("Invalid booking state")
+            acc_booking.refresh_from_db()
         else:
             raise Http404("Invalid booking state")
 
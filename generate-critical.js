@@ -1,25 +1,52 @@
 // generate-critical.js
+//
+// Critical (above-the-fold) CSS for a set of pages. Run by `manage.py build_assets --critical`,
+// which picks one sample page per page type and stores the result in the critical CSS manifest:
+//
+//   echo '[{"type": "home", "url": "http://127.0.0.1:8000/en/"}]' | node generate-critical.js
+//
+// Reads the jobs as JSON on stdin and prints {"<type>": "<css>", ...} on stdout; progress and
+// errors go to stderr. Exits non-zero if any page failed.
+
+const DIMENSIONS = [
+  { width: 375, height: 667 },    // phone
+  { width: 1300, height: 900 },   // desktop
+];
+
+async function readStdin() {
+  const chunks = [];
+  for await (const chunk of process.stdin) chunks.push(chunk);
+  return JSON.parse(Buffer.concat(chunks).toString('utf8'));
+}
+
 (async () => {
   const critical = await import('critical');
+  const jobs = await readStdin();
+  const results = {};
+  let failed = 0;
+
+  // One page at a time: each job drives a headless browser
+  for (const job of jobs) {
+    try {
+      const result = await critical.generate({
+        inline: false,
+        base: './',
+        src: job.url,
+        dimensions: DIMENSIONS,
+        penthouse: {
+          timeout: 60000,
+          renderWaitTime: 2000,
+        },
+        ignore: [/swiper/, /font-awesome/, /bootstrap-icons/],
+      });
+      results[job.type] = result.css;
+      console.error(`${job.type}: ${job.url} → ${(result.css.length / 1024).toFixed(1)} KB`);
+    } catch (err) {
+      failed += 1;
+      console.error(`${job.type}: ${job.url} failed: ${err.message || err}`);
+    }
+  }
 
-  critical.generate({
-    inline: false,
-    base: './',
-    src: 'http://127.0.0.1:8000/en/',
-    target: {
-      css: 'static/css/critical.css',
-    },
-    width: 375,
-    height: 667,
-    penthouse: {
-      timeout: 60000,
-      renderWaitTime: 2000,
-    },
-    ignore: [/swiper/, /font-awesome/, /bootstrap-icons/],
-  }).then(result => {
-    console.log('Critical CSS generated! → static/css/critical.css');
-    console.log(`Size: ${(result.css.length / 1024).toFixed(1)} KB`);
-  }).catch(err => {
-    console.error('Error:', err);
-  });
-})();
\ No newline at end of file
+  process.stdout.write(JSON.stringify(results));
+  process.exitCode = failed ? 1 : 0;
+})();
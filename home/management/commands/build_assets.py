@@ -0,0 +1,75 @@
+# home/management/commands/build_assets.py
+
+from datetime import datetime, timezone
+import json
+import os
+import subprocess
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import translation
+from django.utils.module_loading import import_string
+
+from wagtail.models import Page
+
+from mtapp import assets
+
+GENERATE_CRITICAL = os.path.join(settings.BASE_DIR, 'generate-critical.js')
+
+
+class Command(BaseCommand):
+    help = "Compress all {% compress %} blocks offline and, with --critical, regenerate per-page-type critical CSS"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skip-compress', action='store_true', help='Only regenerate the critical CSS')
+        parser.add_argument('--critical', action='store_true', help='Regenerate critical CSS (needs node and the site running at --base-url)')
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Where the site is running (default: http://127.0.0.1:8000)')
+        parser.add_argument('--page-type', action='append', choices=sorted(assets.SAMPLE_PAGES), help='Only this page type (repeatable)')
+
+    def handle(self, *args, **options):
+        if not options['skip_compress']:
+            # Run after collectstatic: the bundles are written to COMPRESS_ROOT (STATIC_ROOT)
+            call_command('compress', force=True, verbosity=options['verbosity'])
+
+        if options['critical']:
+            self.build_critical(options['base_url'].rstrip('/'), options['page_type'] or sorted(assets.SAMPLE_PAGES))
+
+    def build_critical(self, base_url, page_types):
+        jobs = []
+        with translation.override(settings.LANGUAGE_CODE):
+            for page_type in page_types:
+                page = Page.objects.live().type(import_string(assets.SAMPLE_PAGES[page_type])).first()
+                if page is None:
+                    self.stdout.write(self.style.WARNING(f"   {page_type}: no live page to sample, skipped"))
+                    continue
+                path = page.get_url_parts()[2]
+                jobs.append({'type': page_type, 'url': f"{base_url}{path}", 'path': path})
+        if not jobs:
+            raise CommandError("No pages to generate critical CSS from")
+
+        try:
+            result = subprocess.run(
+                ['node', GENERATE_CRITICAL], input=json.dumps(jobs), capture_output=True, text=True,
+                cwd=settings.BASE_DIR, check=False,
+            )
+        except FileNotFoundError:
+            raise CommandError("node is not installed (critical CSS needs `npm install` and node)")
+        for line in result.stderr.splitlines():
+            self.stdout.write(f"   {line}")
+        try:
+            generated = json.loads(result.stdout or '{}')
+        except ValueError:
+            raise CommandError(f"generate-critical.js printed no results (exit code {result.returncode})")
+
+        now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        paths = {job['type']: job['path'] for job in jobs}
+        assets.write_manifest({
+            page_type: {'css': css, 'url': paths[page_type], 'generated': now}
+            for page_type, css in generated.items() if css
+        })
+        self.stdout.write(self.style.SUCCESS(
+            f"Critical CSS for {', '.join(sorted(generated)) or 'no page types'} written to {assets.CRITICAL_CSS_MANIFEST}"
+        ))
+        if result.returncode:
+            raise CommandError("Some pages failed; their previous critical CSS was kept")
@@ -0,0 +1,142 @@
+# home/management/commands/profile_startup.py
+
+from collections import defaultdict
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Stacks only some requests need; none of them should be imported while a worker boots
+LAZY_PACKAGES = ['fitz', 'reportlab', 'paypalserversdk', 'numpy', 'nltk']
+
+# Known boot imports that --check accepts: package -> a module on its import chain. openpyxl
+# (django-import-export's admin formats, registered by site_settings/wagtail_hooks.py) imports
+# numpy when it is installed.
+ALLOWED_AT_BOOT = {'numpy': 'import_export.admin'}
+
+# Runs in a fresh interpreter under -X importtime: what a gunicorn worker does before serving
+BOOT_SCRIPT = """
+import json, resource, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+wsgi = time.perf_counter()
+if {urls!r}:
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+done = time.perf_counter()
+print(json.dumps({{
+    'setup_ms': (setup - started) * 1000,
+    'wsgi_ms': (wsgi - setup) * 1000,
+    'urls_ms': (done - wsgi) * 1000,
+    'maxrss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'modules': len(sys.modules),
+}}))
+"""
+
+
+def parse_importtime(stderr):
+    """[(depth, module, self_us, cumulative_us)] in the order -X importtime prints them (children first)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def import_chain(rows, index):
+    """The modules whose import pulled in rows[index], outermost first."""
+    depth = rows[index][0]
+    chain = []
+    for row in rows[index + 1:]:
+        if row[0] < depth:
+            # `import a.b` is reported again one level up once package `a` (which may itself
+            # have imported a.b) has loaded, so the same name can appear twice on the way out
+            if row[1] not in chain:
+                chain.append(row[1])
+            depth = row[0]
+    return chain[::-1]
+
+
+class Command(BaseCommand):
+    help = "Report per-module import cost and memory of a worker boot (django.setup, WSGI app, URLconf)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Rows per table (default: 20)')
+        parser.add_argument('--no-urls', action='store_true', help="Don't load the URLconf (Django loads it on the first request)")
+        parser.add_argument('--check', action='store_true',
+                            help=f"Fail if any of {', '.join(LAZY_PACKAGES)} is imported at boot (except via ALLOWED_AT_BOOT)")
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this file')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE') or settings.SETTINGS_MODULE)
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT.format(urls=not options['no_urls'])],
+            capture_output=True, text=True, cwd=settings.BASE_DIR, env=env, check=False,
+        )
+        if result.returncode:
+            raise CommandError(f"Boot failed:\n{result.stderr[-2000:]}")
+        boot = json.loads(result.stdout.strip().splitlines()[-1])
+        rows = parse_importtime(result.stderr)
+
+        packages = defaultdict(int)
+        for _depth, name, self_us, _cumulative_us in rows:
+            packages[name.split('.')[0]] += self_us
+        total_us = sum(packages.values())
+        project_apps = {app.split('.')[0] for app in settings.INSTALLED_APPS} | {'mtapp'}
+
+        self.stdout.write(
+            f"Boot: django.setup {boot['setup_ms']:.0f} ms, WSGI app {boot['wsgi_ms']:.0f} ms, "
+            f"URLconf {boot['urls_ms']:.0f} ms; {boot['modules']} modules, "
+            f"imports {total_us / 1000:.0f} ms, peak RSS {boot['maxrss_kb'] / 1024:.0f} MiB"
+        )
+
+        self.stdout.write(f"\nPackages by import time (self, all their modules):")
+        for name, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:options['limit']]:
+            marker = '  *' if name in project_apps else ''
+            self.stdout.write(f"   {name:<32} {self_us / 1000:8.1f} ms {self_us / total_us:6.1%}{marker}")
+        self.stdout.write("   (* project app)")
+
+        self.stdout.write(f"\nModules by cumulative import time (including what they import):")
+        for _depth, name, _self_us, cumulative_us in sorted(rows, key=lambda row: row[3], reverse=True)[:options['limit']]:
+            self.stdout.write(f"   {name:<48} {cumulative_us / 1000:8.1f} ms")
+
+        loaded = {}
+        for index, (_depth, name, _self_us, cumulative_us) in enumerate(rows):
+            if name in LAZY_PACKAGES:
+                via = import_chain(rows, index)
+                loaded[name] = {'ms': cumulative_us / 1000, 'via': via, 'allowed': ALLOWED_AT_BOOT.get(name) in via}
+        self.stdout.write("\nLazily loaded stacks:")
+        for name in LAZY_PACKAGES:
+            if name in loaded:
+                via = ' <- '.join(reversed(loaded[name]['via'])) or 'top level'
+                line = f"   {name:<16} imported at boot ({loaded[name]['ms']:.0f} ms) via {via}"
+                if loaded[name]['allowed']:
+                    self.stdout.write(f"{line} (allowed)")
+                else:
+                    self.stdout.write(self.style.WARNING(line))
+            else:
+                self.stdout.write(f"   {name:<16} not imported")
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump({
+                    'boot': boot,
+                    'packages_ms': {name: self_us / 1000 for name, self_us in packages.items()},
+                    'lazy_packages_loaded': loaded,
+                }, f, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
+
+        unexpected = sorted(name for name, info in loaded.items() if not info['allowed'])
+        if options['check'] and unexpected:
+            raise CommandError(f"Imported at boot: {', '.join(unexpected)}")
+        self.stdout.write(self.style.SUCCESS(f"Worker boot imports {total_us / 1000:.0f} ms across {len(rows)} modules"))
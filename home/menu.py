@@ -0,0 +1,86 @@
+"""
+Navigation menu tree.
+
+The navbar used to walk the tree with get_children().live().specific() for every top-level page
+and again for every child, once for the mobile menu and once for the desktop menu. Here the
+three menu levels under the site root are loaded with a single path-prefix query, turned into
+plain nested dicts and cached per site/locale, so both menus render from the same tree.
+
+The cache is invalidated from home/signals.py when pages are published, unpublished, moved or
+deleted, by bumping a version kept in the shared cache (mtapp/cache_versions.py) so every worker
+drops its copy, not just the one that handled the publish.
+"""
+import logging
+
+from django.core.cache import cache
+from wagtail.models import Locale, Page
+
+from mtapp.cache_versions import bump_version, get_version
+
+logger = logging.getLogger(__name__)
+
+MENU_DEPTH = 3
+MENU_CACHE_TIMEOUT = 60 * 60 * 24
+MENU_VERSION_KEY = 'menu_tree_version'
+
+
+def _cache_key(site, language_code):
+    version = get_version(MENU_VERSION_KEY)
+    return f"menu_tree_{site.pk}_{language_code}_{version}"
+
+
+def invalidate_menu_tree():
+    """Drop every cached menu (all sites and locales)."""
+    bump_version(MENU_VERSION_KEY)
+
+
+def build_menu_tree(site, locale):
+    """
+    [{'id', 'title', 'url', 'children': [...]}, ...] for the localized site root.
+    Level 1 honours show_in_menus; levels 2-3 include every live child (as the navbar always did).
+    """
+    root = site.root_page.get_translation_or_none(locale) or site.root_page
+
+    pages = (
+        Page.objects.live().public()
+        .filter(path__startswith=root.path, depth__gt=root.depth, depth__lte=root.depth + MENU_DEPTH)
+        .select_related('locale')
+        .order_by('path')
+    )
+
+    nodes_by_path = {}
+    tree = []
+    for page in pages:
+        level = page.depth - root.depth
+        if level == 1:
+            if not page.show_in_menus:
+                continue
+            siblings = tree
+        else:
+            parent = nodes_by_path.get(page.path[:-Page.steplen])
+            if parent is None:  # parent hidden, unpublished or not in the menu
+                continue
+            siblings = parent['children']
+
+        node = {
+            'id': page.pk,
+            'title': page.title,
+            'url': page.get_url(current_site=site),
+            'children': [],
+        }
+        siblings.append(node)
+        nodes_by_path[page.path] = node
+
+    return tree
+
+
+def get_menu_tree(site, language_code):
+    """Cached menu tree for a site and language; the Locale is only looked up on a cache miss."""
+    key = _cache_key(site, language_code)
+    tree = cache.get(key)
+    if tree is None:
+        locale = Locale.objects.filter(language_code=language_code).first() or Locale.get_default()
+        tree = build_menu_tree(site, locale)
+        cache.set(key, tree, MENU_CACHE_TIMEOUT)
+        logger.debug(f"Built menu tree for site {site.pk} / {language_code}")
+    return tree
@@ -7,6 +7,7 @@ from wagtail.admin.panels import FieldPanel, PageChooserPanel
 from wagtailcache.cache import WagtailCacheMixin
 
 from streams import blocks
+from mtapp.listings import post_cards
 
 
 class HomePage(WagtailCacheMixin, SeoMixin, Page):
@@ -94,7 +95,9 @@ class HomePage(WagtailCacheMixin, SeoMixin, Page):
             context['blog_page'] = None
 
         if self.include_latest_blog_posts:
-            context['latest_blog_posts'] = BlogDetailPage.objects.live().public().order_by('-date_published').filter(locale=self.locale).specific()[:6]
+            context['latest_blog_posts'] = post_cards(
+                BlogDetailPage.objects.live().public().order_by('-date_published').filter(locale=self.locale)[:6]
+            )
         else:
             context['latest_blog_posts'] = None
 
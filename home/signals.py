@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from wagtail.models import Page
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from home.menu import invalidate_menu_tree
+from mtapp.sitemaps import invalidate_sitemaps
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+@receiver(post_page_move)
+def invalidate_on_tree_change(sender, instance, **kwargs):
+    invalidate_menu_tree()
+    invalidate_sitemaps()
+
+
+@receiver(post_delete, sender=Page)
+def invalidate_on_page_delete(sender, instance, **kwargs):
+    invalidate_menu_tree()
+    invalidate_sitemaps()
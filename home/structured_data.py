@@ -0,0 +1,91 @@
+"""
+JSON-LD structured data for pages.
+
+base.html used to call page.get_jsonld_schema and page.get_faq_schema twice each (once in the
+{% if %} and once for output), so a tour walked its itinerary and requested renditions twice per
+render, and dict schemas were printed as Python reprs. Here every schema method is called at most
+once per request, serialized to real JSON and cached per page revision and language.
+
+Timing hook: every lookup sends `structured_data_rendered` (sender=page class, page, duration_ms,
+cached) and adds its duration to request.structured_data_ms, so render-time profiling can see how
+much of a page goes to SEO metadata.
+"""
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.dispatch import Signal
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_METHODS = ('get_jsonld_schema', 'get_faq_schema')
+STRUCTURED_DATA_CACHE_TIMEOUT = 60 * 60 * 24
+
+structured_data_rendered = Signal()
+
+# Characters that must not appear raw inside <script> (same set as django's json_script)
+_JSON_SCRIPT_ESCAPES = {ord('>'): '\\u003E', ord('<'): '\\u003C', ord('&'): '\\u0026'}
+
+
+def _serialize(schema):
+    if isinstance(schema, str):
+        return schema.strip() or None
+    return json.dumps(schema, cls=DjangoJSONEncoder, ensure_ascii=False).translate(_JSON_SCRIPT_ESCAPES)
+
+
+def build_structured_data(page):
+    """Uncached list of JSON strings, one per non-empty schema the page defines."""
+    blocks = []
+    for method_name in SCHEMA_METHODS:
+        method = getattr(page, method_name, None)
+        if not callable(method):
+            continue
+        try:
+            schema = method()
+        except Exception as e:
+            logger.warning(f"{method_name} failed for page {page.pk}: {e}")
+            continue
+        if schema:
+            serialized = _serialize(schema)
+            if serialized:
+                blocks.append(serialized)
+    return blocks
+
+
+def _cache_key(page, language_code):
+    revision = page.live_revision_id or page.latest_revision_id or 0
+    return f"structured_data_{page.pk}_{revision}_{language_code}"
+
+
+def get_structured_data(page, request=None):
+    """
+    JSON-LD strings for `page`: memoized on the request, cached by page revision and language.
+    Previews are never cached since the previewed content has no saved revision of its own.
+    """
+    memo = getattr(request, '_structured_data', None) if request is not None else None
+    if memo is not None and page.pk in memo:
+        return memo[page.pk]
+
+    start = time.perf_counter()
+    preview = bool(getattr(request, 'is_preview', False))
+    language = (translation.get_language() or settings.LANGUAGE_CODE).split('-')[0]
+    key = _cache_key(page, language)
+
+    blocks = None if preview else cache.get(key)
+    cached = blocks is not None
+    if not cached:
+        blocks = build_structured_data(page)
+        if not preview:
+            cache.set(key, blocks, STRUCTURED_DATA_CACHE_TIMEOUT)
+
+    duration_ms = (time.perf_counter() - start) * 1000
+    if request is not None:
+        request._structured_data = {**(memo or {}), page.pk: blocks}
+        request.structured_data_ms = getattr(request, 'structured_data_ms', 0.0) + duration_ms
+    structured_data_rendered.send(sender=page.__class__, page=page, duration_ms=duration_ms, cached=cached)
+    logger.debug(f"Structured data for page {page.pk}: {duration_ms:.1f} ms ({'cached' if cached else 'built'})")
+    return blocks
@@ -0,0 +1,17 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from mtapp.assets import critical_css as get_critical_css, page_type
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def critical_css(context, page=None):
+    """
+    <style> with the critical CSS for the page's type (see mtapp.assets), read from the
+    manifest `manage.py build_assets --critical` writes. Empty when none has been built.
+    """
+    css = get_critical_css(page_type(page or context.get('page')))
+    # Build output, not user content
+    return mark_safe(f"<style>{css}</style>") if css else ''
@@ -4,6 +4,8 @@ from django.utils import translation
 from wagtail.models import Site, Locale
 from wagtail.models import Page
 
+from home import menu
+
 register = template.Library()
 
 @register.simple_tag(takes_context=True)
@@ -25,3 +27,21 @@ def get_navbar_pages(context):
 
     root = site.root_page.localized  # automatically the translation in active locale
     return root.get_children().live().public().in_menu().specific()
+
+
+@register.simple_tag(takes_context=True)
+def get_menu_tree(context):
+    """
+    Three-level menu for the current site and language as nested dicts
+    ({'title', 'url', 'children'}), cached by home.menu so the mobile and desktop
+    menus share one tree and no tree queries run on a warm cache.
+    """
+    request = context.get('request')
+    if not request:
+        return []
+
+    site = Site.find_for_request(request)
+    if site is None:
+        return []
+    language = (translation.get_language() or settings.LANGUAGE_CODE).split('-')[0]
+    return menu.get_menu_tree(site, language)
@@ -0,0 +1,21 @@
+from django import template
+from django.utils.html import format_html_join
+from django.utils.safestring import mark_safe
+
+from home.structured_data import get_structured_data
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def structured_data(context, page=None):
+    """
+    <script type="application/ld+json"> blocks for the page's JSON-LD schemas.
+    Each schema method runs at most once per request; see home.structured_data.
+    """
+    page = page or context.get('page')
+    if page is None or not getattr(page, 'pk', None):
+        return ''
+    # Blocks are JSON with <, > and & already escaped for <script>, so they are marked safe as-is
+    blocks = get_structured_data(page, context.get('request'))
+    return format_html_join('\n', '<script type="application/ld+json">{}</script>', ((mark_safe(b),) for b in blocks))
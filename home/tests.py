@@ -1,7 +1,18 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.template import RequestContext, Template
+from django.test import RequestFactory
 from django.urls import reverse
+from bookings.benchmarks.data import build
+from bookings.models import Proposal
+from bookings.tours_utils import get_remaining_capacity
 from home.models import HomePage
+from mtapp.querybudget import query_budget
 
-from wagtail.models import Page
+from wagtail.models import Page, Site
 from wagtail.test.utils import WagtailPageTestCase
 
 
@@ -41,3 +52,79 @@ class HomeTests(WagtailPageTestCase):
     def test_homepage_template_used(self):
         response = self.client.get(reverse("home"))
         self.assertTemplateUsed(response, "home/home_page.html")
+
+
+class HomeQueryBudgetTests(WagtailPageTestCase):
+    """
+    Query budgets for the home page (see mtapp/querybudget.py).
+    """
+
+    def setUp(self):
+        root_page = Page.objects.get(pk=1)
+        self.homepage = HomePage(title="Home", banner_title="Home", slug="home-budget")
+        root_page.add_child(instance=self.homepage)
+        Site.objects.update_or_create(is_default_site=True, defaults={'root_page': self.homepage, 'hostname': 'localhost'})
+
+    def test_homepage_query_budget(self):
+        with query_budget(30, max_repeats=3):
+            response = self.client.get(self.homepage.url)
+        self.assertEqual(response.status_code, 200)
+
+
+class PageQueryBudgetTests(WagtailPageTestCase):
+    """
+    Query budgets for the pages and helpers behind the busiest requests, on the benchmark data
+    (bookings/benchmarks/data.py) so a per-row query shows up as a repeated shape.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fx = build(tours=12, accommodations=4, bookings=400)
+        Site.objects.update_or_create(is_default_site=True, defaults={'root_page': cls.fx.home, 'hostname': 'localhost'})
+        cls.staff = get_user_model().objects.create_user('staff', 'staff@example.com', 'pw', is_staff=True)
+        Proposal.objects.bulk_create(
+            Proposal(
+                customer_name=f"Guest {i}",
+                customer_email=f"guest{i}@example.com",
+                content_type=ContentType.objects.get_for_model(tour),
+                object_id=tour.pk,
+                travel_date=cls.fx.travel_date,
+            )
+            for i, tour in enumerate(cls.fx.tours)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_tours_index_query_budget(self):
+        with query_budget(35, max_repeats=5):
+            response = self.client.get(self.fx.tours_index.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_customer_portal_query_budget(self):
+        with query_budget(30, max_repeats=3):
+            response = self.client.get(reverse('bookings:customer_portal'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_navigation_query_budget(self):
+        request = RequestFactory().get('/')
+        request.user = self.staff
+        template = Template('{% include "home/includes/navigation.html" %}')
+        with query_budget(10, max_repeats=2):
+            template.render(RequestContext(request))
+        # The menu tree is cached after the first render; the unread count is per request
+        with query_budget(2, max_repeats=1):
+            template.render(RequestContext(request))
+
+    def test_accommodation_booking_listing_query_budget(self):
+        admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(admin)
+        with query_budget(40, max_repeats=5):
+            response = self.client.get(reverse('wagtailsnippets_bookings_accommodationbooking:list'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_remaining_capacity_query_budget(self):
+        tour = self.fx.land_tour
+        with query_budget(2, max_repeats=1):
+            capacity = get_remaining_capacity(tour.pk, date.today() + timedelta(days=7), type(tour), duration_days=14)
+        self.assertEqual(len(capacity['per_day']), 14)
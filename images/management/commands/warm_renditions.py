@@ -0,0 +1,27 @@
+# images/management/commands/warm_renditions.py
+
+from django.core.management.base import BaseCommand
+
+from wagtail.models import Page
+
+from images.renditions import warm_page_renditions
+
+
+class Command(BaseCommand):
+    help = "Pre-generate stream block renditions (WebP/AVIF srcset widths included) for live pages"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', type=int, action='append', help='Only warm this page id (repeatable)')
+
+    def handle(self, *args, **options):
+        pages = Page.objects.live().specific()
+        if options['page']:
+            pages = pages.filter(pk__in=options['page'])
+
+        total_images = 0
+        for page in pages:
+            count = warm_page_renditions(page)
+            total_images += count
+            self.stdout.write(f"   {page.title}: {count} images")
+
+        self.stdout.write(self.style.SUCCESS(f"Warmed renditions for {total_images} images"))
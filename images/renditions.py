@@ -0,0 +1,185 @@
+"""
+Rendition warm-up and responsive srcset helpers for CustomImage.
+
+Wagtail creates renditions lazily, so the first visitor after a publish pays
+for resizing every large original used by the stream blocks. The helpers here
+pre-generate the filter specs the block templates use (plus WebP/AVIF width
+variants for srcsets) when a page is published.
+"""
+import logging
+import re
+import threading
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from PIL import features as pil_features
+
+from wagtail.blocks import ListBlock, StreamBlock, StructBlock
+from wagtail.fields import StreamField
+from wagtail.images import get_image_model
+from wagtail.images.blocks import ImageChooserBlock
+
+logger = logging.getLogger(__name__)
+
+
+# Filter specs used by streams/templates/streams/*.html (swipers, gridded_images,
+# parallax_image_block, flex_images, cards, explore_block) and the JSON-LD image.
+WARMUP_FILTER_SPECS = getattr(settings, 'IMAGES_WARMUP_FILTER_SPECS', [
+    'fill-1920x1080|format-webp|webpquality-80',
+    'fill-1920x1080|format-webp|webpquality-60',
+    'fill-1920x1080',
+    'fill-1373x480|format-webp|webpquality-80',
+    'fill-370x315|format-webp|webpquality-80',
+    'fill-312x312|format-webp|webpquality-80',
+    'fill-315x200',
+    'fill-1200x630',
+])
+
+# Widths emitted in srcsets by {% responsive_image %}
+RESPONSIVE_WIDTHS = getattr(settings, 'IMAGES_RESPONSIVE_WIDTHS', [480, 768, 1280, 1920])
+
+# Base specs that also get their width variants warmed
+RESPONSIVE_BASE_SPECS = getattr(settings, 'IMAGES_RESPONSIVE_BASE_SPECS', ['fill-1920x1080', 'fill-370x315'])
+
+IMAGE_QUALITY = getattr(settings, 'IMAGES_RESPONSIVE_QUALITY', 80)
+
+_SPEC_RE = re.compile(r'^(fill|width|max|min)-(\d+)(?:x(\d+))?')
+
+
+def responsive_formats():
+    """Output formats for srcset variants, best first. AVIF only when Pillow can encode it."""
+    formats = list(getattr(settings, 'IMAGES_RESPONSIVE_FORMATS', ['avif', 'webp']))
+    if 'avif' in formats and not pil_features.check('avif'):
+        formats.remove('avif')
+    return formats
+
+
+def scaled_spec(base_spec, width):
+    """
+    Return the resize operation of base_spec scaled down to `width`, keeping the aspect ratio.
+    e.g. ('fill-1920x1080', 480) -> 'fill-480x270'. Never upscales past the base width.
+    """
+    match = _SPEC_RE.match(base_spec)
+    if not match:
+        return f'width-{width}'
+
+    op, base_w, base_h = match.group(1), int(match.group(2)), match.group(3)
+    width = min(width, base_w)
+    if base_h is None:
+        return f'{op}-{width}'
+    height = max(1, round(int(base_h) * width / base_w))
+    return f'{op}-{width}x{height}'
+
+
+def format_spec(resize_spec, fmt):
+    """Append the format/quality operations for `fmt` to a resize spec."""
+    return f'{resize_spec}|format-{fmt}|{fmt}quality-{IMAGE_QUALITY}'
+
+
+def responsive_specs(base_spec, widths=None, formats=None):
+    """All filter specs needed for a srcset of base_spec, as {fmt: [(width, spec), ...]}."""
+    widths = widths or RESPONSIVE_WIDTHS
+    formats = formats or responsive_formats()
+    base_width = int(_SPEC_RE.match(base_spec).group(2)) if _SPEC_RE.match(base_spec) else max(widths)
+
+    result = {}
+    for fmt in formats:
+        seen = set()
+        variants = []
+        for width in sorted(widths):
+            width = min(width, base_width)
+            if width in seen:
+                continue
+            seen.add(width)
+            variants.append((width, format_spec(scaled_spec(base_spec, width), fmt)))
+        result[fmt] = variants
+    return result
+
+
+def warmup_specs():
+    """Every filter spec pre-generated for an image on publish (deduplicated, ordered)."""
+    specs = list(WARMUP_FILTER_SPECS)
+    for base_spec in RESPONSIVE_BASE_SPECS:
+        for variants in responsive_specs(base_spec).values():
+            specs.extend(spec for _, spec in variants)
+    return list(dict.fromkeys(specs))
+
+
+def _iter_block_images(block, value):
+    if not value:
+        return
+    if isinstance(block, ImageChooserBlock):
+        yield value
+    elif isinstance(block, StreamBlock):
+        for child in value:
+            yield from _iter_block_images(child.block, child.value)
+    elif isinstance(block, ListBlock):
+        for item in value:
+            yield from _iter_block_images(block.child_block, item)
+    elif isinstance(block, StructBlock):
+        for name, child_block in block.child_blocks.items():
+            yield from _iter_block_images(child_block, value.get(name))
+
+
+def collect_page_images(page):
+    """Return the distinct images referenced by a page's image FKs and StreamFields."""
+    image_model = get_image_model()
+    images = {}
+
+    for field in page._meta.get_fields():
+        if isinstance(field, models.ForeignKey) and field.related_model is image_model:
+            image = getattr(page, field.name, None)
+            if image is not None:
+                images[image.pk] = image
+        elif isinstance(field, StreamField):
+            stream_value = getattr(page, field.name, None)
+            for image in _iter_block_images(field.stream_block, stream_value):
+                images[image.pk] = image
+
+    return list(images.values())
+
+
+def warm_image_renditions(image, specs=None):
+    """Generate any missing renditions for one image. Returns the number of specs processed."""
+    specs = specs or warmup_specs()
+    try:
+        image.get_renditions(*specs)
+    except Exception as e:
+        logger.warning(f"Rendition warm-up failed for image {image.pk}: {e}")
+        return 0
+    return len(specs)
+
+
+def warm_page_renditions(page):
+    """Pre-generate renditions for every image used on `page`."""
+    page = page.specific
+    specs = warmup_specs()
+    images = collect_page_images(page)
+    for image in images:
+        warm_image_renditions(image, specs)
+    logger.info(f"Warmed {len(specs)} renditions for {len(images)} images on page {page.pk}")
+    return len(images)
+
+
+def _warm_in_thread(page):
+    try:
+        warm_page_renditions(page)
+    finally:
+        connection.close()
+
+
+def schedule_page_warmup(page):
+    """
+    Run warm_page_renditions after the publish transaction commits.
+    Runs in a background thread unless IMAGES_WARMUP_ASYNC is False.
+    """
+    if not getattr(settings, 'IMAGES_WARMUP_ENABLED', True):
+        return
+
+    def run():
+        if getattr(settings, 'IMAGES_WARMUP_ASYNC', True):
+            threading.Thread(target=_warm_in_thread, args=(page,), daemon=True).start()
+        else:
+            warm_page_renditions(page)
+
+    transaction.on_commit(run)
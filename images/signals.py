@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from wagtail.signals import page_published
+
+from images.models import CustomImage
+from images.renditions import schedule_page_warmup
+from mtapp.sitemaps import invalidate_sitemaps
+
+
+@receiver(page_published)
+def warm_renditions_on_publish(sender, instance, **kwargs):
+    schedule_page_warmup(instance)
+
+
+@receiver(post_save, sender=CustomImage)
+@receiver(post_delete, sender=CustomImage)
+def invalidate_image_sitemap(sender, instance, **kwargs):
+    invalidate_sitemaps()
@@ -0,0 +1,87 @@
+import logging
+
+from django import template
+from django.core.cache import cache
+from django.utils.html import format_html, format_html_join
+
+from images.renditions import RESPONSIVE_WIDTHS, responsive_formats, responsive_specs
+
+logger = logging.getLogger(__name__)
+
+register = template.Library()
+
+SRCSET_CACHE_TIMEOUT = 60 * 60 * 24
+# How long an image whose renditions failed keeps rendering as a plain <img>
+SRCSET_FAILURE_CACHE_TIMEOUT = 60 * 5
+
+
+def _srcset_cache_key(image, base_spec, widths):
+    widths_key = '-'.join(str(w) for w in widths)
+    return f"srcset_{image.pk}_{image.file_hash or image.file.name}_{base_spec}_{widths_key}"
+
+
+def _build_sources(image, base_spec, widths):
+    """
+    Return [(fmt, srcset, fallback_url, width, height)] generating all renditions in one batch,
+    or [] when the image can't be converted (e.g. an SVG asked for WebP).
+    """
+    specs_by_format = responsive_specs(base_spec, widths, responsive_formats())
+    all_specs = [spec for variants in specs_by_format.values() for _, spec in variants]
+    try:
+        renditions = image.get_renditions(*all_specs)
+    except Exception as e:
+        logger.warning(f"Responsive renditions failed for image {image.pk} ({base_spec}): {e}")
+        return []
+
+    sources = []
+    for fmt, variants in specs_by_format.items():
+        srcset = ', '.join(f"{renditions[spec].url} {width}w" for width, spec in variants)
+        largest = renditions[variants[-1][1]]
+        sources.append((fmt, srcset, largest.url, largest.width, largest.height))
+    return sources
+
+
+@register.simple_tag
+def responsive_image(image, base_spec='fill-1920x1080', sizes='100vw', alt='', css_class='',
+                     loading='lazy', widths=None, **attrs):
+    """
+    Render a <picture> with AVIF/WebP srcsets for `image` scaled from `base_spec`.
+
+    Usage: {% responsive_image item.image "fill-1920x1080" sizes="100vw" alt=item.caption %}
+
+    The rendition URLs are cached per image (keyed on file hash), so after the publish-time
+    warm-up in images.renditions a page render costs one cache hit per image.
+    """
+    if not image:
+        return ''
+
+    if isinstance(widths, str):
+        widths = [int(w) for w in widths.split(',') if w.strip()]
+    widths = widths or RESPONSIVE_WIDTHS
+
+    key = _srcset_cache_key(image, base_spec, widths)
+    sources = cache.get(key)
+    if sources is None:
+        sources = _build_sources(image, base_spec, widths)
+        cache.set(key, sources, SRCSET_CACHE_TIMEOUT if sources else SRCSET_FAILURE_CACHE_TIMEOUT)
+
+    extra_attrs = format_html_join('', ' {}="{}"', ((k.replace('_', '-'), v) for k, v in attrs.items()))
+
+    if not sources:
+        # The original file, unresized, rather than failing the page
+        return format_html(
+            '<img src="{}" width="{}" height="{}" alt="{}" class="{}" loading="{}" decoding="async"{}>',
+            image.file.url, image.width, image.height, alt, css_class, loading, extra_attrs,
+        )
+
+    source_tags = format_html_join(
+        '', '<source type="image/{}" srcset="{}" sizes="{}">',
+        ((fmt, srcset, sizes) for fmt, srcset, _, _, _ in sources),
+    )
+    _, fallback_srcset, fallback_url, width, height = sources[-1]
+
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" class="{}" '
+        'loading="{}" decoding="async"{}></picture>',
+        source_tags, fallback_url, fallback_srcset, sizes, width, height, alt, css_class, loading, extra_attrs,
+    )
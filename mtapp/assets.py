@@ -0,0 +1,91 @@
+"""
+Build-time front-end assets: offline django-compressor bundles and per-page-type critical CSS.
+
+    manage.py build_assets                      compress every {% compress %} block offline
+    manage.py build_assets --critical           ... and regenerate the critical CSS (needs node
+                                                and the site running at --base-url)
+
+    offline_contexts()                          COMPRESS_OFFLINE_CONTEXT: one context per language
+    page_type(page)                             'home', 'tour', 'accommodation', 'blog' or None
+    critical_css(page_type)                     inline CSS for that page type from the manifest
+
+With COMPRESS_OFFLINE the compress tag only looks its block up in the manifest `compress` wrote,
+so no worker hashes or stats the stylesheets. Critical CSS is generated by generate-critical.js
+against one sample page per type and stored, CSS included, in CRITICAL_CSS_MANIFEST; the manifest
+is read once per process, so rendering {% critical_css %} touches no files.
+
+Generating it is a manual step, not part of the image build: run `build_assets --critical
+--skip-compress` against a running site with content and commit the manifest. The committed
+manifest only has 'home' (carried over from the old inline critical CSS); until the other types
+are generated, tour, accommodation and blog pages get the home CSS through DEFAULT_PAGE_TYPE.
+"""
+from functools import cache
+import json
+import os
+
+from django.conf import settings
+
+CRITICAL_CSS_MANIFEST = getattr(
+    settings, 'CRITICAL_CSS_MANIFEST', os.path.join(settings.BASE_DIR, 'mtapp', 'critical', 'manifest.json')
+)
+# Pages without a type of their own get this type's critical CSS
+DEFAULT_PAGE_TYPE = 'home'
+
+# Page app label -> page type
+PAGE_TYPES = {
+    'home': 'home',
+    'tours': 'tour',
+    'accommodation': 'accommodation',
+    'blog': 'blog',
+}
+# Page type -> the page class a sample page is taken from when generating its critical CSS
+SAMPLE_PAGES = {
+    'home': 'home.models.HomePage',
+    'tour': 'tours.models.AbstractTourPage',
+    'accommodation': 'accommodation.models.AbstractAccommodationPage',
+    'blog': 'blog.models.BlogDetailPage',
+}
+
+
+def offline_contexts():
+    """
+    Contexts `manage.py compress` renders every template with: one per language, as the i18n
+    context processor sets LANGUAGE_CODE at runtime, so a block that depends on it still
+    finds its entry in the offline manifest.
+    """
+    for code, _name in settings.LANGUAGES:
+        yield {'STATIC_URL': settings.STATIC_URL, 'LANGUAGE_CODE': code}
+
+
+def page_type(page):
+    if page is None:
+        return None
+    return PAGE_TYPES.get(page._meta.app_label)
+
+
+@cache
+def load_manifest():
+    """{page_type: {'css', 'url', 'generated'}}; empty when no critical CSS has been built."""
+    try:
+        with open(CRITICAL_CSS_MANIFEST, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def critical_css(page_type):
+    manifest = load_manifest()
+    entry = manifest.get(page_type) or manifest.get(DEFAULT_PAGE_TYPE)
+    return entry['css'] if entry else ''
+
+
+def write_manifest(entries):
+    """Merge {page_type: entry} into the manifest on disk."""
+    manifest = dict(load_manifest())
+    manifest.update(entries)
+    os.makedirs(os.path.dirname(CRITICAL_CSS_MANIFEST), exist_ok=True)
+    with open(CRITICAL_CSS_MANIFEST, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+    load_manifest.cache_clear()
+    return manifest
@@ -0,0 +1,74 @@
+"""
+Cache version counters every worker agrees on.
+
+    get_version(key)                  the current version of `key`
+    get_versions([key, ...])          {key: version}, one cache round trip
+    bump_version(key)                 invalidate everything cached under the old version
+    shared_cache()                    the SHARED_CACHE_ALIAS cache, for other cross-worker state
+
+Data cached under a versioned key (menus, sitemaps, calendars...) can stay in the per-process
+default cache: once the version changes no worker asks for the old key again. The versions
+themselves have to live where every worker reads the same value, the SHARED_CACHE_ALIAS cache
+(a DatabaseCache table in production, where 'default' is a LocMemCache per process). A bump in
+one worker therefore reaches the others within CACHE_VERSION_CHECK_SECONDS, the time a worker
+reuses a version it has read before asking again.
+
+A version is an opaque random token rather than a counter: two concurrent bumps can't produce
+the same value, and a version evicted from the shared cache comes back as a new one instead of
+resurrecting keys from before.
+"""
+import secrets
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+VERSION_CHECK_SECONDS = getattr(settings, 'CACHE_VERSION_CHECK_SECONDS', 5)
+
+# key -> (version, monotonic time it was read from the shared cache)
+_read = {}
+
+
+def shared_cache():
+    return caches[getattr(settings, 'SHARED_CACHE_ALIAS', 'default')]
+
+
+def _new_version():
+    return secrets.token_hex(4)
+
+
+def get_versions(keys):
+    now = time.monotonic()
+    versions = {}
+    stale = []
+    for key in keys:
+        entry = _read.get(key)
+        if entry and now - entry[1] < VERSION_CHECK_SECONDS:
+            versions[key] = entry[0]
+        else:
+            stale.append(key)
+
+    if stale:
+        cache = shared_cache()
+        found = cache.get_many(stale)
+        for key in stale:
+            version = found.get(key)
+            if version is None:
+                # add() so that workers racing on a missing version settle on one value
+                version = _new_version()
+                cache.add(key, version, None)
+                version = cache.get(key) or version
+            versions[key] = version
+            _read[key] = (version, now)
+    return versions
+
+
+def get_version(key):
+    return get_versions([key])[key]
+
+
+def bump_version(key):
+    version = _new_version()
+    shared_cache().set(key, version, None)
+    _read[key] = (version, time.monotonic())
+    return version
@@ -0,0 +1,245 @@
+"""
+Request-level performance instrumentation.
+
+    RequestTimingMiddleware   wall time of every request; DB, cache and template time for a sample
+                              of them, as a Server-Timing header and mtapp.metrics series
+    metrics_view              the mtapp.metrics series of every worker, summed, as Prometheus text
+                              (/metrics)
+
+Settings (all optional):
+
+    PERF_SAMPLE_RATE          fraction of requests measured in detail (default 1.0)
+    PERF_SERVER_TIMING        add Server-Timing to sampled responses (default True)
+    PERF_METRICS_TOKEN        bearer token for /metrics; without it only staff users can read it
+
+Series (view is the URL name, or page:<PageClass> for Wagtail pages):
+
+    http_request_seconds{view, method, status}     histogram, every request
+    http_requests_sampled_total{view}              requests measured in detail
+    http_request_db_queries_total{view}            ... and their queries,
+    http_request_db_seconds_total{view}            time in the database,
+    http_request_cache_total{view, result}         cache hits / misses
+    http_request_template_seconds_total{view}      and template rendering time
+
+Detailed measurement hooks DB connections (execute_wrapper), the configured cache backends'
+get/get_many and the Django template backend's render once per process; outside a sampled
+request each hook only reads a context variable. Series are kept per worker process and
+published to the shared cache every METRICS_FLUSH_SECONDS, so /metrics can add them up (see
+mtapp/metrics.py).
+"""
+from contextvars import ContextVar
+from functools import wraps
+import hmac
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.module_loading import import_string
+from django.views.decorators.cache import never_cache
+
+from mtapp.metrics import inc, observe, render_prometheus
+
+
+class RequestStats:
+    """Counters for one sampled request."""
+    __slots__ = ('db_queries', 'db_seconds', 'cache_hits', 'cache_misses', 'template_seconds', 'in_cache', 'in_template')
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_seconds = 0.0
+        self.in_cache = False
+        self.in_template = False
+
+    def server_timing(self, total_seconds, structured_data_ms=None):
+        parts = [
+            f'total;dur={total_seconds * 1000:.1f}',
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_queries} queries"',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'tpl;dur={self.template_seconds * 1000:.1f}',
+        ]
+        if structured_data_ms:
+            parts.append(f'jsonld;dur={structured_data_ms:.1f}')
+        return ', '.join(parts)
+
+
+_current = ContextVar('request_stats', default=None)
+
+
+def current_stats():
+    """RequestStats of the sampled request being handled, or None."""
+    return _current.get()
+
+
+# ──────────────────────────── Hooks ────────────────────────────
+
+def _db_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_queries += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    if _db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_wrapper)
+
+
+_MISSING = object()
+
+
+def _wrap_cache_get(get):
+    @wraps(get)
+    def wrapper(self, key, default=None, version=None):
+        stats = _current.get()
+        if stats is None or stats.in_cache:
+            return get(self, key, default, version)
+        stats.in_cache = True
+        try:
+            value = get(self, key, _MISSING, version)
+        finally:
+            stats.in_cache = False
+        if value is _MISSING:
+            stats.cache_misses += 1
+            return default
+        stats.cache_hits += 1
+        return value
+    return wrapper
+
+
+def _wrap_cache_get_many(get_many):
+    @wraps(get_many)
+    def wrapper(self, keys, version=None):
+        stats = _current.get()
+        if stats is None or stats.in_cache:
+            return get_many(self, keys, version)
+        keys = list(keys)
+        stats.in_cache = True
+        try:
+            values = get_many(self, keys, version)
+        finally:
+            stats.in_cache = False
+        stats.cache_hits += len(values)
+        stats.cache_misses += len(keys) - len(values)
+        return values
+    return wrapper
+
+
+def _wrap_template_render(render):
+    @wraps(render)
+    def wrapper(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None or stats.in_template:
+            return render(self, context, request)
+        stats.in_template = True
+        started = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            stats.template_seconds += time.perf_counter() - started
+            stats.in_template = False
+    return wrapper
+
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def install():
+    """Attach the hooks (once per process)."""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        connection_created.connect(_on_connection_created, dispatch_uid='mtapp_instrumentation')
+        for connection in connections.all(initialized_only=True):
+            _on_connection_created(None, connection)
+
+        backends = {import_string(config['BACKEND']) for config in settings.CACHES.values()}
+        for backend in backends:
+            backend.get = _wrap_cache_get(backend.get)
+            backend.get_many = _wrap_cache_get_many(backend.get_many)
+
+        from django.template.backends.django import Template
+        Template.render = _wrap_template_render(Template.render)
+        _installed = True
+
+
+# ──────────────────────────── Middleware ────────────────────────────
+
+def _view_label(request):
+    label = getattr(request, 'perf_view', None)
+    if label:
+        return label
+    match = getattr(request, 'resolver_match', None)
+    return (match.view_name or match._func_path) if match else 'unresolved'
+
+
+class RequestTimingMiddleware:
+    """
+    Goes first in MIDDLEWARE, so the timings include the other middleware (and cache hits
+    served by wagtailcache) and Server-Timing is never stored in a cached response.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PERF_SAMPLE_RATE', 1.0)
+        self.server_timing = getattr(settings, 'PERF_SERVER_TIMING', True)
+        install()
+
+    def __call__(self, request):
+        stats = RequestStats() if random.random() < self.sample_rate else None
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        elapsed = time.perf_counter() - started
+
+        view = _view_label(request)
+        observe('http_request_seconds', elapsed, view=view, method=request.method, status=response.status_code)
+        if stats is not None:
+            inc('http_requests_sampled_total', view=view)
+            inc('http_request_db_queries_total', stats.db_queries, view=view)
+            inc('http_request_db_seconds_total', stats.db_seconds, view=view)
+            inc('http_request_cache_total', stats.cache_hits, view=view, result='hit')
+            inc('http_request_cache_total', stats.cache_misses, view=view, result='miss')
+            inc('http_request_template_seconds_total', stats.template_seconds, view=view)
+            if self.server_timing:
+                response['Server-Timing'] = stats.server_timing(elapsed, getattr(request, 'structured_data_ms', None))
+        return response
+
+    def process_template_response(self, request, response):
+        # Wagtail serves every page through one view; label by page type instead
+        page = (response.context_data or {}).get('page')
+        if page is not None:
+            request.perf_view = f"page:{type(page).__name__}"
+        return response
+
+
+# ──────────────────────────── Endpoint ────────────────────────────
+
+@never_cache
+def metrics_view(request):
+    """Prometheus text for all workers; this worker's series are current, the others' as of their last flush."""
+    token = getattr(settings, 'PERF_METRICS_TOKEN', None)
+    authorization = request.headers.get('Authorization', '')
+    allowed = (
+        (token and hmac.compare_digest(authorization, f"Bearer {token}"))
+        or (request.user.is_authenticated and request.user.is_staff)
+    )
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
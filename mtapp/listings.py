@@ -0,0 +1,133 @@
+"""
+Lightweight card objects for listing pages (tours index, accommodations index, blog index and
+its routes, home page "latest posts").
+
+Listings only need a handful of columns per page, but loading page instances means fetching
+and deserialising every StreamField (itinerary, amenity, pricing tiers, body, ...). The helpers
+here read the card fields with values(), build URLs from Site.get_site_root_paths() the same way
+the sitemaps do, and return slotted card objects. Cover images for the cards being rendered are
+loaded in one query with their renditions prefetched, so {% image card.cover_image spec %} does
+not query per card.
+
+    tour_cards(queryset)            TourCard per page
+    accommodation_cards(queryset)   AccommodationCard per page (no image, the index shows none)
+    post_cards(queryset)            PostCard per page (already loads banner images)
+    attach_images(cards, *specs)    batch-load cover images for a page of cards
+"""
+import logging
+
+from django.utils import translation
+from wagtail.images import get_image_model
+from wagtail.models import Site
+
+from mtapp.choices import GLOBAL_ICON_CHOICES
+from mtapp.sitemaps import page_path
+
+logger = logging.getLogger(__name__)
+
+TOUR_CARD_IMAGE_SPEC = 'fill-315x200'
+POST_CARD_IMAGE_SPEC = 'fill-800x600|format-webp|webpquality-60'
+
+_ICON_LABELS = dict(GLOBAL_ICON_CHOICES)
+
+
+class Card:
+    """Base for the card classes: built from a values() row, plus `url` and `cover_image`."""
+    __slots__ = ('url', 'cover_image')
+    fields = ()
+    image_field = None
+
+    def __init__(self, row, url):
+        for field in self.fields:
+            setattr(self, field, row[field])
+        self.url = url
+        self.cover_image = None
+
+    @property
+    def image_id(self):
+        return getattr(self, self.image_field) if self.image_field else None
+
+
+class TourCard(Card):
+    fields = (
+        'id', 'title', 'name', 'destination', 'location', 'start_date', 'pricing_type', 'price_subtext',
+        'is_on_discount', 'is_special_offer', 'is_sold_out', 'is_all_inclusive',
+        'price_sgl', 'price_dbl', 'price_tpl', 'price_adult', 'price_chd', 'price_inf', 'cover_image_id',
+    )
+    __slots__ = fields + ('amenities',)
+    image_field = 'cover_image_id'
+
+
+class AccommodationCard(Card):
+    fields = ('id', 'title', 'name', 'destination', 'start_date')
+    __slots__ = fields
+
+    def __str__(self):
+        return self.title or self.name or 'Untitled Accommodation'
+
+
+class PostCard(Card):
+    fields = ('id', 'title', 'date_published', 'banner_image_id')
+    __slots__ = fields + ('owner_name',)
+    image_field = 'banner_image_id'
+
+    @property
+    def banner_image(self):
+        return self.cover_image
+
+
+def _project(queryset, card_class, extra=()):
+    """Yield (row, url) for the card fields of `queryset`, without instantiating pages."""
+    root_paths = Site.get_site_root_paths()
+    rows = queryset.values(*card_class.fields, 'url_path', 'locale__language_code', *extra)
+    for row in rows:
+        language = row['locale__language_code']
+        with translation.override(language):
+            url = page_path(row['url_path'], language, root_paths)
+        yield row, url
+
+
+def amenity_icons(amenity):
+    """[(icon, label)] from the raw data of an amenity StreamField, without building blocks."""
+    icons = []
+    for block in getattr(amenity, 'raw_data', None) or []:
+        if block.get('type') != 'include':
+            continue
+        for item in block.get('value') or []:
+            value = item.get('value') if isinstance(item, dict) else item
+            if value:
+                icons.append((value, _ICON_LABELS.get(value, value)))
+    return icons
+
+
+def attach_images(cards, *specs):
+    """Set `cover_image` on each card from one image query, prefetching renditions for `specs`."""
+    ids = {card.image_id for card in cards if card.image_id}
+    if not ids:
+        return cards
+    images = get_image_model().objects.filter(pk__in=ids).prefetch_renditions(*specs).in_bulk()
+    for card in cards:
+        card.cover_image = images.get(card.image_id)
+    return cards
+
+
+def tour_cards(queryset):
+    cards = []
+    for row, url in _project(queryset, TourCard, extra=('amenity',)):
+        card = TourCard(row, url)
+        card.amenities = amenity_icons(row['amenity'])
+        cards.append(card)
+    return cards
+
+
+def accommodation_cards(queryset):
+    return [AccommodationCard(row, url) for row, url in _project(queryset, AccommodationCard)]
+
+
+def post_cards(queryset):
+    cards = []
+    for row, url in _project(queryset, PostCard, extra=('owner__first_name', 'owner__last_name')):
+        card = PostCard(row, url)
+        card.owner_name = f"{row['owner__first_name'] or ''} {row['owner__last_name'] or ''}".strip()
+        cards.append(card)
+    return attach_images(cards, POST_CARD_IMAGE_SPEC)
@@ -0,0 +1,146 @@
+"""
+Structured, lazily evaluated logging for hot paths, and a queue handler that takes log I/O off
+the request thread.
+
+    log = EventLogger(logger)                         wraps a logging.Logger
+    log.debug('pricing.computed', tour=tour.pk, configurations=len(configs))
+    log.debug('pricing.request', post=lambda: request.POST.dict())
+
+    QueueHandler                                      LOGGING handler: records are queued and a
+                                                      listener thread writes them to its handlers
+
+An event is a name plus keyword fields. When the level is disabled a call costs one level
+check: nothing is formatted and callables passed as fields are never called, so an expensive
+field (a dict of the POST data, a query) is wrapped in a lambda. When it is enabled the record
+reads "event key=value ..." and also carries `event` and `fields` attributes for formatters
+that want the structure.
+
+In LOGGING:
+
+    'queue': {
+        'class': 'mtapp.logs.QueueHandler',
+        'handlers': ['console', 'file'],    # names of other handlers in the same config
+    },
+
+The queue is bounded (QUEUE_SIZE); when the listener can't keep up, records are dropped and
+counted rather than making requests wait on the disk.
+"""
+import logging
+from logging.handlers import QueueListener
+import os
+import queue
+import threading
+
+QUEUE_SIZE = 10000
+
+
+# ──────────────────────────── Events ────────────────────────────
+
+def _value(value):
+    text = str(value)
+    if not text or any(c.isspace() or c in '="' for c in text):
+        return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    return text
+
+
+class Event:
+    """The message of an event record; turned into text only once the record is emitted."""
+    __slots__ = ('name', 'fields')
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def __str__(self):
+        return ' '.join([self.name] + [f"{key}={_value(value)}" for key, value in self.fields.items()])
+
+
+class EventLogger:
+    def __init__(self, logger):
+        self.logger = logger
+
+    def log(self, level, event, fields, exc_info=None):
+        if not self.logger.isEnabledFor(level):
+            return
+        # Resolved here, not in the handler: a lazy field may read request state that is gone
+        # by the time the queue listener formats the record
+        fields = {key: value() if callable(value) else value for key, value in fields.items()}
+        self.logger.log(level, '%s', Event(event, fields), exc_info=exc_info, stacklevel=3,
+                        extra={'event': event, 'fields': fields})
+
+    def debug(self, event, **fields):
+        self.log(logging.DEBUG, event, fields)
+
+    def info(self, event, **fields):
+        self.log(logging.INFO, event, fields)
+
+    def warning(self, event, **fields):
+        self.log(logging.WARNING, event, fields)
+
+    def error(self, event, **fields):
+        self.log(logging.ERROR, event, fields)
+
+    def exception(self, event, **fields):
+        self.log(logging.ERROR, event, fields, exc_info=True)
+
+
+# ──────────────────────────── Queue handler ────────────────────────────
+
+def _handler_by_name(name):
+    get = getattr(logging, 'getHandlerByName', None)  # Python 3.12+
+    return get(name) if get else logging._handlers.get(name)
+
+
+class QueueHandler(logging.Handler):
+    """
+    Puts records on a bounded in-memory queue; a QueueListener thread hands them to the named
+    handlers. The listener starts on the first record in each process (after dictConfig has
+    created the target handlers, and again after a fork, which doesn't copy threads). It is
+    drained by close(), which logging.shutdown() calls at exit.
+    """
+
+    def __init__(self, handlers=(), maxsize=QUEUE_SIZE):
+        super().__init__()
+        self.handler_names = list(handlers)
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            targets = [handler for handler in map(_handler_by_name, self.handler_names) if handler is not None]
+            self.queue = queue.Queue(self.maxsize)
+            self._listener = QueueListener(self.queue, *targets, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def prepare(self, record):
+        # Same as logging.handlers.QueueHandler.prepare: merge the message and drop what
+        # can't cross threads safely (args may be mutated after this call returns)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._pid = None
+        super().close()
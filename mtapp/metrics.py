@@ -0,0 +1,190 @@
+"""
+In-process latency metrics.
+
+    observe(name, seconds, **labels)   add one observation to the `name` histogram
+    timed(name, **labels)              context manager that observes the time spent inside it
+    inc(name, amount=1, **labels)      add to the `name` counter
+    snapshot()                         this worker's {(name, labels): {'buckets': [...], 'sum', 'count'}}
+    flush()                            publish this worker's series to the shared cache
+    render_prometheus()                every series, summed over all workers, in the Prometheus
+                                       text exposition format
+
+Observations are kept per worker process in fixed buckets (a lock and a few integer adds per
+call), so instrumenting upstream calls costs next to nothing. A scrape only reaches one worker,
+so each worker also writes its totals to the shared cache (mtapp/cache_versions.py:shared_cache)
+at most every METRICS_FLUSH_SECONDS, and render_prometheus() adds up every worker's last flush.
+Totals therefore lag by up to METRICS_FLUSH_SECONDS, and a worker that has exited keeps counting
+until its entry expires after METRICS_WORKER_TIMEOUT; the drop then reads as a counter reset,
+which rate() and increase() already handle.
+"""
+from contextlib import contextmanager
+from bisect import bisect_left
+import logging
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+
+from mtapp.cache_versions import shared_cache
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+# (name, ((label, value), ...)) -> [bucket counts..., +Inf count, sum]
+_histograms = {}
+# (name, ((label, value), ...)) -> value
+_counters = {}
+
+FLUSH_SECONDS = getattr(settings, 'METRICS_FLUSH_SECONDS', 15)
+WORKER_TIMEOUT = getattr(settings, 'METRICS_WORKER_TIMEOUT', 60 * 60 * 24)
+WORKERS_KEY = 'metrics:workers'
+
+# monotonic time of this worker's last flush()
+_flushed_at = 0.0
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def observe(name, seconds, **labels):
+    key = _key(name, labels)
+    index = bisect_left(BUCKETS, seconds)
+    with _lock:
+        series = _histograms.get(key)
+        if series is None:
+            series = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+        series[index] += 1
+        series[-1] += seconds
+    _maybe_flush()
+
+
+def inc(name, amount=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+    _maybe_flush()
+
+
+@contextmanager
+def timed(name, **labels):
+    started = time.perf_counter()
+    try:
+        yield labels
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+def _worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _worker_key(worker):
+    return f"metrics:worker:{worker}"
+
+
+def _maybe_flush():
+    if time.monotonic() - _flushed_at >= FLUSH_SECONDS:
+        try:
+            flush()
+        except Exception:
+            # Metrics must never fail the request that recorded them; the next flush retries
+            logger.exception("Could not flush metrics to the shared cache")
+
+
+def flush():
+    """Write this worker's raw series to the shared cache for render_prometheus() to sum."""
+    global _flushed_at
+    with _lock:
+        # Set first: the cache write below may itself be instrumented and call back in here
+        _flushed_at = time.monotonic()
+        state = {
+            'histograms': {key: list(series) for key, series in _histograms.items()},
+            'counters': dict(_counters),
+        }
+    cache = shared_cache()
+    worker = _worker_id()
+    cache.set(_worker_key(worker), state, WORKER_TIMEOUT)
+    workers = cache.get(WORKERS_KEY) or set()
+    if worker not in workers:
+        cache.set(WORKERS_KEY, workers | {worker}, None)
+
+
+def _collect():
+    """Every live worker's histograms and counters, added together."""
+    flush()
+    cache = shared_cache()
+    workers = cache.get(WORKERS_KEY) or set()
+    states = cache.get_many([_worker_key(worker) for worker in workers])
+    expired = {worker for worker in workers if _worker_key(worker) not in states}
+    if expired:
+        cache.set(WORKERS_KEY, workers - expired, None)
+
+    histograms, counters = {}, {}
+    for state in states.values():
+        for key, series in state['histograms'].items():
+            total = histograms.setdefault(key, [0] * len(series))
+            for i, value in enumerate(series):
+                total[i] += value
+        for key, value in state['counters'].items():
+            counters[key] = counters.get(key, 0) + value
+    return histograms, counters
+
+
+def _cumulative(histograms):
+    result = {}
+    for key, series in histograms.items():
+        cumulative, running = [], 0
+        for count in series[:-1]:
+            running += count
+            cumulative.append(running)
+        result[key] = {'buckets': cumulative, 'sum': series[-1], 'count': running}
+    return result
+
+
+def snapshot():
+    """This worker's cumulative bucket counts (matching BUCKETS, then +Inf), sum and count per series."""
+    with _lock:
+        histograms = {key: list(series) for key, series in _histograms.items()}
+    return _cumulative(histograms)
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def render_prometheus():
+    lines = []
+    histograms, counters = _collect()
+    series = _cumulative(histograms)
+    for name in sorted({name for name, _ in series}):
+        lines.append(f"# TYPE {name} histogram")
+        for (series_name, labels), data in sorted(series.items()):
+            if series_name != name:
+                continue
+            for bound, count in zip(BUCKETS + ('+Inf',), data['buckets']):
+                lines.append(f"{name}_bucket{_labels(labels, le=bound)} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {data['sum']:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {data['count']}")
+
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE {name} counter")
+        for (counter_name, labels), value in sorted(counters.items()):
+            if counter_name == name:
+                lines.append(f"{name}{_labels(labels)} {round(value, 6)}")
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+    shared_cache().delete(_worker_key(_worker_id()))
@@ -0,0 +1,161 @@
+"""
+Query budgets and N+1 detection.
+
+    sql_shape(sql)               the SQL with literals, placeholders and IN-lists collapsed, so the
+                                 same query run for different rows groups under one shape
+    QueryRecorder()              context manager counting every query (per shape) in this thread
+    query_budget(n, max_repeats) context manager / test decorator raising QueryBudgetExceeded when
+                                 more than n queries run, or one shape runs more than max_repeats
+    NPlusOneMiddleware           development only: logs each shape a request ran
+                                 NPLUSONE_THRESHOLD times or more, with the app line that ran it
+
+Budgets pin the query count of critical endpoints in tests:
+
+    @query_budget(25, max_repeats=3)
+    def test_tours_index_queries(self):
+        self.client.get(self.tours_index.url)
+
+Unlike assertNumQueries they state an upper bound, so unrelated savings don't break them, and
+their failure message lists the repeated shapes that usually explain the overrun.
+"""
+from collections import Counter
+from contextlib import ContextDecorator, ExitStack
+import logging
+import os
+import re
+import time
+import traceback
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+NPLUSONE_THRESHOLD = getattr(settings, 'NPLUSONE_THRESHOLD', 5)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w."])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def sql_shape(sql):
+    shape = _STRING.sub('?', sql)
+    shape = _NUMBER.sub('?', shape)
+    shape = _PLACEHOLDER.sub('?', shape)
+    shape = _IN_LIST.sub('(...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+# Modules whose frames sit between the app code and the query (execute wrappers), never an origin
+_WRAPPER_FILES = frozenset(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), name) for name in ('querybudget.py', 'instrumentation.py')
+)
+
+
+def _app_frame():
+    """'path:line in function' of the innermost project frame outside the execute wrappers."""
+    base_dir = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        filename = frame.filename
+        if filename.startswith(base_dir) and 'site-packages' not in filename and filename not in _WRAPPER_FILES:
+            return f"{os.path.relpath(filename, base_dir)}:{frame.lineno} in {frame.name}"
+    return 'unknown'
+
+
+class QueryRecorder:
+    """
+    Counts queries on this thread's connections while active. With `origin_at`, the calling
+    app frame of a shape is captured when its count reaches that number (only then, since
+    walking the stack is the expensive part).
+    """
+
+    def __init__(self, origin_at=None):
+        self.origin_at = origin_at
+        self.counts = Counter()
+        self.origins = {}
+        self.total = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.total += 1
+            shape = sql_shape(sql)
+            self.counts[shape] += 1
+            if self.counts[shape] == self.origin_at:
+                self.origins[shape] = _app_frame()
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        return False
+
+    def repeated(self, threshold):
+        """[(shape, count)] for shapes that ran at least `threshold` times, most frequent first."""
+        return [(shape, count) for shape, count in self.counts.most_common() if count >= threshold]
+
+    def report(self, limit=5):
+        lines = [f"{self.total} queries in {self.seconds * 1000:.1f} ms; most repeated:"]
+        for shape, count in self.counts.most_common(limit):
+            origin = f" [{self.origins[shape]}]" if shape in self.origins else ''
+            lines.append(f"  {count:>4} x {shape[:300]}{origin}")
+        return '\n'.join(lines)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class query_budget(ContextDecorator):
+    def __init__(self, max_queries, max_repeats=None):
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+
+    def __enter__(self):
+        origin_at = self.max_repeats + 1 if self.max_repeats is not None else None
+        self.recorder = QueryRecorder(origin_at=origin_at).__enter__()
+        return self.recorder
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.recorder.__exit__(exc_type, exc_value, tb)
+        if exc_type is not None:
+            return False
+
+        problems = []
+        if self.recorder.total > self.max_queries:
+            problems.append(f"{self.recorder.total} queries exceed the budget of {self.max_queries}")
+        if self.max_repeats is not None:
+            for shape, count in self.recorder.repeated(self.max_repeats + 1):
+                problems.append(f"{count} runs of one query exceed max_repeats={self.max_repeats}: {shape[:200]}")
+        if problems:
+            raise QueryBudgetExceeded('\n'.join(problems + [self.recorder.report()]))
+        return False
+
+
+class NPlusOneMiddleware:
+    """Development aid: warns about query shapes repeated NPLUSONE_THRESHOLD+ times in one request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryRecorder(origin_at=NPLUSONE_THRESHOLD) as recorder:
+            response = self.get_response(request)
+
+        offenders = recorder.repeated(NPLUSONE_THRESHOLD)
+        if offenders:
+            lines = [f"Possible N+1 in {request.method} {request.path} ({recorder.total} queries):"]
+            for shape, count in offenders:
+                lines.append(f"  {count:>4} x {shape[:300]} [{recorder.origins.get(shape, 'unknown')}]")
+            logger.warning('\n'.join(lines))
+        return response
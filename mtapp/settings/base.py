@@ -12,6 +12,7 @@ BASE_DIR = os.path.dirname(PROJECT_DIR)
 # Sensitive keys from environment variables
 SECRET_KEY = config('SECRET_KEY')
 OPEN_EXCHANGE_RATES_API_KEY = config('OPEN_EXCHANGE_RATES_API_KEY')
+OPEN_EXCHANGE_RATES_URL = 'https://openexchangerates.org/api/latest.json'
 GOOGLE_TRANSLATE_KEY = config('GOOGLE_TRANSLATE_KEY')
 
 # Application definition
@@ -77,7 +78,6 @@ INSTALLED_APPS = [
     "streams",
     "parler",
     "site_settings",
-    "rosetta",
     "tours",
     "bookings",
     "partners",
@@ -95,6 +95,7 @@ INSTALLED_APPS = [
 # PREFIX_DEFAULT_LANGUAGE = False   # ← Add this (it's False by default in recent Django, but confirm)
 
 MIDDLEWARE = [  # Order matters
+    'mtapp.instrumentation.RequestTimingMiddleware',  # first: times everything below, incl. cache hits
     'wagtailcache.cache.UpdateCacheMiddleware',
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -168,10 +169,30 @@ AXES_ENABLE_ADMIN = True
 def axes_skip_user(user):
     return user.is_superuser
 
+# Cache for values every worker must agree on: cache version counters (mtapp/cache_versions.py),
+# rate-limit counters (accounts/ratelimit.py), PayPal tokens and geocoding responses (routify/geocoding.py)
+SHARED_CACHE_ALIAS = 'default'
+CACHE_VERSION_CHECK_SECONDS = 5  # How long a worker reuses a version before re-reading it
+
 # Ratelimit
 RATELIMIT_ENABLE = True
 RATELIMIT_VIEW = 'accounts.views.ratelimit_exceeded'  # Fallback 403 page
-RATELIMIT_CACHE = 'default'  # Uses the shared cache above
+
+# Reverse proxies in front of the app that append to X-Forwarded-For; 0 trusts REMOTE_ADDR only
+RATELIMIT_TRUSTED_PROXIES = 0
+
+# Sliding-window limits per endpoint scope (accounts/ratelimit.py)
+RATELIMITS = {
+    'pricing': '30/m',          # bookings:calculate_pricing AJAX
+    'batch_quote': '90/m',      # /api/quotes/, per quote: about three months of calendar dates
+    'booking_start': '8/h',     # BookingStartView POST
+    'proposal_submit': '5/h',   # bookings:submit_proposal
+    'captcha_refresh': '20/m',
+    'nominatim': '60/m',        # routify nominatim proxy
+}
+
+# Demand pricing curve for tours + accommodations: 'linear', 'stepped' or 'capped' (bookings/utils/demand.py)
+DEMAND_PRICING_CURVE = 'linear'
 
 # CAPTCHA: Reduce blurriness/distortion
 CAPTCHA_NOISE = 0  # FIXED: 0 = clean (no lines/curves); 1 = minimal dots; 2 = default lines
@@ -286,6 +307,9 @@ WAGTAILDOCS_DOCUMENT_MODEL = 'documents.CustomDocument'
 logs_dir = Path(BASE_DIR) / 'logs'
 logs_dir.mkdir(exist_ok=True)
 
+# logs/ is not in the repository; the file handlers need it to exist
+os.makedirs(os.path.join(BASE_DIR, 'logs'), exist_ok=True)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -305,15 +329,30 @@ LOGGING = {
             'filename': os.path.join(BASE_DIR, 'logs', 'full_error.log'),
             'formatter': 'verbose',
         },
+        # Hot-path loggers write through a queue so requests don't wait on the disk (see mtapp/logs.py)
+        'queue': {
+            'class': 'mtapp.logs.QueueHandler',
+            'handlers': ['console', 'file'],
+        },
     },
     'loggers': {
+        'bookings': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'p_methods': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         'django.server': {
             'handlers': ['console', 'file'],
             'level': 'INFO',          # This is the missing piece
             'propagate': False,
         },
         'django.request': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],  # every 4xx/5xx response is logged from the request thread
             'level': 'DEBUG',
             'propagate': False,
         },
@@ -331,8 +370,34 @@ WAGTAILIMAGES_FORMAT_CONVERSIONS = {
     'ico': 'ico',
     'jpg': 'jpg',
     'png': 'png',
+    'avif': 'avif',
 }
 
+# Publish-time rendition warm-up + {% responsive_image %} srcsets (see images/renditions.py)
+IMAGES_WARMUP_ENABLED = True
+IMAGES_WARMUP_ASYNC = True
+IMAGES_RESPONSIVE_WIDTHS = [480, 768, 1280, 1920]
+IMAGES_RESPONSIVE_FORMATS = ['avif', 'webp']
+
+# Request instrumentation: Server-Timing headers + /metrics (see mtapp/instrumentation.py)
+PERF_SAMPLE_RATE = 1.0
+PERF_SERVER_TIMING = True
+PERF_METRICS_TOKEN = config('PERF_METRICS_TOKEN', default='')
+# Each worker writes its series to the shared cache this often; /metrics sums them (mtapp/metrics.py)
+METRICS_FLUSH_SECONDS = 15
+METRICS_WORKER_TIMEOUT = 60 * 60 * 24  # an exited worker's totals are dropped after this
+
+# PayPal webhooks are applied after commit in a background thread (see p_methods/payments.py);
+# `manage.py process_payment_events` retries failures, `reconcile_payments` catches missed ones
+PAYMENTS_ASYNC = True
+PAYPAL_API_BACKEND = 'p_methods.paypal_api.PayPalAPI'
+# The SDK client is built on first use; set True to log PayPal request/response bodies
+PAYPAL_LOG_BODIES = False
+
+# Tour booking steps share a BookingDraft row; the session holds only its token.
+# `manage.py clear_booking_drafts` deletes drafts older than this (seconds)
+BOOKING_DRAFT_TTL = 60 * 60 * 6
+
 WAGTAILIMAGES_EXTENSIONS = ['gif', 'ico', 'jpeg', 'png', 'svg', 'jpg']
 WAGTAILIMAGES_DEFAULT_LAZY_ATTRIBUTES = {
     'loading': 'lazy',
@@ -380,16 +445,19 @@ INSTALLED_APPS += ['compressor']
 STATICFILES_FINDERS += ['compressor.finders.CompressorFinder']
 
 COMPRESS_ENABLED = True
-COMPRESS_OFFLINE = False
+# Bundles are built at deploy time by `manage.py build_assets` (after collectstatic); at runtime
+# the compress tag only reads the offline manifest. See mtapp/assets.py
+COMPRESS_OFFLINE = True
 COMPRESS_URL = STATIC_URL
 COMPRESS_ROOT = STATIC_ROOT
 
 COMPRESS_OUTPUT_DIR = 'CACHE'
 COMPRESS_TEMPLATE_FILTER = True
 COMPRESS_PRECOMPILERS = ()
-COMPRESS_OFFLINE_CONTEXT = {
-    'STATIC_URL': '/static/',
-}
+COMPRESS_OFFLINE_CONTEXT = 'mtapp.assets.offline_contexts'
+
+# Per-page-type critical CSS inlined by {% critical_css %} (`manage.py build_assets --critical`)
+CRITICAL_CSS_MANIFEST = os.path.join(PROJECT_DIR, 'critical', 'manifest.json')
 
 from django.views.static import serve as static_serve
 from django.views.decorators.cache import cache_control
@@ -38,6 +38,9 @@ if DEBUG:
     # Whitenoise — no cache
     WHITENOISE_AUTOREFRESH = True
     WHITENOISE_MAX_AGE = 0
+
+    # Log query shapes repeated NPLUSONE_THRESHOLD+ times per request (mtapp/querybudget.py)
+    MIDDLEWARE += ['mtapp.querybudget.NPlusOneMiddleware']
     
     # Compressor — off
     COMPRESS_ENABLED = False
@@ -124,6 +127,10 @@ LOGGING = {
             'filename': os.path.join(BASE_DIR, 'logs', 'debug.log'),
             'formatter': 'verbose',
         },
+        'queue': {
+            'class': 'mtapp.logs.QueueHandler',
+            'handlers': ['console', 'file'],
+        },
     },
     'root': {
         'handlers': ['console'],
@@ -148,7 +155,7 @@ LOGGING = {
         },
         # Your app — this is the key line
         'bookings': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': 'DEBUG',   # ← Now all logger.debug() in bookings/ will show
             'propagate': False,
         },
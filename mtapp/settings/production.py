@@ -80,9 +80,24 @@ CACHES = {
         'OPTIONS': {
             'MAX_ENTRIES': 2000,
         }
-    }
+    },
+    # LocMem is per process, so values all workers must agree on (cache versions) go to a
+    # table every worker shares. Create it once with: python manage.py createcachetable
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'shared_cache',
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+        }
+    },
 }
 
+SHARED_CACHE_ALIAS = 'shared'
+
+# Measure DB/cache/template time on one request in ten (wall time is always recorded)
+PERF_SAMPLE_RATE = 0.1
+
 WAGTAILADMIN_BASE_URL = "https://www.milanotravel.com.ec"
 
 # wagtail-cache specific (uses the 'default' cache)
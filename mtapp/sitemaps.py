@@ -1,32 +1,262 @@
-from django.contrib.sitemaps import Sitemap
-from django.contrib.sites.models import Site
-from django.urls import reverse
-from wagtail.models import Page
+"""
+XML sitemaps, split into an index plus one sitemap per section and locale.
+
+    /sitemap.xml                  index with per-section <lastmod>
+    /sitemap-tours-en.xml         tour pages in English (?p=2 for the next chunk)
+    /sitemap-images.xml           images referenced by pages
+
+Pages are read as values() projections (url_path, last_published_at, locale) and their URLs are
+built from Site.get_site_root_paths(), the same way Page.get_url_parts() does it, so no page
+objects are instantiated. Each sitemap holds at most SITEMAP_LIMIT URLs.
+
+Responses are cached per host under a version (kept in the shared cache, mtapp/cache_versions.py,
+so it reaches every worker) that home/signals.py and images/signals.py bump on publish,
+unpublish, move, delete and image changes. A cache miss is streamed to the
+client while it is generated and stored once complete.
+"""
+from itertools import islice
+from xml.sax.saxutils import escape
+import logging
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, Max, Q
+from django.db.models.functions import Cast
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import NoReverseMatch, reverse
+from django.utils import translation
 from wagtail.images import get_image_model
+from wagtail.models import Page, ReferenceIndex, Site
+
+from mtapp.cache_versions import bump_version, get_version
+
+logger = logging.getLogger(__name__)
+
+SITEMAP_LIMIT = 5000
+SITEMAP_CACHE_TIMEOUT = 60 * 60 * 24
+SITEMAP_VERSION_KEY = 'sitemap_version'
+SITEMAP_CHUNK_SIZE = 500
+XML_CONTENT_TYPE = 'application/xml; charset=utf-8'
+
+# section -> app_label of its page models; every other page type goes to "pages"
+SECTION_APPS = {
+    'tours': 'tours',
+    'accommodations': 'accommodation',
+    'blog': 'blog',
+}
+PAGE_SECTIONS = ('pages',) + tuple(SECTION_APPS)
+IMAGE_SECTION = 'images'
+
+SECTION_SETTINGS = {
+    'pages': ('weekly', '0.9'),
+    'tours': ('weekly', '0.9'),
+    'accommodations': ('weekly', '0.9'),
+    'blog': ('weekly', '0.8'),
+    IMAGE_SECTION: ('monthly', '0.7'),
+}
+
+URLSET_OPEN = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+URLSET_CLOSE = '</urlset>\n'
+INDEX_OPEN = '<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+INDEX_CLOSE = '</sitemapindex>\n'
+
+
+def invalidate_sitemaps():
+    """Drop every cached sitemap (all hosts, sections and locales)."""
+    bump_version(SITEMAP_VERSION_KEY)
+
+
+def _cache_key(request, name):
+    version = get_version(SITEMAP_VERSION_KEY)
+    return f"sitemap_{version}_{request.scheme}_{request.get_host()}_{name}"
+
+
+# ──────────────────────────── Queries ────────────────────────────
+
+def _root_paths(site):
+    return [root for root in Site.get_site_root_paths() if root.site_id == site.pk]
+
+
+def site_pages(site):
+    """Live, public pages under any (translated) root of `site`."""
+    roots = Q()
+    for root in _root_paths(site):
+        roots |= Q(url_path__startswith=root.root_path)
+    if not roots:
+        return Page.objects.none()
+    return Page.objects.live().public().filter(roots)
+
+
+def _section_filter(section):
+    if section == 'pages':
+        return ~Q(content_type__app_label__in=SECTION_APPS.values())
+    return Q(content_type__app_label=SECTION_APPS[section])
+
+
+def used_images():
+    """Images referenced by at least one page (via Wagtail's reference index)."""
+    image_model = get_image_model()
+    referenced = (
+        ReferenceIndex.objects.filter(
+            to_content_type=ContentType.objects.get_for_model(image_model),
+            base_content_type=ContentType.objects.get_for_model(Page),
+        )
+        .annotate(image_id=Cast('to_object_id', IntegerField()))
+        .values('image_id')
+    )
+    return image_model.objects.filter(pk__in=referenced)
+
+
+def section_stats(site):
+    """[(section, language_code or None, url count, lastmod)] from two aggregate queries."""
+    app_sections = {app_label: section for section, app_label in SECTION_APPS.items()}
+    stats = {}
+    rows = (
+        site_pages(site)
+        .values('content_type__app_label', 'locale__language_code')
+        .annotate(count=Count('pk'), lastmod=Max('last_published_at'))
+    )
+    for row in rows:
+        key = (app_sections.get(row['content_type__app_label'], 'pages'), row['locale__language_code'])
+        count, lastmod = stats.get(key, (0, None))
+        if row['lastmod'] and (lastmod is None or row['lastmod'] > lastmod):
+            lastmod = row['lastmod']
+        stats[key] = (count + row['count'], lastmod)
+
+    result = [(section, language, count, lastmod) for (section, language), (count, lastmod) in sorted(stats.items())]
+
+    images = used_images().aggregate(count=Count('pk'), lastmod=Max('created_at'))
+    if images['count']:
+        result.append((IMAGE_SECTION, None, images['count'], images['lastmod']))
+    return result
+
+
+def page_entries(site, section, language, page_number):
+    """(path, lastmod) for one chunk of a section/locale, in tree order."""
+    root_paths = _root_paths(site)
+    offset = (page_number - 1) * SITEMAP_LIMIT
+    rows = (
+        site_pages(site)
+        .filter(_section_filter(section), locale__language_code=language)
+        .order_by('path')
+        .values_list('url_path', 'last_published_at')[offset:offset + SITEMAP_LIMIT]
+    )
+    for url_path, lastmod in rows.iterator(chunk_size=SITEMAP_CHUNK_SIZE):
+        # Override per row: a generator must not leave the language switched while suspended
+        with translation.override(language):
+            path = page_path(url_path, language, root_paths)
+        if path:
+            yield path, lastmod
+
+
+def page_path(url_path, language, root_paths):
+    """Relative URL for a page's url_path, matching Page.get_url_parts() for i18n sites."""
+    candidates = [root for root in root_paths if url_path.startswith(root.root_path)]
+    if not candidates:
+        return None
+    root = next((r for r in candidates if r.language_code == language), candidates[0])
+    try:
+        return reverse('wagtail_serve', args=(url_path[len(root.root_path):],))
+    except NoReverseMatch:
+        return None
+
+
+def image_entries(page_number):
+    image_model = get_image_model()
+    storage = image_model._meta.get_field('file').storage
+    offset = (page_number - 1) * SITEMAP_LIMIT
+    rows = used_images().order_by('pk').values_list('file', 'created_at')[offset:offset + SITEMAP_LIMIT]
+    for name, created_at in rows.iterator(chunk_size=SITEMAP_CHUNK_SIZE):
+        yield storage.url(name), created_at
+
+
+# ──────────────────────────── XML ────────────────────────────
+
+def _absolute(base_url, location):
+    return location if location.startswith(('http://', 'https://')) else f"{base_url}{location}"
+
+
+def render_urlset(base_url, entries, changefreq, priority):
+    """Yield the <urlset> document in chunks of SITEMAP_CHUNK_SIZE URLs."""
+    yield URLSET_OPEN
+    entries = iter(entries)
+    while chunk := list(islice(entries, SITEMAP_CHUNK_SIZE)):
+        yield ''.join(
+            f"<url><loc>{escape(_absolute(base_url, location))}</loc>"
+            + (f"<lastmod>{lastmod.date().isoformat()}</lastmod>" if lastmod else '')
+            + f"<changefreq>{changefreq}</changefreq><priority>{priority}</priority></url>\n"
+            for location, lastmod in chunk
+        )
+    yield URLSET_CLOSE
+
+
+def render_index(base_url, stats):
+    yield INDEX_OPEN
+    for section, language, count, lastmod in stats:
+        name = f"{section}-{language}" if language else section
+        pages = (count - 1) // SITEMAP_LIMIT + 1
+        for page_number in range(1, pages + 1):
+            location = f"{base_url}/sitemap-{name}.xml" + (f"?p={page_number}" if page_number > 1 else '')
+            yield (
+                f"<sitemap><loc>{escape(location)}</loc>"
+                + (f"<lastmod>{lastmod.date().isoformat()}</lastmod>" if lastmod else '')
+                + "</sitemap>\n"
+            )
+    yield INDEX_CLOSE
+
+
+# ──────────────────────────── Views ────────────────────────────
+
+def cached_xml_response(key, chunks):
+    """Serve `key` from the cache, or stream `chunks()` and cache the full document afterwards."""
+    content = cache.get(key)
+    if content is not None:
+        return HttpResponse(content, content_type=XML_CONTENT_TYPE)
+
+    def stream():
+        parts = []
+        for chunk in chunks():
+            parts.append(chunk)
+            yield chunk
+        cache.set(key, ''.join(parts), SITEMAP_CACHE_TIMEOUT)
+        logger.debug(f"Cached sitemap {key}")
+
+    return StreamingHttpResponse(stream(), content_type=XML_CONTENT_TYPE)
 
 
-class PageSitemap(Sitemap):
-    changefreq = "weekly"
-    priority = 0.9
+def _site_and_base(request):
+    site = Site.find_for_request(request)
+    if site is None:
+        raise Http404("No site")
+    return site, f"{request.scheme}://{request.get_host()}"
 
-    def items(self):
-        return Page.objects.live().public()
 
-    def location(self, obj):
-        # This is the ONLY way that works reliably in sitemap context
-        return obj.relative_url(Site.objects.get_current())
+def sitemap_index(request):
+    site, base_url = _site_and_base(request)
+    return cached_xml_response(
+        _cache_key(request, 'index'),
+        lambda: render_index(base_url, section_stats(site)),
+    )
 
-    def lastmod(self, obj):
-        return obj.last_published_at
 
+def sitemap_section(request, section, language=None):
+    site, base_url = _site_and_base(request)
+    try:
+        page_number = max(1, int(request.GET.get('p', 1)))
+    except ValueError:
+        raise Http404("Invalid page")
 
-class ImageSitemap(Sitemap):
-    changefreq = "monthly"
-    priority = 0.7
+    if section == IMAGE_SECTION and language is None:
+        entries = lambda: image_entries(page_number)
+    elif section in PAGE_SECTIONS and language in dict(settings.WAGTAIL_CONTENT_LANGUAGES):
+        entries = lambda: page_entries(site, section, language, page_number)
+    else:
+        raise Http404("Unknown sitemap section")
 
-    def items(self):
-        return get_image_model().objects.all()
+    changefreq, priority = SECTION_SETTINGS[section]
+    return cached_xml_response(
+        _cache_key(request, f"{section}_{language}_{page_number}"),
+        lambda: render_urlset(base_url, entries(), changefreq, priority),
+    )
 
-    def location(self, obj):
-        # Images don't have relative_url() → use the file URL directly
-        return obj.file.url  # This is already absolute: /media/images/photo.jpg
\ No newline at end of file
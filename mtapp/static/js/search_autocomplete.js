@@ -0,0 +1,54 @@
+// Search-as-you-type for the search bar: fills a <datalist> from /search/autocomplete/
+// and jumps straight to the page when a suggestion is picked from the list (or Enter is
+// pressed on one). Typing a suggestion's text doesn't navigate: it may be the start of a
+// longer query.
+document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('input[data-autocomplete-url]').forEach((input) => {
+        const list = document.getElementById(input.getAttribute('list'));
+        const urls = new Map();
+        let timer = null;
+        let controller = null;
+
+        // Picking a datalist option fires an input event that isn't typing: an InputEvent with
+        // inputType "insertReplacementText", or a plain Event in browsers without one
+        const isPick = (event) => !(event instanceof InputEvent) || event.inputType === 'insertReplacementText';
+
+        input.addEventListener('keydown', (event) => {
+            const query = input.value.trim();
+            if (event.key === 'Enter' && urls.has(query)) {
+                event.preventDefault();
+                window.location.href = urls.get(query);
+            }
+        });
+
+        input.addEventListener('input', (event) => {
+            const query = input.value.trim();
+            if (isPick(event) && urls.has(query)) {
+                window.location.href = urls.get(query);
+                return;
+            }
+            clearTimeout(timer);
+            if (!query) {
+                list.innerHTML = '';
+                return;
+            }
+            timer = setTimeout(() => {
+                if (controller) controller.abort();
+                controller = new AbortController();
+                fetch(`${input.dataset.autocompleteUrl}?q=${encodeURIComponent(query)}`, { signal: controller.signal })
+                    .then((response) => response.json())
+                    .then((data) => {
+                        list.innerHTML = '';
+                        urls.clear();
+                        data.results.forEach((result) => {
+                            const option = document.createElement('option');
+                            option.value = result.label;
+                            urls.set(result.label, result.url);
+                            list.appendChild(option);
+                        });
+                    })
+                    .catch(() => {});
+            }, 120);
+        });
+    });
+});
@@ -10,26 +10,25 @@ from wagtail import urls as wagtail_urls
 from wagtail.admin import urls as wagtailadmin_urls
 from wagtail.documents import urls as wagtaildocs_urls
 
-from django.contrib.sitemaps.views import sitemap
 from .views import RobotsView
-from .sitemaps import ImageSitemap, PageSitemap
+from .sitemaps import sitemap_index, sitemap_section
 from search import views as search_views
 from accounts.views import captcha_refresh
-from bookings.api_views import AvailableDatesView
+from bookings.api_views import AvailableDatesView, BatchQuoteView
 from .api import api_router
-sitemaps = {
-    'pages': PageSitemap(),
-    'images': ImageSitemap(),
-}
+from .instrumentation import metrics_view
 
 # NON-LOCALIZED BUT TRANSLATABLE URLS
 urlpatterns = [
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django_sitemap'),
+    path('sitemap.xml', sitemap_index, name='django_sitemap'),
+    re_path(r'^sitemap-(?P<section>[a-z]+)(?:-(?P<language>[a-z]{2}(?:-[a-z]+)?))?\.xml$', sitemap_section, name='sitemap_section'),
     path("django-admin/", admin.site.urls),
     path("admin/", include(wagtailadmin_urls)),
     path('robots.txt', RobotsView.as_view(), name='robots'),
+    path('metrics', metrics_view, name='metrics'),
     path("documents/", include(wagtaildocs_urls)),
     path('api/available-dates/', AvailableDatesView.as_view(), name='available_dates_api'),
+    path('api/quotes/', BatchQuoteView.as_view(), name='batch_quote_api'),
     path("notifications/", include('notifications.urls'), name='notifications'),
     path('routify/', include('routify.urls')),
     
@@ -47,6 +46,7 @@ urlpatterns += i18n_patterns(
     path('accommodations/', include('accommodation.urls')),
     path('i18n/', include('django.conf.urls.i18n')),
     path("search/", search_views.search, name="search"),
+    path("search/autocomplete/", search_views.autocomplete, name="search_autocomplete"),
     path('profile/', include('profiles.urls')),
     path('accounts/', include('accounts.urls')),
     path("", include("allauth.urls")),
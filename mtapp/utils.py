@@ -3,7 +3,6 @@ import string
 import os
 import logging
 from django.conf import settings
-import fitz
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +15,9 @@ def generate_code_id(prefix):
 
 def convert_pdf_to_images(pdf_path, output_dir, tour_id):
     """Convert PDF pages to PNG images for carousel display."""
+    # PyMuPDF is only needed when a PDF is uploaded; every tour model imports this module
+    import fitz
+
     try:
         logger.debug(f"Converting PDF: {pdf_path}, Output: {output_dir}, Tour ID: {tour_id}")
         # Check PDF accessibility
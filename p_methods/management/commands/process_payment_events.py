@@ -0,0 +1,23 @@
+# p_methods/management/commands/process_payment_events.py
+
+from django.core.management.base import BaseCommand
+
+from p_methods.payments import MAX_EVENT_ATTEMPTS, pending_events, process_event
+
+
+class Command(BaseCommand):
+    help = f"Apply payment events that are still unprocessed (up to {MAX_EVENT_ATTEMPTS} attempts each)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100, help='Maximum number of events to process')
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+        for event in pending_events(options['limit']):
+            if process_event(event):
+                processed += 1
+            else:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f"   {event.event_id} ({event.event_type}) not processed"))
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} payment events, {failed} still pending"))
@@ -0,0 +1,72 @@
+# p_methods/management/commands/reconcile_payments.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from p_methods.models import PaymentCapture
+from p_methods.payments import STATUS_EVENT_TYPES, order_summary, process_event, record_event
+from p_methods.paypal_api import PayPalAPIError, get_paypal_api
+
+
+class Command(BaseCommand):
+    help = "Compare recent PayPal captures with PayPal and apply any status the webhooks missed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Only captures created in the last N days')
+        parser.add_argument('--batch-size', type=int, default=50, help='Captures loaded per query')
+        parser.add_argument('--dry-run', action='store_true', help='Report mismatches without changing anything')
+
+    def handle(self, *args, **options):
+        api = get_paypal_api()
+        since = timezone.now() - timedelta(days=options['days'])
+        captures = PaymentCapture.objects.filter(created_at__gte=since).order_by('pk')
+
+        matched = fixed = errors = 0
+        last_pk = 0
+        while True:
+            batch = list(captures.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            reconciled = []
+            for capture in batch:
+                try:
+                    remote = order_summary(api.get_order(capture.order_id))
+                except PayPalAPIError as e:
+                    errors += 1
+                    self.stdout.write(self.style.WARNING(f"   {capture.order_id}: {e}"))
+                    continue
+
+                needs_fulfilment = remote['status'] == 'COMPLETED' and not capture.fulfilled_at
+                if remote['status'] == capture.status and not needs_fulfilment:
+                    matched += 1
+                    reconciled.append(capture.pk)
+                    continue
+                if remote['status'] not in STATUS_EVENT_TYPES:
+                    # Still pending at PayPal; look again on the next run
+                    continue
+
+                self.stdout.write(f"   {capture.order_id}: local {capture.status}, PayPal {remote['status']}")
+                if options['dry_run']:
+                    continue
+                event = record_event(
+                    event_id=f"reconcile-{capture.order_id}-{remote['status']}",
+                    source='reconcile',
+                    event_type=STATUS_EVENT_TYPES[remote['status']],
+                    resource_id=remote['capture_id'],
+                    order_id=capture.order_id,
+                    payload={**remote, 'amount': str(remote['amount']), 'local_status': capture.status},
+                )
+                if event and process_event(event):
+                    fixed += 1
+                    reconciled.append(capture.pk)
+
+            if reconciled and not options['dry_run']:
+                PaymentCapture.objects.filter(pk__in=reconciled).update(reconciled_at=timezone.now())
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled payments: {matched} matched, {fixed} fixed, {errors} could not be checked"
+        ))
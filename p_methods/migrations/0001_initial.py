@@ -0,0 +1,59 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('bookings', '0011_accommodationbooking_expires_at_proposal_expires_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=100, unique=True)),
+                ('source', models.CharField(choices=[('webhook', 'Webhook'), ('capture', 'Capture'), ('reconcile', 'Reconciliation')], max_length=20)),
+                ('event_type', models.CharField(max_length=64)),
+                ('resource_id', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('order_id', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('payload', models.JSONField(default=dict)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+            ],
+            options={
+                'ordering': ['received_at'],
+                'indexes': [models.Index(fields=['processed_at', 'received_at'], name='p_methods_p_process_6961bb_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PaymentCapture',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_id', models.CharField(max_length=64, unique=True)),
+                ('idempotency_key', models.CharField(help_text='Sent to PayPal as PayPal-Request-Id', max_length=100)),
+                ('capture_id', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('COMPLETED', 'Completed'), ('DECLINED', 'Declined'), ('REFUNDED', 'Refunded'), ('REVERSED', 'Reversed'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('currency', models.CharField(blank=True, max_length=3)),
+                ('fulfilled_at', models.DateTimeField(blank=True, null=True)),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('accommodation_booking', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payment_captures', to='bookings.accommodationbooking')),
+                ('booking', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payment_captures', to='bookings.booking')),
+                ('proposal', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payment_captures', to='bookings.proposal')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'fulfilled_at'], name='p_methods_p_status_435327_idx')],
+            },
+        ),
+    ]
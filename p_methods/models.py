@@ -0,0 +1,89 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from bookings.models import AccommodationBooking, Booking, Proposal
+
+
+class PaymentCapture(models.Model):
+    """
+    One row per PayPal order we capture. The unique order_id makes the capture path idempotent:
+    a retry or double click finds the existing row (and the booking it produced) instead of
+    capturing or fulfilling twice. Maintained by p_methods.payments.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', _('Pending')),
+        ('COMPLETED', _('Completed')),
+        ('DECLINED', _('Declined')),
+        ('REFUNDED', _('Refunded')),
+        ('REVERSED', _('Reversed')),
+        ('FAILED', _('Failed')),
+    ]
+
+    order_id = models.CharField(max_length=64, unique=True)
+    idempotency_key = models.CharField(max_length=100, help_text=_("Sent to PayPal as PayPal-Request-Id"))
+    capture_id = models.CharField(max_length=64, blank=True, db_index=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    currency = models.CharField(max_length=3, blank=True)
+
+    proposal = models.ForeignKey(Proposal, null=True, blank=True, on_delete=models.SET_NULL, related_name='payment_captures')
+    accommodation_booking = models.ForeignKey(
+        AccommodationBooking, null=True, blank=True, on_delete=models.SET_NULL, related_name='payment_captures'
+    )
+    booking = models.ForeignKey(Booking, null=True, blank=True, on_delete=models.SET_NULL, related_name='payment_captures')
+
+    fulfilled_at = models.DateTimeField(null=True, blank=True)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'fulfilled_at']),
+        ]
+
+    def __str__(self):
+        return f"PayPal order {self.order_id} ({self.status})"
+
+
+class PaymentEvent(models.Model):
+    """
+    Append-only log of payment events: PayPal webhooks, our own captures and reconciliation
+    findings. Rows are never updated through save() or deleted; only the processing columns
+    change, via queryset updates in p_methods.payments.
+    """
+    SOURCE_CHOICES = [
+        ('webhook', _('Webhook')),
+        ('capture', _('Capture')),
+        ('reconcile', _('Reconciliation')),
+    ]
+
+    event_id = models.CharField(max_length=100, unique=True)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    event_type = models.CharField(max_length=64)
+    resource_id = models.CharField(max_length=64, blank=True, db_index=True)
+    order_id = models.CharField(max_length=64, blank=True, db_index=True)
+    payload = models.JSONField(default=dict)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['received_at']
+        indexes = [
+            models.Index(fields=['processed_at', 'received_at']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Payment events are append-only")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Payment events are append-only")
+
+    def __str__(self):
+        return f"{self.event_type} {self.resource_id} ({self.source})"
@@ -0,0 +1,347 @@
+"""
+Idempotent PayPal capture, the payment event log and event processing.
+
+Capture (PayPalOrdersCaptureView):
+    start_capture(order_id, key, ...)  the PaymentCapture row for an order, created once
+    record_capture(capture, order)     store PayPal's capture result and log a 'capture' event
+    fulfil_capture(capture)            mark the proposal/booking paid and create the Booking, once
+
+Retries and double clicks hit the unique order_id: a completed capture is answered from the
+database without calling PayPal, and an unfinished one is re-sent with the same
+PayPal-Request-Id, which PayPal de-duplicates. Fulfilment locks the capture row, so concurrent
+requests and webhooks cannot create two bookings. A capture whose amount or currency differs
+from the price checkout charged (estimated_price / total_price in CHECKOUT_CURRENCY) is not
+fulfilled: it raises PaymentMismatch and is logged as a 'CAPTURE.AMOUNT_MISMATCH' event.
+
+Events (PayPalWebhookView, reconcile_payments):
+    record_event(...)       append to PaymentEvent; a repeated event id is ignored
+    dispatch_event(event)   process after commit, in a background thread unless PAYMENTS_ASYNC=False
+    process_event(event)    apply one event; failures are kept for process_payment_events to retry
+"""
+from decimal import Decimal, InvalidOperation
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+
+from bookings.models import AccommodationBooking, Booking, Proposal
+from p_methods.models import PaymentCapture, PaymentEvent
+
+logger = logging.getLogger(__name__)
+
+MAX_EVENT_ATTEMPTS = 5
+
+# PayPalCheckoutView charges every order in this currency
+CHECKOUT_CURRENCY = 'USD'
+
+# Webhook / reconciliation event type -> PaymentCapture.status
+EVENT_STATUSES = {
+    'PAYMENT.CAPTURE.COMPLETED': 'COMPLETED',
+    'CHECKOUT.ORDER.COMPLETED': 'COMPLETED',
+    'PAYMENT.CAPTURE.DENIED': 'DECLINED',
+    'PAYMENT.CAPTURE.DECLINED': 'DECLINED',
+    'PAYMENT.CAPTURE.REFUNDED': 'REFUNDED',
+    'PAYMENT.CAPTURE.REVERSED': 'REVERSED',
+}
+STATUS_EVENT_TYPES = {
+    'COMPLETED': 'PAYMENT.CAPTURE.COMPLETED',
+    'DECLINED': 'PAYMENT.CAPTURE.DENIED',
+    'REFUNDED': 'PAYMENT.CAPTURE.REFUNDED',
+    'REVERSED': 'PAYMENT.CAPTURE.REVERSED',
+}
+
+
+class PaymentEventPending(Exception):
+    """The event refers to an order we have not recorded yet; it is retried later."""
+
+
+class PaymentMismatch(Exception):
+    """The captured amount or currency is not what the proposal or booking costs."""
+
+
+# ──────────────────────────── PayPal payloads ────────────────────────────
+
+def order_summary(order):
+    """{'status', 'capture_id', 'amount', 'currency'} from a PayPal order dict."""
+    captures = [
+        capture
+        for unit in order.get('purchase_units') or []
+        for capture in ((unit.get('payments') or {}).get('captures') or [])
+    ]
+    capture = captures[0] if captures else {}
+    amount = capture.get('amount') or {}
+    try:
+        value = Decimal(str(amount['value'])) if amount.get('value') is not None else None
+    except InvalidOperation:
+        value = None
+
+    status = capture.get('status') or order.get('status')
+    if status == 'PARTIALLY_REFUNDED':
+        status = 'COMPLETED'
+    return {
+        'status': status if status in dict(PaymentCapture.STATUS_CHOICES) else 'PENDING',
+        'capture_id': capture.get('id', ''),
+        'amount': value,
+        'currency': amount.get('currency_code', ''),
+    }
+
+
+def _event_amount(event):
+    """(amount, currency) carried by a recorded event, (None, '') when it has none."""
+    payload = event.payload or {}
+    if event.source == 'reconcile':
+        value, currency = payload.get('amount'), payload.get('currency', '')
+    elif event.event_type.startswith('CHECKOUT.ORDER'):
+        summary = order_summary(payload.get('resource') or {})
+        value, currency = summary['amount'], summary['currency']
+    else:
+        amount = (payload.get('resource') or {}).get('amount') or {}
+        value, currency = amount.get('value'), amount.get('currency_code', '')
+    try:
+        return Decimal(str(value)), currency
+    except InvalidOperation:
+        return None, ''
+
+
+def _event_order_id(event):
+    resource = event.get('resource') or {}
+    related = (resource.get('supplementary_data') or {}).get('related_ids') or {}
+    if related.get('order_id'):
+        return related['order_id']
+    return resource.get('id', '') if event.get('event_type', '').startswith('CHECKOUT.ORDER') else ''
+
+
+# ──────────────────────────── Capture ────────────────────────────
+
+def start_capture(order_id, idempotency_key, proposal=None, accommodation_booking=None):
+    capture, created = PaymentCapture.objects.get_or_create(
+        order_id=order_id,
+        defaults={
+            'idempotency_key': idempotency_key,
+            'proposal': proposal,
+            'accommodation_booking': accommodation_booking,
+        },
+    )
+    if created:
+        logger.info(f"Started capture for PayPal order {order_id}")
+    return capture
+
+
+def record_capture(capture, order):
+    """Store the capture result from PayPal (an order dict) and log it as a processed event."""
+    summary = order_summary(order)
+    capture.status = summary['status']
+    capture.capture_id = summary['capture_id']
+    capture.amount = summary['amount']
+    capture.currency = summary['currency']
+    capture.save(update_fields=['status', 'capture_id', 'amount', 'currency', 'updated_at'])
+
+    record_event(
+        event_id=f"capture-{capture.order_id}-{capture.status}",
+        source='capture',
+        event_type=STATUS_EVENT_TYPES.get(capture.status, f"CAPTURE.{capture.status}"),
+        resource_id=capture.capture_id,
+        order_id=capture.order_id,
+        payload={'id': order.get('id'), 'status': order.get('status'), 'capture': {**summary, 'amount': str(summary['amount'])}},
+        processed=True,
+    )
+    # Webhooks that arrived before this row existed can be applied now
+    for event in PaymentEvent.objects.filter(order_id=capture.order_id, processed_at__isnull=True):
+        dispatch_event(event)
+    return capture
+
+
+def _booking_from_proposal(proposal):
+    tour_page = proposal.tour
+    if not tour_page:
+        raise ValueError("Proposal missing linked tour page")
+    return Booking.objects.create(
+        proposal=proposal,
+        travel_date=proposal.travel_date,
+        number_of_adults=proposal.number_of_adults,
+        number_of_children=proposal.number_of_children or 0,
+        number_of_infants=proposal.number_of_infants or 0,
+        children_ages=proposal.children_ages or [],
+        customer_name=proposal.customer_name,
+        customer_email=proposal.customer_email,
+        customer_phone=proposal.customer_phone or '',
+        nationality=proposal.nationality or '',
+        customer_address=proposal.customer_address or '',
+        notes=proposal.notes or '',
+        total_price=proposal.estimated_price,
+        status='PAID',
+        content_type=ContentType.objects.get_for_model(tour_page),
+        object_id=tour_page.id,
+    )
+
+
+def _amount_mismatch(capture, price):
+    """Why `capture` does not pay `price` (in CHECKOUT_CURRENCY), or None when it does."""
+    expected = price.quantize(Decimal('0.01')) if price is not None else None
+    if expected is not None and capture.amount == expected and capture.currency == CHECKOUT_CURRENCY:
+        return None
+    return f"captured {capture.amount} {capture.currency or '-'}, expected {expected} {CHECKOUT_CURRENCY}"
+
+
+def fulfil_capture(capture):
+    """
+    Apply a completed capture to its proposal or accommodation booking exactly once. Raises
+    PaymentMismatch, leaving both unpaid, when the capture does not cover the price.
+    """
+    with transaction.atomic():
+        capture = PaymentCapture.objects.select_for_update().get(pk=capture.pk)
+        if capture.fulfilled_at or capture.status != 'COMPLETED':
+            return capture
+
+        mismatch = None
+        if capture.proposal_id:
+            proposal = Proposal.objects.select_for_update().get(pk=capture.proposal_id)
+            mismatch = _amount_mismatch(capture, proposal.estimated_price)
+            if not mismatch:
+                if proposal.status != 'PAID':
+                    proposal.status = 'PAID'
+                    proposal.save(update_fields=['status'])
+                booking = Booking.objects.filter(proposal=proposal).first()
+                if booking is None:
+                    booking = _booking_from_proposal(proposal)
+                    logger.info(f"Created Booking {booking.id} from paid Proposal {proposal.id}")
+                capture.booking = booking
+
+        elif capture.accommodation_booking_id:
+            acc_booking = AccommodationBooking.objects.select_for_update().get(pk=capture.accommodation_booking_id)
+            mismatch = _amount_mismatch(capture, acc_booking.total_price)
+            if not mismatch and acc_booking.status == 'PENDING_PAYMENT':
+                acc_booking.status = 'PAID'
+                acc_booking.paid_at = timezone.now()
+                acc_booking.save(update_fields=['status', 'paid_at'])
+                transaction.on_commit(lambda: _send_accommodation_email(acc_booking))
+
+        if not mismatch:
+            capture.fulfilled_at = timezone.now()
+            capture.save(update_fields=['booking', 'fulfilled_at', 'updated_at'])
+            return capture
+
+    logger.error(f"PayPal order {capture.order_id} not fulfilled: {mismatch}")
+    record_event(
+        event_id=f"mismatch-{capture.order_id}",
+        source='capture',
+        event_type='CAPTURE.AMOUNT_MISMATCH',
+        resource_id=capture.capture_id,
+        order_id=capture.order_id,
+        payload={'amount': str(capture.amount), 'currency': capture.currency},
+        processed=True,
+        error=mismatch,
+    )
+    raise PaymentMismatch(mismatch)
+
+
+def _send_accommodation_email(acc_booking):
+    from bookings.utils.emails import send_accommodation_booking_email
+    try:
+        send_accommodation_booking_email(acc_booking)
+    except Exception as e:
+        logger.error(f"Accommodation payment email failed for booking {acc_booking.id}: {e}")
+
+
+def success_url(capture):
+    if capture.proposal_id:
+        return reverse('bookings:payment_success', args=[capture.proposal_id])
+    if capture.accommodation_booking_id:
+        return reverse('bookings:payment_success', args=[capture.accommodation_booking_id])
+    return None
+
+
+# ──────────────────────────── Events ────────────────────────────
+
+def record_event(event_id, source, event_type, payload, resource_id='', order_id='', processed=False, error=''):
+    """Append an event; returns None when `event_id` was already recorded."""
+    try:
+        with transaction.atomic():
+            return PaymentEvent.objects.create(
+                event_id=event_id,
+                source=source,
+                event_type=event_type,
+                resource_id=resource_id or '',
+                order_id=order_id or '',
+                payload=payload,
+                processed_at=timezone.now() if processed else None,
+                error=error,
+            )
+    except IntegrityError:
+        logger.debug(f"Duplicate payment event {event_id} ignored")
+        return None
+
+
+def record_webhook(event):
+    resource = event.get('resource') or {}
+    return record_event(
+        event_id=event['id'],
+        source='webhook',
+        event_type=event['event_type'],
+        resource_id=resource.get('id', ''),
+        order_id=_event_order_id(event),
+        payload=event,
+    )
+
+
+def process_event(event):
+    """Apply one unprocessed event to its PaymentCapture; returns True once processed."""
+    try:
+        status = EVENT_STATUSES.get(event.event_type)
+        if status:
+            capture = PaymentCapture.objects.filter(order_id=event.order_id).first() if event.order_id else None
+            if capture is None and event.resource_id:
+                capture = PaymentCapture.objects.filter(capture_id=event.resource_id).first()
+            if capture is None:
+                raise PaymentEventPending(f"No capture recorded for order {event.order_id or event.resource_id}")
+
+            if capture.status != status:
+                changes = {'status': status}
+                if capture.amount is None:
+                    # The capture response never got recorded; take the amount from the event
+                    changes['amount'], changes['currency'] = _event_amount(event)
+                PaymentCapture.objects.filter(pk=capture.pk).update(updated_at=timezone.now(), **changes)
+                for field, value in changes.items():
+                    setattr(capture, field, value)
+                logger.info(f"PayPal order {capture.order_id} is now {status} ({event.source} {event.event_type})")
+            if status == 'COMPLETED':
+                fulfil_capture(capture)
+    except Exception as e:
+        log = logger.info if isinstance(e, PaymentEventPending) else logger.error
+        log(f"Payment event {event.event_id} not processed: {e}")
+        PaymentEvent.objects.filter(pk=event.pk).update(attempts=F('attempts') + 1, error=str(e))
+        return False
+
+    PaymentEvent.objects.filter(pk=event.pk).update(
+        processed_at=timezone.now(), attempts=F('attempts') + 1, error=''
+    )
+    return True
+
+
+def _process_in_thread(event_id):
+    try:
+        event = PaymentEvent.objects.filter(pk=event_id, processed_at__isnull=True).first()
+        if event:
+            process_event(event)
+    finally:
+        connection.close()
+
+
+def dispatch_event(event):
+    """Process `event` once the current transaction commits, off the request thread by default."""
+    def run():
+        if getattr(settings, 'PAYMENTS_ASYNC', True):
+            threading.Thread(target=_process_in_thread, args=(event.pk,), daemon=True).start()
+        else:
+            process_event(event)
+
+    transaction.on_commit(run)
+
+
+def pending_events(limit=100):
+    return PaymentEvent.objects.filter(processed_at__isnull=True, attempts__lt=MAX_EVENT_ATTEMPTS)[:limit]
@@ -0,0 +1,292 @@
+"""
+Everything that talks to PayPal from the server: one lazily built, pooled checkout SDK client,
+the OAuth access token and JS SDK client token shared by all workers, and the few REST calls
+the payment pipeline needs outside the SDK.
+
+    get_sdk_client()                         PaypalServersdkClient, built on first use
+    get_access_token()                       OAuth access token (cached, refreshed early)
+    get_client_token()                       JS SDK client token and its remaining lifetime
+    get_paypal_api()                         REST backend named by settings.PAYPAL_API_BACKEND
+        .get_order(order_id)                     order as a dict (status, purchase_units, ...)
+        .verify_webhook_signature(headers, event) True when PayPal vouches for a webhook delivery
+
+Tokens live in the shared cache (mtapp.cache_versions.shared_cache, the SHARED_CACHE_ALIAS
+backend) with their expiry and are refreshed PAYPAL_TOKEN_REFRESH_MARGIN seconds before PayPal
+expires them; a short lock in the same cache lets one worker refresh while the others keep using
+the current token. Every upstream call is timed into the `paypal_upstream_seconds`
+histogram (mtapp.metrics). Request and response bodies are only logged when
+settings.PAYPAL_LOG_BODIES is on.
+
+LocalPayPalAPI is a stand-in for tests, development and reconciliation dry runs: it answers
+from a JSON file (settings.PAYPAL_API_FIXTURES, {"orders": {"<order id>": {...}}}) and accepts
+every webhook.
+"""
+import json
+import logging
+import re
+import threading
+import time
+
+from decouple import config
+from django.conf import settings
+from django.utils.module_loading import import_string
+import requests
+from requests.adapters import HTTPAdapter
+
+from mtapp.cache_versions import shared_cache
+from mtapp.metrics import observe, timed
+
+logger = logging.getLogger(__name__)
+
+PAYPAL_API_URL = getattr(settings, 'PAYPAL_API_URL', 'https://api-m.sandbox.paypal.com')
+PAYPAL_TIMEOUT = 15
+PAYPAL_POOL_SIZE = 10
+PAYPAL_TOKEN_REFRESH_MARGIN = getattr(settings, 'PAYPAL_TOKEN_REFRESH_MARGIN', 300)
+PAYPAL_TOKEN_LOCK_TIMEOUT = PAYPAL_TIMEOUT + 5
+ACCESS_TOKEN_CACHE_KEY = 'paypal_rest_access_token'
+CLIENT_TOKEN_CACHE_KEY = 'paypal_client_token'
+UPSTREAM_METRIC = 'paypal_upstream_seconds'
+
+_ID_SEGMENT = re.compile(r'/[A-Z0-9-]{12,}(?=/|$)')
+
+
+class PayPalAPIError(Exception):
+    pass
+
+
+def _operation(method, url):
+    """'GET /v2/checkout/orders/{id}' from a request URL, so order ids don't become labels."""
+    path = url.split('://', 1)[-1].partition('/')[2].partition('?')[0]
+    return f"{method} {_ID_SEGMENT.sub('/{id}', '/' + path)}"
+
+
+# ──────────────────────────── Pooled session ────────────────────────────
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """The process-wide pooled session for REST and token calls (created on first use)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=PAYPAL_POOL_SIZE)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+def _post(url, **kwargs):
+    with timed(UPSTREAM_METRIC, operation=_operation('POST', url), status='error') as labels:
+        resp = get_session().post(url, timeout=PAYPAL_TIMEOUT, **kwargs)
+        labels['status'] = resp.status_code
+    return resp
+
+
+# ──────────────────────────── Shared tokens ────────────────────────────
+
+def _cached_token(key, fetch):
+    """
+    {'token', 'expires_at'} from the cache, refreshed by `fetch` (which returns the token and
+    its lifetime in seconds) once it is within PAYPAL_TOKEN_REFRESH_MARGIN of expiring.
+    """
+    cache = shared_cache()
+    cached = cache.get(key)
+    now = time.time()
+    if cached and cached['expires_at'] - now > PAYPAL_TOKEN_REFRESH_MARGIN:
+        return cached
+
+    lock_key = f"{key}_lock"
+    locked = cache.add(lock_key, 1, PAYPAL_TOKEN_LOCK_TIMEOUT)
+    if not locked and cached and cached['expires_at'] > now:
+        # Another worker is refreshing; the current token is still good until it has
+        return cached
+
+    try:
+        token, expires_in = fetch()
+        cached = {'token': token, 'expires_at': now + expires_in}
+        cache.set(key, cached, expires_in)
+        logger.info(f"Refreshed {key} (expires in {expires_in}s)")
+        return cached
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def _fetch_access_token():
+    try:
+        resp = _post(
+            f"{PAYPAL_API_URL}/v1/oauth2/token",
+            auth=(config("PAYPAL_CLIENT_ID"), config("PAYPAL_CLIENT_SECRET")),
+            data={'grant_type': 'client_credentials'},
+        )
+        resp.raise_for_status()
+        data = resp.json()
+    except (requests.RequestException, ValueError) as e:
+        raise PayPalAPIError(f"PayPal token request failed: {e}")
+    return data['access_token'], int(data.get('expires_in', 3600))
+
+
+def _fetch_client_token():
+    try:
+        resp = _post(
+            f"{PAYPAL_API_URL}/v1/identity/generate-token",
+            auth=(config("PAYPAL_SANDBOX_CLIENT_ID"), config("PAYPAL_SANDBOX_CLIENT_SECRET")),
+            headers={'Accept': 'application/json'},
+            json={},  # empty body is required for basic client token
+        )
+        if resp.status_code != 200:
+            raise PayPalAPIError(f"PayPal error: {resp.text}")
+        data = resp.json()
+    except (requests.RequestException, ValueError) as e:
+        raise PayPalAPIError(f"PayPal client-token request failed: {e}")
+    return data['client_token'], int(data.get('expires_in', 32400))
+
+
+def get_access_token():
+    return _cached_token(ACCESS_TOKEN_CACHE_KEY, _fetch_access_token)['token']
+
+
+def get_client_token():
+    """(client_token, seconds until it expires) for the JS SDK."""
+    cached = _cached_token(CLIENT_TOKEN_CACHE_KEY, _fetch_client_token)
+    return cached['token'], int(cached['expires_at'] - time.time())
+
+
+# ──────────────────────────── Checkout SDK client ────────────────────────────
+
+class _LatencyCallBack:
+    """SDK http callback timing each call into UPSTREAM_METRIC (the client is shared by threads)."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def on_before_request(self, request):
+        self._local.started = time.perf_counter()
+        self._local.operation = _operation(str(request.http_method), request.query_url)
+
+    def on_after_response(self, http_response):
+        started = getattr(self._local, 'started', None)
+        if started is not None:
+            observe(UPSTREAM_METRIC, time.perf_counter() - started,
+                    operation=self._local.operation, status=http_response.status_code)
+            self._local.started = None
+
+
+def _sdk_token_provider(last_token, auth_manager):
+    from paypalserversdk.models.o_auth_token import OAuthToken
+
+    cached = _cached_token(ACCESS_TOKEN_CACHE_KEY, _fetch_access_token)
+    return OAuthToken(access_token=cached['token'], token_type='Bearer', expiry=int(cached['expires_at']))
+
+
+_sdk_client = None
+_sdk_client_lock = threading.Lock()
+
+
+def get_sdk_client():
+    """
+    The process-wide PaypalServersdkClient. Built on first use, so workers that never take a
+    payment don't import or configure the SDK; its HTTP session is reused across requests and
+    it takes its access token from the shared cache instead of fetching its own.
+    """
+    global _sdk_client
+    if _sdk_client is None:
+        with _sdk_client_lock:
+            if _sdk_client is None:
+                from paypalserversdk.http.auth.o_auth_2 import ClientCredentialsAuthCredentials
+                from paypalserversdk.logging.configuration.api_logging_configuration import (
+                    LoggingConfiguration, RequestLoggingConfiguration, ResponseLoggingConfiguration,
+                )
+                from paypalserversdk.paypal_serversdk_client import PaypalServersdkClient
+
+                log_bodies = getattr(settings, 'PAYPAL_LOG_BODIES', False)
+                _sdk_client = PaypalServersdkClient(
+                    client_credentials_auth_credentials=ClientCredentialsAuthCredentials(
+                        o_auth_client_id=config("PAYPAL_CLIENT_ID"),
+                        o_auth_client_secret=config("PAYPAL_CLIENT_SECRET"),
+                        o_auth_token_provider=_sdk_token_provider,
+                        o_auth_clock_skew=PAYPAL_TOKEN_REFRESH_MARGIN,
+                    ),
+                    http_call_back=_LatencyCallBack(),
+                    timeout=PAYPAL_TIMEOUT,
+                    logging_configuration=LoggingConfiguration(
+                        log_level=logging.INFO,
+                        mask_sensitive_headers=True,
+                        request_logging_config=RequestLoggingConfiguration(log_body=log_bodies),
+                        response_logging_config=ResponseLoggingConfiguration(log_body=log_bodies),
+                    ),
+                )
+    return _sdk_client
+
+
+def orders_controller():
+    return get_sdk_client().orders
+
+
+# ──────────────────────────── REST backends ────────────────────────────
+
+class PayPalAPI:
+    def _request(self, method, path, **kwargs):
+        url = f"{PAYPAL_API_URL}{path}"
+        try:
+            with timed(UPSTREAM_METRIC, operation=_operation(method, url), status='error') as labels:
+                resp = get_session().request(
+                    method,
+                    url,
+                    headers={'Authorization': f"Bearer {get_access_token()}", 'Content-Type': 'application/json'},
+                    timeout=PAYPAL_TIMEOUT,
+                    **kwargs,
+                )
+                labels['status'] = resp.status_code
+            resp.raise_for_status()
+            return resp.json()
+        except (requests.RequestException, ValueError) as e:
+            raise PayPalAPIError(f"PayPal {method} {path} failed: {e}")
+
+    def get_order(self, order_id):
+        return self._request('GET', f"/v2/checkout/orders/{order_id}")
+
+    def verify_webhook_signature(self, headers, event):
+        webhook_id = config("PAYPAL_WEBHOOK_ID", default='')
+        if not webhook_id:
+            logger.error("PAYPAL_WEBHOOK_ID is not configured; rejecting webhook")
+            return False
+        result = self._request('POST', '/v1/notifications/verify-webhook-signature', json={
+            'auth_algo': headers.get('PAYPAL-AUTH-ALGO'),
+            'cert_url': headers.get('PAYPAL-CERT-URL'),
+            'transmission_id': headers.get('PAYPAL-TRANSMISSION-ID'),
+            'transmission_sig': headers.get('PAYPAL-TRANSMISSION-SIG'),
+            'transmission_time': headers.get('PAYPAL-TRANSMISSION-TIME'),
+            'webhook_id': webhook_id,
+            'webhook_event': event,
+        })
+        return result.get('verification_status') == 'SUCCESS'
+
+
+class LocalPayPalAPI:
+    """Fixture-backed stand-in; unknown orders raise PayPalAPIError like a 404 would."""
+
+    def __init__(self, orders=None):
+        if orders is None:
+            path = getattr(settings, 'PAYPAL_API_FIXTURES', None)
+            orders = {}
+            if path:
+                with open(path, encoding='utf-8') as f:
+                    orders = json.load(f).get('orders', {})
+        self.orders = orders
+
+    def get_order(self, order_id):
+        if order_id not in self.orders:
+            raise PayPalAPIError(f"Order {order_id} not found")
+        return self.orders[order_id]
+
+    def verify_webhook_signature(self, headers, event):
+        return True
+
+
+def get_paypal_api():
+    return import_string(getattr(settings, 'PAYPAL_API_BACKEND', 'p_methods.paypal_api.PayPalAPI'))()
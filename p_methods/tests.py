@@ -0,0 +1,210 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+import json
+import os
+import tempfile
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from bookings.benchmarks.data import build
+from bookings.models import AccommodationBooking, Booking, Proposal
+from p_methods import payments
+from p_methods.models import PaymentCapture, PaymentEvent
+
+
+def _order(order_id, amount, currency='USD', status='COMPLETED'):
+    """A captured PayPal order as the Orders API returns it."""
+    return {
+        'id': order_id,
+        'status': status,
+        'purchase_units': [{'payments': {'captures': [{
+            'id': f"CAP-{order_id}",
+            'status': status,
+            'amount': {'value': amount, 'currency_code': currency},
+        }]}}],
+    }
+
+
+class PaymentTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fx = build(tours=3, accommodations=1, bookings=0)
+
+    def proposal(self, price='500.00'):
+        tour = self.fx.land_tour
+        return Proposal.objects.create(
+            customer_name="Guest",
+            customer_email="guest@example.com",
+            content_type=ContentType.objects.get_for_model(tour),
+            object_id=tour.pk,
+            travel_date=self.fx.travel_date,
+            estimated_price=Decimal(price),
+            status='SUPPLIER_CONFIRMED',
+        )
+
+    def accommodation_booking(self, price='200.00'):
+        page = self.fx.accommodations[0]
+        return AccommodationBooking.objects.create(
+            content_type=ContentType.objects.get_for_model(page),
+            object_id=page.pk,
+            check_in=self.fx.travel_date,
+            check_out=self.fx.travel_date + timedelta(days=2),
+            adults=2,
+            customer_name="Guest",
+            customer_email="guest@example.com",
+            total_price=Decimal(price),
+        )
+
+
+class CaptureTests(PaymentTestCase):
+    """start_capture / record_capture / fulfil_capture as PayPalOrdersCaptureView runs them."""
+
+    def test_capture_is_idempotent(self):
+        proposal = self.proposal()
+        capture = payments.start_capture('ORDER-1', 'key-1', proposal=proposal)
+        self.assertEqual(payments.start_capture('ORDER-1', 'key-2', proposal=proposal).pk, capture.pk)
+
+        payments.record_capture(capture, _order('ORDER-1', '500.00'))
+        payments.fulfil_capture(capture)
+        capture = payments.fulfil_capture(capture)
+
+        self.assertEqual(Booking.objects.filter(proposal=proposal).count(), 1)
+        self.assertEqual(capture.booking.proposal_id, proposal.pk)
+        proposal.refresh_from_db()
+        self.assertEqual(proposal.status, 'PAID')
+
+    def test_amount_mismatch_is_not_fulfilled(self):
+        acc_booking = self.accommodation_booking('200.00')
+        capture = payments.start_capture('ORDER-2', 'key', accommodation_booking=acc_booking)
+        payments.record_capture(capture, _order('ORDER-2', '150.00'))
+
+        with self.assertRaises(payments.PaymentMismatch):
+            payments.fulfil_capture(capture)
+
+        acc_booking.refresh_from_db()
+        capture.refresh_from_db()
+        self.assertEqual(acc_booking.status, 'PENDING_PAYMENT')
+        self.assertIsNone(capture.fulfilled_at)
+        event = PaymentEvent.objects.get(order_id='ORDER-2', event_type='CAPTURE.AMOUNT_MISMATCH')
+        self.assertIn('expected 200.00 USD', event.error)
+
+    def test_currency_mismatch_is_not_fulfilled(self):
+        proposal = self.proposal('500.00')
+        capture = payments.start_capture('ORDER-3', 'key', proposal=proposal)
+        payments.record_capture(capture, _order('ORDER-3', '500.00', currency='EUR'))
+
+        with self.assertRaises(payments.PaymentMismatch):
+            payments.fulfil_capture(capture)
+        self.assertFalse(Booking.objects.filter(proposal=proposal).exists())
+
+    def test_success_page_does_not_fulfil_a_mismatch(self):
+        acc_booking = self.accommodation_booking('200.00')
+        capture = payments.start_capture('ORDER-8', 'key', accommodation_booking=acc_booking)
+        payments.record_capture(capture, _order('ORDER-8', '150.00'))
+
+        response = self.client.get(reverse('bookings:payment_success', args=[acc_booking.pk]))
+
+        self.assertEqual(response.status_code, 404)
+        acc_booking.refresh_from_db()
+        self.assertEqual(acc_booking.status, 'PENDING_PAYMENT')
+        self.assertTrue(PaymentEvent.objects.filter(order_id='ORDER-8', event_type='CAPTURE.AMOUNT_MISMATCH').exists())
+
+
+@override_settings(PAYPAL_API_BACKEND='p_methods.paypal_api.LocalPayPalAPI', PAYMENTS_ASYNC=False)
+class WebhookTests(PaymentTestCase):
+
+    def event(self, order_id, amount):
+        return {
+            'id': f"WH-{order_id}",
+            'event_type': 'PAYMENT.CAPTURE.COMPLETED',
+            'resource': {
+                'id': f"CAP-{order_id}",
+                'status': 'COMPLETED',
+                'amount': {'value': amount, 'currency_code': 'USD'},
+                'supplementary_data': {'related_ids': {'order_id': order_id}},
+            },
+        }
+
+    def test_repeated_delivery_is_processed_once(self):
+        acc_booking = self.accommodation_booking('200.00')
+        payments.start_capture('ORDER-4', 'key', accommodation_booking=acc_booking)
+        event = self.event('ORDER-4', '200.00')
+
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse('p_methods:paypal_webhook'), json.dumps(event), content_type='application/json'
+                )
+            self.assertEqual(response.status_code, 200)
+
+        recorded = PaymentEvent.objects.get(event_id='WH-ORDER-4')
+        self.assertIsNotNone(recorded.processed_at)
+        self.assertEqual(recorded.attempts, 1)
+        capture = PaymentCapture.objects.get(order_id='ORDER-4')
+        self.assertEqual((capture.status, capture.amount), ('COMPLETED', Decimal('200.00')))
+        self.assertIsNotNone(capture.fulfilled_at)
+        acc_booking.refresh_from_db()
+        self.assertEqual(acc_booking.status, 'PAID')
+
+    def test_underpaid_webhook_is_not_fulfilled(self):
+        acc_booking = self.accommodation_booking('200.00')
+        payments.start_capture('ORDER-5', 'key', accommodation_booking=acc_booking)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('p_methods:paypal_webhook'), json.dumps(self.event('ORDER-5', '1.00')),
+                content_type='application/json',
+            )
+
+        acc_booking.refresh_from_db()
+        self.assertEqual(acc_booking.status, 'PENDING_PAYMENT')
+        self.assertIn('expected 200.00 USD', PaymentEvent.objects.get(event_id='WH-ORDER-5').error)
+        self.assertTrue(PaymentEvent.objects.filter(event_id='mismatch-ORDER-5').exists())
+
+
+class ReconcileTests(PaymentTestCase):
+    """reconcile_payments against LocalPayPalAPI fixtures."""
+
+    def reconcile(self, orders, *args):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'orders.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'orders': orders}, f)
+            with override_settings(
+                PAYPAL_API_BACKEND='p_methods.paypal_api.LocalPayPalAPI', PAYPAL_API_FIXTURES=path, PAYMENTS_ASYNC=False
+            ):
+                out = StringIO()
+                call_command('reconcile_payments', *args, stdout=out)
+        return out.getvalue()
+
+    def test_missed_completion_is_fulfilled(self):
+        proposal = self.proposal('500.00')
+        capture = payments.start_capture('ORDER-6', 'key', proposal=proposal)
+        payments.record_capture(capture, {'id': 'ORDER-6', 'status': 'PENDING'})
+
+        output = self.reconcile({'ORDER-6': _order('ORDER-6', '500.00')})
+
+        self.assertIn('1 fixed', output)
+        capture.refresh_from_db()
+        self.assertEqual(capture.status, 'COMPLETED')
+        self.assertIsNotNone(capture.fulfilled_at)
+        self.assertIsNotNone(capture.reconciled_at)
+        self.assertEqual(Booking.objects.filter(proposal=proposal).count(), 1)
+
+        self.assertIn('1 matched', self.reconcile({'ORDER-6': _order('ORDER-6', '500.00')}))
+
+    def test_dry_run_changes_nothing(self):
+        proposal = self.proposal('500.00')
+        capture = payments.start_capture('ORDER-7', 'key', proposal=proposal)
+        payments.record_capture(capture, {'id': 'ORDER-7', 'status': 'PENDING'})
+
+        self.reconcile({'ORDER-7': _order('ORDER-7', '500.00')}, '--dry-run')
+
+        capture.refresh_from_db()
+        self.assertEqual(capture.status, 'PENDING')
+        self.assertFalse(PaymentEvent.objects.filter(source='reconcile').exists())
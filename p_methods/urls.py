@@ -12,5 +12,6 @@ urlpatterns = [
     
     path('api/orders', views.PayPalOrdersCreateView.as_view(), name='paypal_orders_create'),
     path('api/orders/<str:order_id>/capture/', views.PayPalOrdersCaptureView.as_view(), name='paypal_orders_capture'),
+    path('api/webhooks/', views.PayPalWebhookView.as_view(), name='paypal_webhook'),
     path('api/client-token/', views.PayPalClientTokenView.as_view(), name='paypal_client_token'),
 ]
\ No newline at end of file
@@ -1,86 +1,50 @@
-import base64
 import json
 import logging
 from django.http import Http404, JsonResponse, HttpResponse
 from django.shortcuts import get_object_or_404, render
-from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import View
-from paypalserversdk.http.auth.o_auth_2 import ClientCredentialsAuthCredentials
-from paypalserversdk.logging.configuration.api_logging_configuration import LoggingConfiguration, RequestLoggingConfiguration, ResponseLoggingConfiguration
-from paypalserversdk.paypal_serversdk_client import PaypalServersdkClient
-
-from paypalserversdk.models.amount_breakdown import AmountBreakdown
-from paypalserversdk.models.amount_with_breakdown import AmountWithBreakdown
-from paypalserversdk.models.checkout_payment_intent import CheckoutPaymentIntent
-from paypalserversdk.models.order_request import OrderRequest
-from paypalserversdk.models.money import Money
-from paypalserversdk.models.item import Item
-from paypalserversdk.models.item_category import ItemCategory
-from paypalserversdk.models.purchase_unit_request import PurchaseUnitRequest
-from paypalserversdk.exceptions.error_exception import ErrorException
-import requests
+from django.views.decorators.csrf import csrf_exempt
 import urllib
-from bookings.models import AccommodationBooking, Booking, Proposal
+from bookings.models import AccommodationBooking, Proposal
 from decouple import config
+from p_methods import payments
+from p_methods.paypal_api import PayPalAPIError, get_client_token, get_paypal_api, orders_controller
 
 from decimal import Decimal, ROUND_HALF_UP
 
 logger = logging.getLogger(__name__)
 
-# PayPal Client (unchanged)
-client_credentials = ClientCredentialsAuthCredentials(
-    o_auth_client_id=config("PAYPAL_CLIENT_ID"),
-    o_auth_client_secret=config("PAYPAL_CLIENT_SECRET"),
-)
-paypal_client = PaypalServersdkClient(
-    client_credentials_auth_credentials=client_credentials,
-    logging_configuration=LoggingConfiguration(
-        log_level=logging.INFO,
-        mask_sensitive_headers=False,
-        request_logging_config=RequestLoggingConfiguration(log_headers=True, log_body=True),
-        response_logging_config=ResponseLoggingConfiguration(log_headers=True, log_body=True),
-    ),
-)
-orders_controller = paypal_client.orders
-payments_controller = paypal_client.payments
-
 class PayPalClientTokenView(View):
     def get(self, request):
-        client_id = config("PAYPAL_SANDBOX_CLIENT_ID")
-        client_secret = config("PAYPAL_SANDBOX_CLIENT_SECRET")
-
-        auth = base64.b64encode(f"{client_id}:{client_secret}".encode()).decode()
-
-        headers = {
-            "Authorization": f"Basic {auth}",
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-        }
-
-        response = requests.post(
-            "https://api-m.sandbox.paypal.com/v1/identity/generate-token",
-            headers=headers,
-            json={},  # empty body is required for basic client token
-            timeout=15
-        )
-
-        if response.status_code != 200:
-            logger.error(f"PayPal client-token request failed {response.status_code}: {response.text}")
-            return JsonResponse({"error": f"PayPal error: {response.text}"}, status=500)
+        # Client tokens last hours: every checkout page shares the cached one (see paypal_api.py)
+        try:
+            client_token, expires_in = get_client_token()
+        except PayPalAPIError as e:
+            logger.error(f"PayPal client-token request failed: {e}")
+            return JsonResponse({"error": str(e)}, status=500)
 
-        data = response.json()
         return JsonResponse({
-            "access_token": data["client_token"],  # keeps old integrations happy
-            "client_token": data["client_token"],  # standard for most examples
-            "expires_in": data.get("expires_in", 32400)
+            "access_token": client_token,  # keeps old integrations happy
+            "client_token": client_token,  # standard for most examples
+            "expires_in": expires_in
         })
 
 class PayPalOrdersCreateView(View):
     def post(self, request):
+        # The SDK is loaded on first checkout, not at worker start
+        from paypalserversdk.exceptions.error_exception import ErrorException
+        from paypalserversdk.models.amount_breakdown import AmountBreakdown
+        from paypalserversdk.models.amount_with_breakdown import AmountWithBreakdown
+        from paypalserversdk.models.item import Item
+        from paypalserversdk.models.item_category import ItemCategory
+        from paypalserversdk.models.money import Money
+        from paypalserversdk.models.order_request import OrderRequest
+        from paypalserversdk.models.purchase_unit_request import PurchaseUnitRequest
+
         try:
             # Parse incoming JSON request body
             body_data = json.loads(request.body) if request.body else {}
-            print("PARSED BODY:", body_data)     # ← AND THIS ONE
             intent = body_data.get('intent', 'CAPTURE')
             purchase_units_data = body_data.get('purchase_units', [{}])
 
@@ -180,7 +144,7 @@ class PayPalOrdersCreateView(View):
             )
 
             # Create the order
-            order = orders_controller.create_order({"body": order_request, "prefer": "return=representation"})
+            order = orders_controller().create_order({"body": order_request, "prefer": "return=representation"})
             logger.info(f"Order created successfully: {order.body.id}")
 
             return JsonResponse({'id': order.body.id})
@@ -201,76 +165,98 @@ class PayPalOrdersCreateView(View):
             return JsonResponse({'error': 'Internal server error'}, status=500)
         
 class PayPalOrdersCaptureView(View):
+    """
+    Captures are idempotent per PayPal order (see p_methods.payments): a retry of a fulfilled
+    capture is answered from the database, and an unfinished one is re-sent to PayPal with the
+    same PayPal-Request-Id (the Idempotency-Key header, or one derived from the order id).
+    """
     def post(self, request, order_id):
+        from paypalserversdk.api_helper import APIHelper
+        from paypalserversdk.exceptions.error_exception import ErrorException
+
         try:
             body_data = json.loads(request.body) if request.body else {}
             proposal_id = body_data.get('proposal_id')
             booking_id = body_data.get('booking_id')
 
-            order = orders_controller.capture_order({"id": order_id, "prefer": "return=representation"})
-            logger.info(f"Order {order_id} captured: {order.body.status}")
-
-            if order.body.status == 'COMPLETED':
-                success_url = None  # ← initialize here
-
-                if proposal_id:
-                    proposal = get_object_or_404(Proposal, id=proposal_id)
-                    if proposal.status != 'PAID':
-                        proposal.status = 'PAID'
-                        proposal.save(update_fields=['status'])
-
-                    # Create Booking from Proposal if none exists
-                    from django.contrib.contenttypes.models import ContentType
-
-                    tour_page = proposal.tour  # assuming Proposal has FK to tour page
-                    if not tour_page:
-                        raise ValueError("Proposal missing linked tour page")
-
-                    booking, created = Booking.objects.get_or_create(
-                        proposal=proposal,
-                        defaults={
-                            'travel_date': proposal.travel_date,
-                            'number_of_adults': proposal.number_of_adults,
-                            'number_of_children': proposal.number_of_children or 0,
-                            'number_of_infants': proposal.number_of_infants or 0,
-                            'children_ages': proposal.children_ages or [],
-                            'customer_name': proposal.customer_name,
-                            'customer_email': proposal.customer_email,
-                            'customer_phone': proposal.customer_phone or '',
-                            'nationality': proposal.nationality or '',
-                            'customer_address': proposal.customer_address or '',
-                            'notes': proposal.notes or '',
-                            'total_price': proposal.estimated_price,
-                            'status': 'PAID',
-                            'content_type': ContentType.objects.get_for_model(tour_page),
-                            'object_id': tour_page.id,
-                        }
-                    )
-                    if created:
-                        logger.info(f"Created Booking {booking.id} from paid Proposal {proposal.id}")
-
-                    success_url = reverse('bookings:payment_success', args=[proposal_id])
-
-                elif booking_id:
-                    success_url = reverse('bookings:payment_success', args=[booking_id])
-
-                else:
-                    return JsonResponse({'error': 'No proposal or booking ID provided'}, status=400)
-
-                if success_url is None:
-                    return JsonResponse({'error': 'Failed to determine success URL'}, status=500)
-
-                return JsonResponse({'status': 'COMPLETED', 'redirect': success_url})
+            if proposal_id:
+                proposal, acc_booking = get_object_or_404(Proposal, id=proposal_id), None
+            elif booking_id:
+                proposal, acc_booking = None, get_object_or_404(AccommodationBooking, id=booking_id)
+            else:
+                return JsonResponse({'error': 'No proposal or booking ID provided'}, status=400)
+
+            idempotency_key = request.headers.get('Idempotency-Key') or f"capture-{order_id}"
+            capture = payments.start_capture(order_id, idempotency_key[:100], proposal=proposal, accommodation_booking=acc_booking)
+
+            if capture.status != 'COMPLETED':
+                order = orders_controller().capture_order({
+                    "id": order_id,
+                    "prefer": "return=representation",
+                    "paypal_request_id": capture.idempotency_key,
+                })
+                logger.info(f"Order {order_id} captured: {order.body.status}")
+                payments.record_capture(capture, APIHelper.to_dictionary(order.body))
+            else:
+                logger.info(f"Order {order_id} already captured, replaying result")
+
+            if capture.status != 'COMPLETED':
+                return JsonResponse({'status': capture.status, 'error': 'Payment was not completed'}, status=400)
+
+            # Fulfil now rather than waiting for the webhook: the success page needs the Booking
+            try:
+                capture = payments.fulfil_capture(capture)
+            except payments.PaymentMismatch:
+                return JsonResponse({'error': 'Captured amount does not match the booking'}, status=400)
+            success_url = payments.success_url(capture)
+            if success_url is None:
+                return JsonResponse({'error': 'Failed to determine success URL'}, status=500)
+
+            return JsonResponse({'status': 'COMPLETED', 'redirect': success_url})
 
         except json.JSONDecodeError:
             return JsonResponse({'error': 'Invalid JSON'}, status=400)
         except ErrorException as e:
             logger.error(f"Capture failed for {order_id}: {e}")
             return JsonResponse({'error': str(e)}, status=400)
+        except Http404:
+            raise
         except Exception as e:
             logger.error(f"Unexpected error: {e}", exc_info=True)
             return JsonResponse({'error': 'Internal server error'}, status=500)
-        
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class PayPalWebhookView(View):
+    """
+    PayPal webhook receiver. Verifies the delivery, appends it to the PaymentEvent log and
+    answers straight away; the event is applied after commit, off the request thread. Repeated
+    deliveries of an event id are acknowledged without being processed again.
+    """
+    def post(self, request):
+        try:
+            event = json.loads(request.body)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        if not isinstance(event, dict) or not event.get('id') or not event.get('event_type'):
+            return JsonResponse({'error': 'Not a PayPal event'}, status=400)
+
+        try:
+            verified = get_paypal_api().verify_webhook_signature(request.headers, event)
+        except PayPalAPIError as e:
+            # PayPal retries non-2xx deliveries, so let it come back once verification works
+            logger.error(f"Webhook {event['id']} verification failed: {e}")
+            return JsonResponse({'error': 'Verification unavailable'}, status=503)
+        if not verified:
+            logger.warning(f"Rejected unverified PayPal webhook {event['id']} ({event['event_type']})")
+            return JsonResponse({'error': 'Invalid signature'}, status=400)
+
+        recorded = payments.record_webhook(event)
+        if recorded:
+            payments.dispatch_event(recorded)
+        return JsonResponse({'received': True})
+
+
 class PayPalCheckoutView(View):
     def get(self, request, proposal_id=None, booking_id=None):
         client_id = config("PAYPAL_CLIENT_ID")
@@ -284,7 +270,7 @@ class PayPalCheckoutView(View):
                 raise Http404
             context = {
                 'amount': str(booking.total_price.quantize(Decimal('0.01'))),
-                'currency': 'USD',
+                'currency': payments.CHECKOUT_CURRENCY,
                 'item_name': f"{booking.accommodation.name} • Adults: {booking.adults} - Children: {booking.children}. From {booking.check_in} to {booking.check_out}",
                 'custom_id': f"ACC_{booking.id}",
                 'booking_id': booking.id,
@@ -297,7 +283,7 @@ class PayPalCheckoutView(View):
             context = {
                 'proposal': proposal,
                 'amount': str(proposal.estimated_price.quantize(Decimal('0.01'))),
-                'currency': 'USD',
+                'currency': payments.CHECKOUT_CURRENCY,
                 'item_name': f"{proposal.tour.name} ~ {proposal.travel_date} - Ad: {proposal.number_of_adults} + Chd: {proposal.number_of_children} + In: {proposal.number_of_infants}. {proposal.selected_config}",
                 'custom_id': f"PROP_{proposal.id}",
                 'proposal_id': proposal.id,
@@ -7,6 +7,7 @@ from django.http import HttpResponse
 from django.utils import timezone
 from django.shortcuts import render
 from bookings.models import Booking
+from bookings.utils.prefetch import prefetch_generic
 from revenue_management.models import Commission
 from datetime import datetime, timedelta
 from django.contrib.auth.decorators import login_required
@@ -106,6 +107,8 @@ def export_commissions(request):
         created_at__range=[start_date, end_date + timedelta(days=1)],  # Include end_date
         status__in=['PENDING', 'PAID']
     ).select_related('booking')
+    # Evaluates the queryset once and loads every booking's tour with one query per tour type
+    prefetch_generic([commission.booking for commission in commissions], 'tour')
 
     if export_format == 'csv':
         # Generate CSV
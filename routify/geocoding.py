@@ -0,0 +1,211 @@
+"""
+Cached Nominatim client for the route planner's geocoding proxy.
+
+The planner geocodes as the user types, and Nominatim rate-limits per client, so lookups go
+through three layers before reaching upstream:
+
+    1. a response cache in the shared cache (mtapp/cache_versions.py:shared_cache) keyed on the
+       normalised query (lowercased, whitespace collapsed, coordinates rounded to
+       NOMINATIM_COORD_PRECISION decimals, parameters sorted)
+    2. in-flight coalescing: concurrent identical lookups in a worker wait for the first
+       one's result, and across workers a short lock in the same cache lets one worker fetch
+       while the others poll for its answer
+    3. a pooled requests.Session (keep-alive connections, shared by all threads)
+
+Settings (all optional):
+
+    NOMINATIM_URL               upstream base URL
+    NOMINATIM_USER_AGENT        User-Agent sent upstream (required by the usage policy)
+    NOMINATIM_CACHE_TIMEOUT     seconds a successful response is cached
+    NOMINATIM_FIXTURES          path to a JSON file mapping normalised queries to responses
+                                (see routify/fixtures/nominatim.json); when set, lookups are
+                                answered from it and upstream is never called (tests and
+                                offline development)
+"""
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from urllib.parse import urlencode
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+import requests
+from requests.adapters import HTTPAdapter
+
+from mtapp.cache_versions import shared_cache
+
+logger = logging.getLogger(__name__)
+
+NOMINATIM_URL = getattr(settings, 'NOMINATIM_URL', 'https://nominatim.openstreetmap.org')
+NOMINATIM_USER_AGENT = getattr(settings, 'NOMINATIM_USER_AGENT', 'MilanoTravelRoutePlanner/1.0 (contact@yourdomain.com)')
+NOMINATIM_CACHE_TIMEOUT = getattr(settings, 'NOMINATIM_CACHE_TIMEOUT', 60 * 60 * 24 * 7)
+NOMINATIM_TIMEOUT = 10
+NOMINATIM_COORD_PRECISION = 5
+NOMINATIM_POOL_SIZE = 10
+NOMINATIM_LOCK_TIMEOUT = NOMINATIM_TIMEOUT + 2
+NOMINATIM_POLL_INTERVAL = 0.1
+
+
+class GeocodingError(Exception):
+    def __init__(self, message, status=502):
+        super().__init__(message)
+        self.status = status
+
+
+# ──────────────────────────── Query normalisation ────────────────────────────
+
+def normalize_params(params):
+    """Sorted [(key, value)] with text lowercased and trimmed and coordinates rounded."""
+    normalized = {}
+    for key, value in params.items():
+        value = ' '.join(str(value).split())
+        if not value:
+            continue
+        if key in ('lat', 'lon'):
+            try:
+                value = f"{float(value):.{NOMINATIM_COORD_PRECISION}f}"
+            except ValueError:
+                raise GeocodingError(f"Invalid coordinate {key}={value!r}", status=400)
+        elif key not in ('format', 'viewbox'):
+            value = value.lower()
+        normalized[key] = value
+    return sorted(normalized.items())
+
+
+def query_string(endpoint, params):
+    return f"{endpoint}?{urlencode(params)}"
+
+
+def _cache_key(query):
+    return f"nominatim_{hashlib.md5(query.encode()).hexdigest()}"
+
+
+# ──────────────────────────── Upstream ────────────────────────────
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """The process-wide pooled session (created on first use)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=NOMINATIM_POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update({'User-Agent': NOMINATIM_USER_AGENT, 'Accept': 'application/json'})
+                _session = session
+    return _session
+
+
+_fixtures = None
+
+
+def _fixture_response(query):
+    global _fixtures
+    if _fixtures is None:
+        with open(settings.NOMINATIM_FIXTURES, encoding='utf-8') as f:
+            _fixtures = json.load(f)
+    if query in _fixtures:
+        return _fixtures[query]
+    return {'error': 'Unable to geocode'} if query.startswith('reverse') else []
+
+
+def fetch_upstream(endpoint, params, referer=None):
+    """One Nominatim call; raises GeocodingError on timeouts, HTTP errors and non-JSON bodies."""
+    query = query_string(endpoint, params)
+    if getattr(settings, 'NOMINATIM_FIXTURES', None):
+        return _fixture_response(query)
+
+    headers = {'Referer': referer} if referer else {}
+    started = time.monotonic()
+    try:
+        resp = get_session().get(
+            f"{NOMINATIM_URL}/{query}",
+            headers=headers,
+            timeout=NOMINATIM_TIMEOUT,
+            allow_redirects=False,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+    except requests.Timeout:
+        raise GeocodingError("Nominatim request timed out", status=504)
+    except requests.RequestException as e:
+        raise GeocodingError(f"Nominatim service error: {str(e)}")
+    except ValueError:
+        raise GeocodingError("Invalid response from Nominatim")
+
+    if not isinstance(data, (dict, list)):
+        raise GeocodingError("Unexpected response format from Nominatim")
+    logger.debug(f"Nominatim {endpoint} upstream call took {(time.monotonic() - started) * 1000:.0f} ms")
+    return data
+
+
+# ──────────────────────────── Cached, coalesced lookups ────────────────────────────
+
+# cache key -> Future for lookups in flight in this process
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _fetch_once(key, endpoint, params, referer):
+    """Fetch and cache, letting only one worker at a time call upstream for `key`."""
+    cache = shared_cache()
+    lock_key = f"{key}_lock"
+    locked = cache.add(lock_key, 1, NOMINATIM_LOCK_TIMEOUT)
+    if not locked:
+        # Another worker is fetching the same query: wait for its result
+        deadline = time.monotonic() + NOMINATIM_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(NOMINATIM_POLL_INTERVAL)
+            data = cache.get(key)
+            if data is not None:
+                return data
+            if cache.get(lock_key) is None:
+                break
+        # It gave up or timed out: fetch ourselves, taking the lock if it is free so the lock
+        # we delete afterwards is always our own
+        locked = cache.add(lock_key, 1, NOMINATIM_LOCK_TIMEOUT)
+    try:
+        data = fetch_upstream(endpoint, params, referer)
+        cache.set(key, data, NOMINATIM_CACHE_TIMEOUT)
+        return data
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def lookup(endpoint, params, referer=None):
+    """Nominatim `endpoint` ('search' or 'reverse') response for `params`, cached and coalesced."""
+    params = normalize_params(params)
+    key = _cache_key(query_string(endpoint, params))
+    data = shared_cache().get(key)
+    if data is not None:
+        return data
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    if not leader:
+        try:
+            return future.result(timeout=NOMINATIM_LOCK_TIMEOUT * 2)
+        except FutureTimeoutError:
+            raise GeocodingError("Nominatim request timed out", status=504)
+
+    try:
+        data = _fetch_once(key, endpoint, params, referer)
+        future.set_result(data)
+        return data
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
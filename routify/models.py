@@ -1,6 +1,7 @@
 from django.db import models
 from django.http import Http404, HttpResponseRedirect, JsonResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from wagtail.models import Page
 from wagtail.admin.panels import FieldPanel
 from wagtail.fields import RichTextField
@@ -11,6 +12,8 @@ from django.utils.translation import gettext_lazy as _
 from django.contrib import messages
 import json
 
+from routify.routing import summarize_route
+
 @register_snippet
 class PlannedRoute(models.Model):
     name = models.CharField(max_length=255, help_text="e.g. 'Cuenca → Ingapirca via Cañar'")
@@ -57,18 +60,9 @@ class RoutePlannerPage(Page):
     max_count = 1  # Optional: enforce only one instance
 
     def get_context(self, request):
+        # Saved routes are loaded page by page from routify/views.py:routes_list
         context = super().get_context(request)
-        routes_qs = PlannedRoute.objects.all().order_by('-id')
-        context['routes'] = routes_qs
-        context['routes_json'] = json.dumps([
-            {
-                'id': r.id,
-                'name': r.name,
-                'waypoints': r.waypoints,
-                'summary': r.route_summary,
-                'notes': str(r.notes),  # HTML-safe rendered notes
-            } for r in routes_qs
-        ])
+        context['routes_url'] = reverse('routify_routes')
         return context
 
     def serve(self, request):
@@ -111,7 +105,8 @@ class RoutePlannerPage(Page):
                     route = PlannedRoute(name=name, user=request.user)
 
                 route.waypoints = payload.get("waypoints", [])
-                route.route_summary = payload.get("summary", {})
+                # Fall back to the server-side estimate when the client could not route
+                route.route_summary = payload.get("summary") or summarize_route(route.waypoints)
                 route.notes = notes
                 route.save()
 
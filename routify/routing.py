@@ -0,0 +1,162 @@
+"""
+Server-side distances and driving times between route planner waypoints.
+
+    distance_matrix(points)    {'distances': [[km]], 'durations': [[min]]} between all points
+    summarize_route(waypoints) totals and per-leg figures for consecutive waypoints
+
+Legs come from a pluggable backend (settings.ROUTING_BACKEND, a dotted path). The default
+HaversineBackend estimates them from great-circle distance times a road factor at an average
+speed, without network calls; OSRMBackend asks an OSRM server's table service for a whole
+matrix in one request. Every leg is cached by its rounded coordinate pair, so a matrix only
+computes the pairs that changed since the waypoints were last edited.
+"""
+from math import asin, cos, radians, sin, sqrt
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+import requests
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+ROUTING_COORD_PRECISION = 5
+ROUTING_CACHE_TIMEOUT = getattr(settings, 'ROUTING_CACHE_TIMEOUT', 60 * 60 * 24 * 30)
+ROUTING_MAX_POINTS = 25
+
+
+def haversine_km(origin, destination):
+    """Great-circle distance in km between two (lat, lng) points."""
+    lat1, lng1 = map(radians, origin)
+    lat2, lng2 = map(radians, destination)
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(a))
+
+
+# ──────────────────────────── Backends ────────────────────────────
+
+class HaversineBackend:
+    """Straight-line distance stretched by a road factor, driven at an average speed."""
+    name = 'haversine'
+    road_factor = getattr(settings, 'ROUTING_ROAD_FACTOR', 1.3)
+    average_speed_kmh = getattr(settings, 'ROUTING_AVERAGE_SPEED_KMH', 50)
+
+    def legs(self, pairs):
+        """{(origin, destination): (distance_km, duration_min)} for each pair."""
+        result = {}
+        for origin, destination in pairs:
+            distance = haversine_km(origin, destination) * self.road_factor
+            result[(origin, destination)] = (round(distance, 2), round(distance / self.average_speed_kmh * 60, 1))
+        return result
+
+
+class OSRMBackend(HaversineBackend):
+    """OSRM table service; pairs it cannot route fall back to the haversine estimate."""
+    name = 'osrm'
+    service_url = getattr(settings, 'ROUTING_OSRM_URL', 'https://router.project-osrm.org')
+    timeout = 10
+
+    def legs(self, pairs):
+        points = sorted({point for pair in pairs for point in pair})
+        index = {point: i for i, point in enumerate(points)}
+        coordinates = ';'.join(f"{lng},{lat}" for lat, lng in points)
+        try:
+            resp = requests.get(
+                f"{self.service_url}/table/v1/driving/{coordinates}",
+                params={'annotations': 'distance,duration'},
+                timeout=self.timeout,
+            )
+            resp.raise_for_status()
+            table = resp.json()
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"OSRM table request failed, using haversine estimates: {e}")
+            return super().legs(pairs)
+
+        result = {}
+        missing = []
+        for origin, destination in pairs:
+            i, j = index[origin], index[destination]
+            distance = table['distances'][i][j] if table.get('distances') else None
+            duration = table['durations'][i][j] if table.get('durations') else None
+            if distance is None or duration is None:
+                missing.append((origin, destination))
+            else:
+                result[(origin, destination)] = (round(distance / 1000, 2), round(duration / 60, 1))
+        result.update(super().legs(missing))
+        return result
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        backend_path = getattr(settings, 'ROUTING_BACKEND', 'routify.routing.HaversineBackend')
+        _backend = import_string(backend_path)()
+    return _backend
+
+
+# ──────────────────────────── Cached legs ────────────────────────────
+
+def normalize_point(point):
+    """(lat, lng) rounded to ROUTING_COORD_PRECISION from a dict or pair; ValueError if invalid."""
+    if isinstance(point, dict):
+        lat, lng = point.get('lat'), point.get('lng', point.get('lon'))
+    else:
+        lat, lng = point
+    lat, lng = round(float(lat), ROUTING_COORD_PRECISION), round(float(lng), ROUTING_COORD_PRECISION)
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError(f"Coordinates out of range: {lat}, {lng}")
+    return lat, lng
+
+
+def _leg_key(backend, origin, destination):
+    return f"route_leg_{backend.name}_{origin[0]}_{origin[1]}_{destination[0]}_{destination[1]}"
+
+
+def get_legs(pairs):
+    """{(origin, destination): (distance_km, duration_min)}, computing only uncached pairs."""
+    backend = get_backend()
+    pairs = list(dict.fromkeys(pairs))
+    keys = {_leg_key(backend, *pair): pair for pair in pairs}
+    cached = cache.get_many(keys)
+    legs = {keys[key]: tuple(value) for key, value in cached.items()}
+
+    missing = [pair for pair in pairs if pair not in legs]
+    if missing:
+        computed = backend.legs(missing)
+        cache.set_many({_leg_key(backend, *pair): value for pair, value in computed.items()}, ROUTING_CACHE_TIMEOUT)
+        legs.update(computed)
+        logger.debug(f"Routing legs: {len(cached)} cached, {len(missing)} computed ({backend.name})")
+    return legs
+
+
+def distance_matrix(points):
+    """Distance (km) and duration (min) matrices between every pair of `points`."""
+    points = [normalize_point(point) for point in points[:ROUTING_MAX_POINTS]]
+    pairs = [(a, b) for a in points for b in points if a != b]
+    legs = get_legs(pairs)
+    distances = [[0 if a == b else legs[(a, b)][0] for b in points] for a in points]
+    durations = [[0 if a == b else legs[(a, b)][1] for b in points] for a in points]
+    return {'points': points, 'distances': distances, 'durations': durations}
+
+
+def summarize_route(waypoints):
+    """{'total_distance_km', 'total_duration_min', 'legs': [...]} for waypoints in order."""
+    points = []
+    for waypoint in waypoints[:ROUTING_MAX_POINTS]:
+        try:
+            points.append(normalize_point(waypoint))
+        except (TypeError, ValueError):
+            continue
+    pairs = [(a, b) for a, b in zip(points, points[1:]) if a != b]
+    legs = get_legs(pairs)
+    leg_list = [{'distance_km': legs[pair][0], 'duration_min': legs[pair][1]} for pair in pairs]
+    return {
+        'total_distance_km': round(sum(leg['distance_km'] for leg in leg_list), 1),
+        'total_duration_min': round(sum(leg['duration_min'] for leg in leg_list)),
+        'legs': leg_list,
+        'source': get_backend().name,
+    }
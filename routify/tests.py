@@ -1,3 +1,56 @@
-from django.test import TestCase
+import os
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from mtapp.cache_versions import shared_cache
+from routify import geocoding
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'nominatim.json')
+
+
+@override_settings(NOMINATIM_FIXTURES=FIXTURES)
+class GeocodingTests(TestCase):
+    """lookup() and the proxy view, answered from routify/fixtures/nominatim.json."""
+
+    def setUp(self):
+        shared_cache().clear()
+
+    def key(self, endpoint, params):
+        return geocoding._cache_key(geocoding.query_string(endpoint, geocoding.normalize_params(params)))
+
+    def test_lookup_is_normalised_and_cached(self):
+        params = {'q': '  Cuenca ', 'format': 'json', 'addressdetails': '1', 'limit': '8'}
+        data = geocoding.lookup('search', params)
+
+        self.assertEqual(data[0]['display_name'], "Cuenca, Azuay, Ecuador")
+        self.assertEqual(shared_cache().get(self.key('search', params)), data)
+        self.assertIsNone(shared_cache().get(f"{self.key('search', params)}_lock"))
+
+    def test_reverse_rounds_coordinates(self):
+        params = {'lat': '-2.9005499', 'lon': '-79.0045319', 'format': 'json', 'addressdetails': '1', 'limit': '8', 'zoom': '14'}
+        self.assertEqual(geocoding.lookup('reverse', params)['place_id'], 1)
+
+    def test_waiter_does_not_release_a_lock_it_does_not_hold(self):
+        params = {'q': 'quito', 'format': 'json', 'addressdetails': '1', 'limit': '8'}
+        lock_key = f"{self.key('search', params)}_lock"
+        shared_cache().add(lock_key, 1, 60)  # another worker is fetching and never answers
+
+        with mock.patch.object(geocoding, 'NOMINATIM_LOCK_TIMEOUT', 0.2), \
+                mock.patch.object(geocoding, 'NOMINATIM_POLL_INTERVAL', 0.05):
+            data = geocoding.lookup('search', params)
+
+        self.assertEqual(data[0]['display_name'], "Quito, Pichincha, Ecuador")
+        self.assertEqual(shared_cache().get(lock_key), 1)
+
+    def test_proxy_view(self):
+        staff = get_user_model().objects.create_user('staff', 'staff@example.com', 'pw', is_staff=True)
+        self.client.force_login(staff)
+
+        response = self.client.get('/routify/nominatim-proxy/search', {'q': 'Quito'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['place_id'], 2)
+
+        response = self.client.get('/routify/nominatim-proxy/search')
+        self.assertEqual(response.status_code, 400)
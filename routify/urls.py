@@ -1,9 +1,12 @@
 from django.urls import path, re_path
-from .views import nominatim_proxy, save_route
+from .views import nominatim_proxy, route_detail, route_matrix, routes_list, save_route
 
 urlpatterns = [
     re_path(r'^nominatim-proxy(?:/.*)?$', nominatim_proxy),  # catch prefixed or not
     path('save-route/', save_route, name='save_route'),
+    path('routes/', routes_list, name='routify_routes'),
+    path('routes/<int:route_id>/', route_detail, name='routify_route_detail'),
+    path('matrix/', route_matrix, name='routify_matrix'),
 
 ]
 
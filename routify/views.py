@@ -3,18 +3,26 @@ from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET
 from django.contrib.admin.views.decorators import staff_member_required
-import requests
-from urllib.parse import urlencode
+
+from django.core.paginator import Paginator
+from django.shortcuts import get_object_or_404
+
+from accounts.ratelimit import sliding_ratelimit
+from routify.geocoding import GeocodingError, lookup
+from routify.models import PlannedRoute
+from routify.routing import distance_matrix
 
 
 @staff_member_required  # Keep if the tool is truly staff-only; remove if public users should access
 @require_GET
 @csrf_exempt           # Only if you really need it (e.g. future POST support); otherwise remove
 @never_cache
+@sliding_ratelimit('nominatim')
 def nominatim_proxy(request):
     """
     Proxy to Nominatim (OpenStreetMap) search/reverse endpoint.
     Enforces GET, adds required headers, limits abuse potential.
+    Responses are cached and identical concurrent lookups coalesced (see routify/geocoding.py).
     """
     params = request.GET.copy()
 
@@ -35,40 +43,69 @@ def nominatim_proxy(request):
     else:
         return HttpResponseBadRequest("Missing required parameters (lat+lon for reverse or q/street/city for search)")
 
-    base_url = "https://nominatim.openstreetmap.org"
-    full_url = f"{base_url}/{endpoint}?{urlencode(params)}"
+    try:
+        data = lookup(endpoint, params, referer=request.build_absolute_uri())
+    except GeocodingError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+    return JsonResponse(data, safe=False)
+
+
+ROUTES_PAGE_SIZE = 50
 
-    headers = {
-        'User-Agent': 'MilanoTravelRoutePlanner/1.0 (contact@yourdomain.com)',  # ← CHANGE THIS!
-        'Referer': request.build_absolute_uri(),  # Helps Nominatim identify source
-        'Accept': 'application/json',
-    }
 
+@staff_member_required
+@require_GET
+def routes_list(request):
+    """Saved routes, one page at a time, without their waypoints (?page=, ?q= name filter)."""
+    routes = PlannedRoute.objects.order_by('-id').values('id', 'name', 'route_summary')
+    query = request.GET.get('q', '').strip()
+    if query:
+        routes = routes.filter(name__icontains=query)
+
+    page = Paginator(routes, ROUTES_PAGE_SIZE).get_page(request.GET.get('page'))
+    return JsonResponse({
+        'results': [
+            {
+                'id': route['id'],
+                'name': route['name'],
+                'total_distance_km': (route['route_summary'] or {}).get('total_distance_km'),
+                'total_duration_min': (route['route_summary'] or {}).get('total_duration_min'),
+            }
+            for route in page
+        ],
+        'page': page.number,
+        'num_pages': page.paginator.num_pages,
+        'has_next': page.has_next(),
+    })
+
+
+@staff_member_required
+@require_GET
+def route_detail(request, route_id):
+    route = get_object_or_404(PlannedRoute, id=route_id)
+    return JsonResponse({
+        'id': route.id,
+        'name': route.name,
+        'waypoints': route.waypoints,
+        'summary': route.route_summary or {},
+        'notes': str(route.notes),
+    })
+
+
+@staff_member_required
+@require_GET
+def route_matrix(request):
+    """Distance/duration matrix for ?points=lat,lng;lat,lng;..."""
     try:
-        resp = requests.get(
-            full_url,
-            headers=headers,
-            timeout=10,                # Shorter than 15s is usually fine
-            allow_redirects=False      # Prevent following suspicious redirects
-        )
-        resp.raise_for_status()
-
-        data = resp.json()
-
-        # Optional safety: ensure we only return list or dict (Nominatim reverse returns dict, search returns list)
-        if isinstance(data, (dict, list)):
-            return JsonResponse(data, safe=False)
-        else:
-            return JsonResponse({"error": "Unexpected response format from Nominatim"}, status=502)
-
-    except requests.Timeout:
-        return JsonResponse({"error": "Nominatim request timed out"}, status=504)
-    except requests.RequestException as e:
-        return JsonResponse({"error": f"Nominatim service error: {str(e)}"}, status=502)
-    except ValueError:
-        # JSON decode error
-        return JsonResponse({"error": "Invalid response from Nominatim"}, status=502)
-    
+        points = [tuple(point.split(',')) for point in request.GET.get('points', '').split(';') if point]
+        matrix = distance_matrix(points)
+    except (TypeError, ValueError) as e:
+        return JsonResponse({'error': f"Invalid points: {e}"}, status=400)
+    if len(matrix['points']) < 2:
+        return JsonResponse({'error': "At least two points are required"}, status=400)
+    return JsonResponse(matrix)
+
+
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
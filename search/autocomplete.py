@@ -0,0 +1,142 @@
+"""
+Search-as-you-type suggestions from an in-process sorted-array prefix index.
+
+Per locale, the index holds one entry per tour/accommodation name, destination and blog title
+(ranked: tours, destinations, accommodations, blog posts, then shorter labels first) and a sorted
+list of lookup keys: the normalised label from every word onwards, so "lights" finds "Northern
+Lights". A prefix lookup is two bisects over the keys; one- and two-character prefixes, whose
+ranges are large, have their top results precomputed.
+
+The index is built from the SearchDocument table, cached under a per-locale version and kept in
+process memory. The version lives in the shared cache (mtapp/cache_versions.py), which workers
+re-check at most every CACHE_VERSION_CHECK_SECONDS, so a lookup normally touches neither the
+database nor a cache, and a rebuild in one worker reaches the others. search/signals.py rebuilds
+the index for a locale after its pages are (re)indexed.
+"""
+from bisect import bisect_left
+import logging
+import re
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import translation
+
+from mtapp.cache_versions import bump_version, get_version
+from search.indexer import normalize
+from search.models import SearchDocument
+
+logger = logging.getLogger(__name__)
+
+AUTOCOMPLETE_LIMIT = 8
+AUTOCOMPLETE_MAX_LIMIT = 20  # Largest `limit` the endpoint accepts; precomputed top lists hold this many
+AUTOCOMPLETE_TOP_PREFIX_LENGTH = 2
+AUTOCOMPLETE_CACHE_TIMEOUT = 60 * 60 * 24
+AUTOCOMPLETE_VERSION_KEY = 'autocomplete_version'
+
+KIND_RANK = {'tour': 0, 'destination': 1, 'accommodation': 2, 'blog': 3}
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+# language -> (version, index) for this process
+_local_indexes = {}
+
+
+def _words(text):
+    return _WORD_RE.findall(normalize(text))
+
+
+def _data_key(language, version):
+    return f"autocomplete_index_{language}_{version}"
+
+
+def _version_key(language):
+    return f"{AUTOCOMPLETE_VERSION_KEY}_{language}"
+
+
+def build_index(language):
+    """{'entries': [(label, url, kind)], 'keys': [...], 'refs': [...], 'top': {prefix: [entry ids]}}"""
+    rows = SearchDocument.objects.filter(language_code=language).values_list('title', 'url', 'kind', 'destination')
+
+    with translation.override(language):
+        search_url = reverse('search')
+
+    labels = {}
+    for title, url, kind, destination in rows:
+        labels.setdefault((title, kind), url)
+        if destination and kind != 'blog':
+            labels.setdefault((destination, 'destination'), f"{search_url}?query={quote(destination)}")
+
+    ordered = sorted(labels.items(), key=lambda item: (KIND_RANK[item[0][1]], len(item[0][0]), item[0][0]))
+    entries = [(label, url, kind) for (label, kind), url in ordered]
+
+    pairs = set()
+    for ref, (label, _, _) in enumerate(entries):
+        words = _words(label)
+        for i in range(len(words)):
+            pairs.add((' '.join(words[i:]), ref))
+    pairs = sorted(pairs)
+
+    top = {}
+    for key, ref in pairs:
+        for length in range(1, AUTOCOMPLETE_TOP_PREFIX_LENGTH + 1):
+            if len(key) >= length:
+                top.setdefault(key[:length], set()).add(ref)
+    top = {prefix: sorted(refs)[:AUTOCOMPLETE_MAX_LIMIT] for prefix, refs in top.items()}
+
+    return {
+        'entries': entries,
+        'keys': [key for key, _ in pairs],
+        'refs': [ref for _, ref in pairs],
+        'top': top,
+    }
+
+
+def rebuild_index(language):
+    """
+    Build the locale's index and publish it under a new version; other workers switch to it
+    within CACHE_VERSION_CHECK_SECONDS.
+    """
+    index = build_index(language)
+    version = bump_version(_version_key(language))
+    cache.set(_data_key(language, version), index, AUTOCOMPLETE_CACHE_TIMEOUT)
+    _local_indexes[language] = (version, index)
+    logger.debug(f"Rebuilt autocomplete index for {language}: {len(index['entries'])} entries")
+    return index
+
+
+def get_index(language):
+    """The locale's index from process memory, the cache, or the database (in that order)."""
+    version = get_version(_version_key(language))
+    local = _local_indexes.get(language)
+    if local and local[0] == version:
+        return local[1]
+
+    index = cache.get(_data_key(language, version))
+    if index is None:
+        index = build_index(language)
+        cache.set(_data_key(language, version), index, AUTOCOMPLETE_CACHE_TIMEOUT)
+    _local_indexes[language] = (version, index)
+    return index
+
+
+def suggest(prefix, language, limit=AUTOCOMPLETE_LIMIT):
+    """Up to `limit` {'label', 'url', 'kind'} suggestions whose words start with `prefix`."""
+    key = ' '.join(_words(prefix))
+    if not key:
+        return []
+    index = get_index(language)
+
+    if len(key) <= AUTOCOMPLETE_TOP_PREFIX_LENGTH:
+        refs = index['top'].get(key, [])
+    else:
+        keys = index['keys']
+        start = bisect_left(keys, key)
+        end = bisect_left(keys, key + '\uffff', lo=start)
+        refs = sorted(set(index['refs'][start:end]))
+
+    entries = index['entries']
+    return [
+        {'label': entries[ref][0], 'url': entries[ref][1], 'kind': entries[ref][2]}
+        for ref in refs[:limit]
+    ]
@@ -0,0 +1,215 @@
+"""
+Search index maintenance.
+
+Every live tour, accommodation and blog page gets a SearchDocument with the fields listings filter
+on (destination, price, duration, tour type, availability flags) and a set of SearchTerm rows:
+normalised tokens (lowercased, accents stripped) with a weight by field, so a title match ranks
+above a body match. Terms carry the language code, so lookups only scan one locale.
+
+search/signals.py keeps the index current on publish/unpublish/move; the rebuild_search_index
+command (re)indexes pages whose document is missing or older than their last publish.
+"""
+from collections import Counter
+from decimal import Decimal
+import logging
+import re
+import unicodedata
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils.html import strip_tags
+from wagtail.models import Page
+
+from search.models import SearchDocument, SearchTerm
+
+logger = logging.getLogger(__name__)
+
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 64
+MAX_TERM_WEIGHT = 100
+
+FIELD_WEIGHTS = {
+    'title': 10,
+    'destination': 6,
+    'location': 5,
+    'kind': 3,
+    'summary': 2,
+    'body': 1,
+}
+
+STOPWORDS = {
+    'the', 'and', 'for', 'with', 'from', 'your', 'our', 'you', 'are', 'this', 'that', 'los', 'las',
+    'del', 'con', 'por', 'para', 'una', 'uno', 'des', 'les', 'est', 'dla', 'nie', 'jest',
+}
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+TOUR_TYPES = {'fulltourpage': 'full', 'landtourpage': 'land', 'daytourpage': 'day'}
+
+
+def normalize(text):
+    """Lowercase and strip accents ("Cuenca Café" -> "cuenca cafe")."""
+    decomposed = unicodedata.normalize('NFKD', str(text or '').lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in _TOKEN_RE.findall(normalize(strip_tags(str(text or ''))))
+        if len(token) >= MIN_TERM_LENGTH and token not in STOPWORDS
+    ]
+
+
+# ──────────────────────────── Page → document ────────────────────────────
+
+def _page_kind(page):
+    from accommodation.models import AbstractAccommodationPage
+    from blog.models import BlogDetailPage
+    from tours.models import AbstractTourPage
+
+    if isinstance(page, AbstractTourPage):
+        return 'tour'
+    if isinstance(page, AbstractAccommodationPage):
+        return 'accommodation'
+    if isinstance(page, BlogDetailPage):
+        return 'blog'
+    return None
+
+
+def indexed_models():
+    """Concrete page models that get a SearchDocument."""
+    from accommodation.models import AbstractAccommodationPage
+    from blog.models import BlogDetailPage
+    from tours.models import AbstractTourPage
+
+    models = [BlogDetailPage]
+    for base in (AbstractTourPage, AbstractAccommodationPage):
+        models.extend(m for m in base.__subclasses__() if not m._meta.abstract)
+    return models
+
+
+def base_price(page):
+    """Cheapest listed adult/room price in USD, or None when the page has no prices."""
+    pricing_type = getattr(page, 'pricing_type', None)
+    if pricing_type == 'Per_room':
+        candidates = [page.price_dbl, page.price_sgl, page.price_tpl]
+    elif pricing_type == 'Per_person':
+        candidates = [page.price_adult]
+    elif pricing_type == 'Combined':
+        tiers = getattr(page, 'combined_pricing_tiers', None) or []
+        candidates = [tier.value.get('price_adult') for tier in tiers]
+    else:
+        return None
+    prices = [Decimal(str(p)) for p in candidates if p]
+    return min(prices) if prices else None
+
+
+def _body_text(page, kind):
+    if kind == 'blog':
+        texts = (getattr(block.value, 'source', block.value) for block in (page.body or []))
+        return ' '.join(text for text in texts if isinstance(text, str))
+    return ' '.join(str(getattr(page, field, '') or '') for field in ('description', 'courtesies', 'hotel'))
+
+
+def build_document(page):
+    """(document field values, {term: weight}) for a specific page, or None if it isn't indexed."""
+    kind = _page_kind(page)
+    if kind is None:
+        return None
+
+    if kind == 'blog':
+        summary = getattr(page.intro, 'source', page.intro) if page.intro else ''
+        destination = page.source_country or ''
+        location = page.category.name if page.category_id else ''
+        published = page.date_published
+    else:
+        summary = page.search_description or ''
+        destination = page.destination or ''
+        location = page.location or ''
+        published = None
+
+    fields = {
+        'language_code': page.locale.language_code,
+        'kind': kind,
+        'tour_type': TOUR_TYPES.get(page._meta.model_name, ''),
+        'title': (getattr(page, 'name', None) or page.title)[:255],
+        'url': page.get_url() or page.url_path,
+        'summary': strip_tags(str(summary))[:1000],
+        'destination': destination,
+        'location': location,
+        'price': base_price(page),
+        'duration_days': getattr(page, 'duration_days', 1 if TOUR_TYPES.get(page._meta.model_name) == 'day' else None),
+        'start_date': getattr(page, 'start_date', None) or published,
+        'end_date': getattr(page, 'end_date', None),
+        'is_sold_out': getattr(page, 'is_sold_out', False),
+        'is_on_discount': getattr(page, 'is_on_discount', False),
+        'is_special_offer': getattr(page, 'is_special_offer', False),
+        'is_all_inclusive': getattr(page, 'is_all_inclusive', False),
+        'published_at': page.last_published_at,
+    }
+
+    weights = Counter()
+    sources = {
+        'title': f"{page.title} {getattr(page, 'name', '')}",
+        'destination': destination,
+        'location': location,
+        'kind': f"{kind} {fields['tour_type']}",
+        'summary': summary,
+        'body': _body_text(page, kind),
+    }
+    for field, text in sources.items():
+        for token in tokenize(text):
+            weights[token] += FIELD_WEIGHTS[field]
+    terms = {term: min(weight, MAX_TERM_WEIGHT) for term, weight in weights.items()}
+    return fields, terms
+
+
+# ──────────────────────────── Writes ────────────────────────────
+
+def index_page(page):
+    """Create or refresh the document for `page`; drops it when the page is not live and public."""
+    page = page.specific
+    if not page.live or page.get_view_restrictions().exists():
+        return remove_page(page.pk)
+
+    built = build_document(page)
+    if built is None:
+        return None
+    fields, terms = built
+
+    with transaction.atomic():
+        document, _ = SearchDocument.objects.update_or_create(page_id=page.pk, defaults=fields)
+        document.terms.all().delete()
+        SearchTerm.objects.bulk_create([
+            SearchTerm(document=document, language_code=fields['language_code'], term=term, weight=weight)
+            for term, weight in terms.items()
+        ])
+    logger.debug(f"Indexed page {page.pk} ({fields['kind']}, {len(terms)} terms)")
+    return document
+
+
+def remove_page(page_id):
+    deleted, _ = SearchDocument.objects.filter(page_id=page_id).delete()
+    if deleted:
+        logger.debug(f"Removed page {page_id} from the search index")
+    return None
+
+
+def pages_to_index(full=False, language=None):
+    """Live pages of indexed types whose document is missing or older than their last publish."""
+    pages = Page.objects.live().public().type(*indexed_models()).select_related('locale')
+    if language:
+        pages = pages.filter(locale__language_code=language)
+    if full:
+        return pages
+    return pages.filter(
+        Q(search_document__isnull=True) | Q(search_document__indexed_at__lt=F('last_published_at'))
+    )
+
+
+def prune_index():
+    """Delete documents whose page is no longer live and public (missed unpublish signals)."""
+    live = Page.objects.live().public().values('pk')
+    deleted, _ = SearchDocument.objects.exclude(page_id__in=live).delete()
+    return deleted
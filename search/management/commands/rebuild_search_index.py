@@ -0,0 +1,30 @@
+# search/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand
+
+from search.autocomplete import rebuild_index
+from search.indexer import index_page, pages_to_index, prune_index
+from search.models import SearchDocument
+
+
+class Command(BaseCommand):
+    help = "Index tours, accommodations and blog posts whose search document is missing or out of date"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Reindex every page, not only stale ones')
+        parser.add_argument('--language', help='Only this language code (e.g. en)')
+
+    def handle(self, *args, **options):
+        pages = pages_to_index(full=options['full'], language=options['language']).specific()
+
+        indexed = 0
+        for page in pages.iterator(chunk_size=200):
+            if index_page(page) is not None:
+                indexed += 1
+        removed = prune_index()
+
+        languages = [options['language']] if options['language'] else SearchDocument.objects.values_list('language_code', flat=True).distinct()
+        for language in languages:
+            rebuild_index(language)
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} pages, removed {removed} stale documents"))
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('wagtailcore', '0095_groupsitepermission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language_code', models.CharField(max_length=10)),
+                ('kind', models.CharField(choices=[('tour', 'Tour'), ('accommodation', 'Accommodation'), ('blog', 'Blog post')], max_length=20)),
+                ('tour_type', models.CharField(blank=True, max_length=10)),
+                ('title', models.CharField(max_length=255)),
+                ('url', models.CharField(max_length=500)),
+                ('summary', models.TextField(blank=True)),
+                ('destination', models.CharField(blank=True, max_length=100)),
+                ('location', models.CharField(blank=True, max_length=100)),
+                ('price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('duration_days', models.PositiveIntegerField(blank=True, null=True)),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('is_sold_out', models.BooleanField(default=False)),
+                ('is_on_discount', models.BooleanField(default=False)),
+                ('is_special_offer', models.BooleanField(default=False)),
+                ('is_all_inclusive', models.BooleanField(default=False)),
+                ('published_at', models.DateTimeField(blank=True, null=True)),
+                ('indexed_at', models.DateTimeField(auto_now=True)),
+                ('page', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='wagtailcore.page')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language_code', models.CharField(max_length=10)),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='search.searchdocument')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='searchdocument',
+            index=models.Index(fields=['language_code', 'kind'], name='search_sear_languag_9e683e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchdocument',
+            index=models.Index(fields=['language_code', 'destination'], name='search_sear_languag_0b8887_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchdocument',
+            index=models.Index(fields=['language_code', 'price'], name='search_sear_languag_7882e9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['language_code', 'term'], name='search_sear_languag_a7519f_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='searchterm',
+            unique_together={('document', 'term')},
+        ),
+    ]
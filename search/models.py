@@ -0,0 +1,65 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from wagtail.models import Page
+
+
+class SearchDocument(models.Model):
+    """
+    One row per indexed page (tours, accommodations, blog posts), denormalised so that search,
+    filtering and facet counts never touch the page tables. Maintained by search.indexer.
+    """
+    KIND_CHOICES = [
+        ('tour', _('Tour')),
+        ('accommodation', _('Accommodation')),
+        ('blog', _('Blog post')),
+    ]
+
+    page = models.OneToOneField(Page, on_delete=models.CASCADE, related_name='search_document')
+    language_code = models.CharField(max_length=10)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    tour_type = models.CharField(max_length=10, blank=True)
+
+    title = models.CharField(max_length=255)
+    url = models.CharField(max_length=500)
+    summary = models.TextField(blank=True)
+    destination = models.CharField(max_length=100, blank=True)
+    location = models.CharField(max_length=100, blank=True)
+
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    duration_days = models.PositiveIntegerField(null=True, blank=True)
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    is_sold_out = models.BooleanField(default=False)
+    is_on_discount = models.BooleanField(default=False)
+    is_special_offer = models.BooleanField(default=False)
+    is_all_inclusive = models.BooleanField(default=False)
+
+    published_at = models.DateTimeField(null=True, blank=True)
+    indexed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['language_code', 'kind']),
+            models.Index(fields=['language_code', 'destination']),
+            models.Index(fields=['language_code', 'price']),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.language_code})"
+
+
+class SearchTerm(models.Model):
+    """Inverted index: normalised token -> document, with a field-weighted score."""
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='terms')
+    language_code = models.CharField(max_length=10)
+    term = models.CharField(max_length=64)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        unique_together = (('document', 'term'),)
+        indexes = [
+            models.Index(fields=['language_code', 'term']),
+        ]
+
+    def __str__(self):
+        return f"{self.term} → {self.document_id} ({self.weight})"
@@ -0,0 +1,245 @@
+"""
+Queries against the search index (search.models).
+
+    search_documents(query, language, filters)  ranked matches, facet counts, typo correction
+    autocomplete(prefix, language)              typo-tolerant prefix suggestions
+
+Every query token is a prefix match on SearchTerm.term within one language; a document must
+match all tokens. Score is the sum of the matching term weights, with exact term matches counted
+twice. When a token matches nothing it is replaced by the closest indexed term (edit distance
+1, or 2 for tokens of six characters or more), so "cuneca" still finds "cuenca".
+"""
+from decimal import Decimal, InvalidOperation
+import logging
+
+from django.db.models import Case, Count, F, IntegerField, Max, Q, Sum, When
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from search.indexer import tokenize
+from search.models import SearchDocument, SearchTerm
+
+logger = logging.getLogger(__name__)
+
+MAX_QUERY_TERMS = 6
+MAX_FUZZY_CANDIDATES = 2000
+FACET_FIELDS = ('kind', 'tour_type', 'destination')
+PRICE_BUCKETS = ((0, 100), (100, 500), (500, 1000), (1000, None))
+DURATION_BUCKETS = ((1, 1), (2, 4), (5, 8), (9, None))
+
+
+# ──────────────────────────── Typo tolerance ────────────────────────────
+
+def edit_distance(a, b, limit=2):
+    """Optimal string alignment distance, giving up (returning limit + 1) once it exceeds `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cost = ca != cb
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def max_edits(token):
+    return 1 if len(token) < 6 else 2
+
+
+def prefix_distance(token, term):
+    """Distance between `token` and the closest prefix of `term` of about the same length."""
+    limit = max_edits(token)
+    return min(
+        edit_distance(token, term[:length], limit)
+        for length in range(max(1, len(token) - limit), len(token) + limit + 1)
+    )
+
+
+def correct_token(token, language):
+    """`token` if some term starts with it, else the closest indexed term (or None)."""
+    terms = SearchTerm.objects.filter(language_code=language)
+    if terms.filter(term__startswith=token).exists():
+        return token
+
+    limit = max_edits(token)
+    candidates = (
+        terms.filter(term__startswith=token[0])
+        .annotate(length=Length('term'))
+        .filter(length__gte=len(token) - limit)
+        .values('term')
+        .annotate(weight=Sum('weight'))[:MAX_FUZZY_CANDIDATES]
+    )
+    best = None
+    for row in candidates:
+        distance = prefix_distance(token, row['term'])
+        if distance <= limit:
+            key = (distance, -row['weight'], len(row['term']))
+            if best is None or key < best[0]:
+                best = (key, row['term'])
+    return best[1] if best else None
+
+
+def correct_tokens(tokens, language):
+    corrected = [correct_token(token, language) for token in tokens]
+    return [token for token in corrected if token]
+
+
+# ──────────────────────────── Matching ────────────────────────────
+
+def match_documents(tokens, language):
+    """[(document_id, score)] for documents matching every token as a prefix, best first."""
+    tokens = tokens[:MAX_QUERY_TERMS]
+    if not tokens:
+        return []
+
+    any_token = Q()
+    per_token = {}
+    for i, token in enumerate(tokens):
+        any_token |= Q(term__startswith=token)
+        per_token[f"t{i}"] = Max(Case(When(term__startswith=token, then=1), default=0, output_field=IntegerField()))
+
+    rows = (
+        SearchTerm.objects.filter(any_token, language_code=language)
+        .values('document_id')
+        .annotate(
+            score=Sum('weight') + Sum(Case(When(term__in=tokens, then=F('weight')), default=0, output_field=IntegerField())),
+            **per_token,
+        )
+        .annotate(matched=sum(F(name) for name in per_token))
+        .filter(matched=len(tokens))
+        .order_by('-score', 'document_id')
+        .values_list('document_id', 'score')
+    )
+    return list(rows)
+
+
+def _filter_q(filters, exclude=None):
+    """Q for the document filters, leaving out `exclude` (for that facet's own counts)."""
+    q = Q()
+    for field in FACET_FIELDS:
+        if field != exclude and filters.get(field):
+            q &= Q(**{field: filters[field]})
+    if filters.get('min_price') is not None:
+        q &= Q(price__gte=filters['min_price'])
+    if filters.get('max_price') is not None:
+        q &= Q(price__lte=filters['max_price'])
+    if filters.get('max_duration') is not None:
+        q &= Q(duration_days__lte=filters['max_duration'])
+    if filters.get('available'):
+        q &= Q(is_sold_out=False) & (Q(end_date__isnull=True) | Q(end_date__gte=timezone.localdate()))
+    for flag in ('is_on_discount', 'is_special_offer', 'is_all_inclusive'):
+        if filters.get(flag):
+            q &= Q(**{flag: True})
+    return q
+
+
+def parse_filters(params):
+    """Search filters from request.GET (unknown or malformed values are ignored)."""
+    def decimal_or_none(value):
+        try:
+            return Decimal(value) if value not in (None, '') else None
+        except InvalidOperation:
+            return None
+
+    filters = {field: params.get(field, '').strip() for field in FACET_FIELDS}
+    filters['min_price'] = decimal_or_none(params.get('min_price'))
+    filters['max_price'] = decimal_or_none(params.get('max_price'))
+    filters['max_duration'] = int(params['max_duration']) if params.get('max_duration', '').isdigit() else None
+    for flag in ('available', 'is_on_discount', 'is_special_offer', 'is_all_inclusive'):
+        filters[flag] = params.get(flag) in ('1', 'true', 'on')
+    return filters
+
+
+# ──────────────────────────── Facets ────────────────────────────
+
+def _bucket_counts(documents, field, buckets, inclusive=False):
+    """{'low-high': n} for each (low, high) bucket; high is exclusive unless `inclusive`."""
+    aggregates = {}
+    for low, high in buckets:
+        condition = Q(**{f"{field}__gte": low})
+        if high is not None:
+            condition &= Q(**{f"{field}__lte" if inclusive else f"{field}__lt": high})
+        aggregates[f"{low}-{high or ''}"] = Count('pk', filter=condition)
+    return documents.aggregate(**aggregates)
+
+
+def facet_counts(language, document_ids, filters):
+    """{'kind': {value: n}, 'tour_type': ..., 'destination': ..., 'price': {...}, 'duration': {...}}"""
+    base = SearchDocument.objects.filter(language_code=language)
+    if document_ids is not None:
+        base = base.filter(pk__in=document_ids)
+
+    facets = {}
+    for field in FACET_FIELDS:
+        rows = base.filter(_filter_q(filters, exclude=field)).exclude(**{field: ''}).values(field).annotate(count=Count('pk'))
+        facets[field] = {row[field]: row['count'] for row in rows.order_by(field)}
+
+    filtered = base.filter(_filter_q(filters))
+    facets['price'] = _bucket_counts(filtered, 'price', PRICE_BUCKETS)
+    facets['duration'] = _bucket_counts(filtered, 'duration_days', DURATION_BUCKETS, inclusive=True)
+    return facets
+
+
+# ──────────────────────────── Public API ────────────────────────────
+
+def search_documents(query, language, filters=None):
+    """
+    Ranked search over one locale's index.
+    Returns {'ids': [document ids, best first], 'corrected_query': str or None, 'facets': {...}}.
+    Without query terms every document passing the filters is returned, ordered by title.
+    """
+    filters = filters or {}
+    tokens = tokenize(query)
+    corrected_query = None
+
+    if tokens:
+        ranked = match_documents(tokens, language)
+        if not ranked:
+            corrected = correct_tokens(tokens, language)
+            if corrected and corrected != tokens:
+                ranked = match_documents(corrected, language)
+                corrected_query = ' '.join(corrected) if ranked else None
+        candidate_ids = [document_id for document_id, _ in ranked]
+        allowed = set(
+            SearchDocument.objects.filter(pk__in=candidate_ids).filter(_filter_q(filters)).values_list('pk', flat=True)
+        )
+        ids = [document_id for document_id in candidate_ids if document_id in allowed]
+    else:
+        candidate_ids = None
+        ids = list(
+            SearchDocument.objects.filter(language_code=language).filter(_filter_q(filters))
+            .order_by('title').values_list('pk', flat=True)
+        )
+
+    logger.debug(f"Search {query!r} ({language}): {len(ids)} results")
+    return {
+        'ids': ids,
+        'corrected_query': corrected_query,
+        'facets': facet_counts(language, candidate_ids, filters),
+    }
+
+
+def load_documents(ids):
+    """SearchDocuments for `ids`, in the same order."""
+    documents = SearchDocument.objects.in_bulk(ids)
+    return [documents[pk] for pk in ids if pk in documents]
+
+
+def autocomplete(prefix, language, limit=8):
+    """Up to `limit` {'title', 'url', 'kind', 'destination'} suggestions for a partial query."""
+    tokens = tokenize(prefix)
+    if not tokens:
+        return []
+    ranked = match_documents(tokens, language) or match_documents(correct_tokens(tokens, language), language)
+    documents = load_documents([document_id for document_id, _ in ranked[:limit]])
+    return [
+        {'title': d.title, 'url': d.url, 'kind': d.kind, 'destination': d.destination}
+        for d in documents
+    ]
@@ -0,0 +1,35 @@
+import logging
+
+from django.db import transaction
+from django.dispatch import receiver
+
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from search.autocomplete import rebuild_index
+from search.indexer import index_page, indexed_models, remove_page
+
+logger = logging.getLogger(__name__)
+
+
+def _reindex(page, remove=False):
+    if not isinstance(page.specific, tuple(indexed_models())):
+        return
+    try:
+        if remove:
+            remove_page(page.pk)
+        else:
+            index_page(page)
+        rebuild_index(page.locale.language_code)
+    except Exception as e:  # Never fail a publish because of the search index
+        logger.error(f"Search indexing failed for page {page.pk}: {e}")
+
+
+@receiver(page_published)
+@receiver(post_page_move)
+def index_on_publish(sender, instance, **kwargs):
+    transaction.on_commit(lambda: _reindex(instance))
+
+
+@receiver(page_unpublished)
+def remove_on_unpublish(sender, instance, **kwargs):
+    transaction.on_commit(lambda: _reindex(instance, remove=True))
@@ -1,7 +1,10 @@
+from django.conf import settings
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
-from django.template.response import TemplateResponse
-from django.shortcuts import render  # Add this import
-from wagtail.models import Page, Locale  # Add Locale for Issue 2
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from search.autocomplete import AUTOCOMPLETE_LIMIT, AUTOCOMPLETE_MAX_LIMIT, suggest
+from search.query import load_documents, parse_filters, search_documents
 
 # To enable logging of search queries for use with the "Promoted search results" module
 # <https://docs.wagtail.org/en/stable/reference/contrib/searchpromotions.html>
@@ -11,45 +14,66 @@ from wagtail.models import Page, Locale  # Add Locale for Issue 2
 # from wagtail.contrib.search_promotions.models import Query
 
 
+def _index_language(request):
+    # The index is per locale; unknown languages fall back to the default one
+    language = request.LANGUAGE_CODE
+    return language if language in dict(settings.WAGTAIL_CONTENT_LANGUAGES) else settings.LANGUAGE_CODE
+
+
 def search(request):
     search_query = request.GET.get("query", None)
     page = request.GET.get("page", 1)
+    current_language = _index_language(request)
 
-    current_language = request.LANGUAGE_CODE  # For locale filtering (Issue 2)
+    filters = parse_filters(request.GET)
+    corrected_query = None
+    facets = {}
 
-    # Search
+    # Search (search.models index: ranked, typo-tolerant, with facet counts)
     if search_query:
-        try:
-            locale = Locale.objects.get(language_code=current_language)
-        except Locale.DoesNotExist:
-            # Fallback to default locale if current language not found
-            locale = Locale.get_default()
-        
-        search_results = Page.objects.live().filter(locale=locale).search(search_query)        # To log this query for use with the "Promoted search results" module:
+        results = search_documents(search_query, current_language, filters)
+        result_ids = results['ids']
+        corrected_query = results['corrected_query']
+        facets = results['facets']
 
+        # To log this query for use with the "Promoted search results" module:
         # query = Query.get(search_query)
         # query.add_hit()
 
     else:
-        search_results = Page.objects.none()
+        result_ids = []
 
-    # Pagination
-    paginator = Paginator(search_results, 10)
+    # Pagination (over document ids; only the current page's documents are loaded)
+    paginator = Paginator(result_ids, 10)
     try:
         search_results = paginator.page(page)
     except PageNotAnInteger:
         search_results = paginator.page(1)
     except EmptyPage:
         search_results = paginator.page(paginator.num_pages)
+    search_results.object_list = load_documents(list(search_results.object_list))
 
-    return render(  # Switch to render
+    return render(
         request,
         ["search/search.html", "search/search_bar.html"],
         {
             "search_query": search_query,
             "search_results": search_results,
+            "corrected_query": corrected_query,
+            "facets": facets,
+            "filters": filters,
         },
     )
 
 
-        
+def autocomplete(request):
+    """Search-as-you-type suggestions (in-memory index, no database access on a warm worker)."""
+    query = request.GET.get("q", "")[:100]
+    try:
+        limit = max(1, min(int(request.GET.get("limit", AUTOCOMPLETE_LIMIT)), AUTOCOMPLETE_MAX_LIMIT))
+    except ValueError:
+        limit = AUTOCOMPLETE_LIMIT
+    return JsonResponse({
+        "query": query,
+        "results": suggest(query, _index_language(request), limit),
+    })
@@ -6,9 +6,13 @@ from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
 from wagtail_modeladmin.options import ModelAdmin, ModelAdminGroup, modeladmin_register
+from wagtail_modeladmin.views import IndexView
+from wagtail.snippets.models import register_snippet
+from wagtail.snippets.views.snippets import IndexView as SnippetIndexView, SnippetViewSet
 from import_export.admin import ImportExportMixin  # This gives you Import/Export buttons
 
-from bookings.models import Proposal, Booking
+from bookings.models import AccommodationBooking, Proposal, Booking
+from bookings.utils.prefetch import iter_prefetched, prefetch_generic
 
 
 # Helper: link to the actual tour page in Wagtail explorer
@@ -26,12 +30,37 @@ def tour_admin_link(obj):
 tour_admin_link.short_description = _("Tour")
 
 
+class TourPrefetchIndexView(IndexView):
+    """Index view that loads every row's tour page up front (one query per tour type)."""
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["object_list"] = prefetch_generic(context["object_list"], "tour")
+        return context
+
+
+class AccommodationPrefetchIndexView(SnippetIndexView):
+    """Snippet index that loads every row's accommodation page up front (its __str__ reads it)."""
+
+    def get_table(self, object_list):
+        return super().get_table(prefetch_generic(object_list, "accommodation"))
+
+
+class AccommodationBookingViewSet(SnippetViewSet):
+    model = AccommodationBooking
+    index_view_class = AccommodationPrefetchIndexView
+
+
+register_snippet(AccommodationBookingViewSet)
+
+
 # ======================== PROPOSAL ADMIN ================================
 class ProposalAdmin(ImportExportMixin, ModelAdmin):
     model = Proposal
     menu_label = _("Proposals")
     menu_icon = "doc-full-inverse"
     menu_order = 200
+    index_view_class = TourPrefetchIndexView
     list_display = (
         "prop_id",
         "customer_name",
@@ -75,6 +104,9 @@ class ProposalAdmin(ImportExportMixin, ModelAdmin):
                 )
                 export_order = fields
 
+            def iter_queryset(self, queryset):
+                yield from iter_prefetched(super().iter_queryset(queryset), "tour")
+
             def dehydrate_tour(self, obj):
                 return str(obj.tour) if obj.tour else ""
 
@@ -87,6 +119,7 @@ class BookingAdmin(ImportExportMixin, ModelAdmin):
     menu_label = _("Bookings")
     menu_icon = "folder-open-inverse"
     menu_order = 201
+    index_view_class = TourPrefetchIndexView
     list_display = (
         "book_id",
         "customer_name",
@@ -1,6 +1,7 @@
 
 from requests import request
 from bookings.models import Booking
+from bookings.utils.prefetch import prefetch_generic
 from tours.views import base_context
 from partners.models import Partner
 from django.http import JsonResponse
@@ -104,6 +105,7 @@ def manage_bookings(request):
     paginator = Paginator(bookings, 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    page_obj.object_list = prefetch_generic(page_obj.object_list, 'tour')
     if request.htmx:
         return render(request, 'partials/booking_list.html', {'bookings': page_obj})
     return render(request, 'staff_tools/manage_bookings.html', {'bookings': page_obj})
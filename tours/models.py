@@ -37,6 +37,7 @@ from wagtailseo.models import SeoMixin
 from django.utils.translation import gettext_lazy as _
 from wagtail.contrib.routable_page.models import RoutablePageMixin, path
 
+from mtapp.listings import TOUR_CARD_IMAGE_SPEC, attach_images, tour_cards
 from mtapp.utils_blocks import PricingTierBlock
 from streams import blocks
 
@@ -108,35 +109,25 @@ class ToursIndexPage(SeoMixin, RoutablePageMixin, Page):
 
         tour_models = (LandTourPage, DayTourPage, FullTourPage)
 
-        # ALL TOURS — start with specific descendants
-        base_qs = Page.objects.live().public().descendant_of(self).specific().filter(locale=self.locale)
-
-        # Apply tour type filter first
+        # ALL TOURS — card projections only (no StreamField bodies)
         tour_type_filter = request.GET.get('tour_type')
-        if tour_type_filter:
-            type_map = {
-                'land': LandTourPage,
-                'day': DayTourPage,
-                'full': FullTourPage,
-            }
-            if tour_type_filter in type_map:
-                base_qs = base_qs.type(type_map[tour_type_filter])
+        type_map = {
+            'land': LandTourPage,
+            'day': DayTourPage,
+            'full': FullTourPage,
+        }
+        if tour_type_filter in type_map:
+            tour_models = (type_map[tour_type_filter],)
 
-        # Now get the actual tours (with start_date)
         tours = []
         for model in tour_models:
-            qs = base_qs.type(model)
-            tours.extend(list(qs))
+            qs = model.objects.live().public().descendant_of(self).filter(locale=self.locale)
+            tours.extend(tour_cards(qs))
 
-        print(f"*** Total tours collected: {len(tours)}")
+        logger.debug(f"Total tours collected: {len(tours)}")
 
         # UNIQUE DESTINATIONS
-        unique_destinations = set()
-        for tour in tours:
-            if hasattr(tour, 'destination') and tour.destination:
-                unique_destinations.add(tour.destination)
-        unique_destinations = sorted(list(unique_destinations))
-        print(f"*** Unique destinations: {unique_destinations}")
+        unique_destinations = sorted({tour.destination for tour in tours if tour.destination})
 
         # APPLY OTHER FILTERS (status, destination, pricing_type, price)
         filtered_tours = tours.copy()
@@ -183,7 +174,7 @@ class ToursIndexPage(SeoMixin, RoutablePageMixin, Page):
         # ORDER BY start_date (now safe — all objects have it)
         filtered_tours.sort(key=lambda t: getattr(t, 'start_date', date.min), reverse=True)
 
-        print(f"*** Final filtered count: {len(filtered_tours)}")
+        logger.debug(f"Final filtered count: {len(filtered_tours)}")
 
         # PAGINATE
         paginator = Paginator(filtered_tours, 12)
@@ -194,6 +185,7 @@ class ToursIndexPage(SeoMixin, RoutablePageMixin, Page):
             tours_pag = paginator.page(1)
         except EmptyPage:
             tours_pag = paginator.page(paginator.num_pages)
+        attach_images(tours_pag.object_list, TOUR_CARD_IMAGE_SPEC)
 
         context.update({
             'tours_pag': tours_pag,